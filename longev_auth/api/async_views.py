@@ -0,0 +1,217 @@
+import asyncio
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from drf_yasg.utils import swagger_auto_schema
+from rest_framework import status
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from .hashing import averify_password, schedule_rehash
+from .otp_store import get_otp_store
+from .parsers import FAST_PARSER_CLASSES
+from .payloads import OtpAuthPayload, OtpRequestPayload, PasswordAuthPayload
+from .profile_cache import cached_profile_response
+from .renderers import FAST_RENDERER_CLASSES
+from .serializers import (
+    OtpAuthSerializer,
+    OtpRequestSerializer,
+    PasswordAuthSerializer,
+    TokenSerializer,
+    UpdateUserSerializer,
+)
+from .throttling import AUTH_THROTTLE_CLASSES
+from api.utils import (
+    deactivate_user,
+    generate_otp_code,
+    get_user_for_update,
+    get_user_or_404,
+    get_user_token,
+    record_login,
+    send_otp_email,
+)
+from core.constants import Messages
+
+User = get_user_model()
+
+
+async def aget_user_or_404(email: str, related=()):
+    """Async counterpart of get_user_or_404."""
+    return await sync_to_async(get_user_or_404)(email, related)
+
+
+class AsyncAPIView(APIView):
+    """APIView whose handlers may be coroutines.
+
+    Authentication, permission and throttling checks may hit the database,
+    so they run through sync_to_async. The view function returned by
+    as_view() is a coroutine function, which makes Django serve it natively
+    under ASGI.
+    """
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        view = super().as_view(**initkwargs)
+
+        @wraps(view)
+        async def async_view(*args, **kwargs):
+            return await view(*args, **kwargs)
+
+        return async_view
+
+    async def dispatch(self, request, *args, **kwargs):
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            await sync_to_async(self.initial)(request, *args, **kwargs)
+            if request.method.lower() in self.http_method_names:
+                handler = getattr(
+                    self, request.method.lower(), self.http_method_not_allowed
+                )
+            else:
+                handler = self.http_method_not_allowed
+            response = handler(request, *args, **kwargs)
+            if asyncio.iscoroutine(response):
+                response = await response
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(
+            request, response, *args, **kwargs
+        )
+        return self.response
+
+
+class AsyncProfileView(AsyncAPIView):
+    """Allows retrieve, update and delete user profile."""
+
+    permission_classes = [IsAuthenticated]
+
+    async def get(self, request, *args, **kwargs):
+        """Get user profile, 304 if If-None-Match has its ETag."""
+        return await sync_to_async(cached_profile_response)(request)
+
+    async def put(self, request, *args, **kwargs):
+        """Update user profile."""
+        return await self._update(request, partial=False)
+
+    async def patch(self, request, *args, **kwargs):
+        """Partially update user profile."""
+        return await self._update(request, partial=True)
+
+    async def delete(self, request, *args, **kwargs):
+        """Delete user profile."""
+        await sync_to_async(deactivate_user)(request.user.pk)
+        return Response(
+            {"message": Messages.PROFILE_DELETED},
+            status=status.HTTP_204_NO_CONTENT,
+        )
+
+    async def _update(self, request, partial):
+        data = await sync_to_async(self._save)(
+            request.user.pk, request.data, partial
+        )
+        return Response(data, status=status.HTTP_200_OK)
+
+    @staticmethod
+    @transaction.atomic
+    def _save(user_id, data, partial) -> dict:
+        serializer = UpdateUserSerializer(
+            get_user_for_update(user_id), data=data, partial=partial
+        )
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        return serializer.data
+
+
+class AsyncPasswordAuthView(AsyncAPIView):
+    permission_classes = (AllowAny,)
+    throttle_classes = AUTH_THROTTLE_CLASSES
+    throttle_scope = "password"
+    parser_classes = FAST_PARSER_CLASSES
+    renderer_classes = FAST_RENDERER_CLASSES
+
+    @swagger_auto_schema(
+        request_body=PasswordAuthSerializer, responses={200: TokenSerializer}
+    )
+    async def post(self, request):
+        """Return jwt token for given email and password."""
+        payload = PasswordAuthPayload(data=request.data)
+        payload.is_valid(raise_exception=True)
+        email = payload.validated_data["email"]
+        password = payload.validated_data["password"]
+        user = await aget_user_or_404(email)
+        if not user.is_active:
+            raise ValidationError({"message": Messages.PROFILE_IS_INACTIVE})
+        if not await averify_password(password, user.password):
+            raise ValidationError({"message": Messages.INCORRECT_PASSWORD})
+        schedule_rehash(user, password)
+        await sync_to_async(record_login)(user)
+        token_data = get_user_token(user)
+        return Response(token_data, status=status.HTTP_200_OK)
+
+
+class AsyncOtpRequestView(AsyncAPIView):
+    permission_classes = (AllowAny,)
+    throttle_classes = AUTH_THROTTLE_CLASSES
+    throttle_scope = "otp"
+    parser_classes = FAST_PARSER_CLASSES
+    renderer_classes = FAST_RENDERER_CLASSES
+
+    @swagger_auto_schema(request_body=OtpRequestSerializer)
+    async def post(self, request):
+        """Generate otp code and send to given email."""
+        payload = OtpRequestPayload(data=request.data)
+        payload.is_valid(raise_exception=True)
+        email = payload.validated_data["email"]
+        user = await aget_user_or_404(email)
+        if not user.is_active:
+            raise ValidationError({"message": Messages.PROFILE_IS_INACTIVE})
+        otp = generate_otp_code()
+        # A repeated request gets the answer of the first one, its code
+        # is still on the way.
+        if await sync_to_async(get_otp_store().issue)(user, otp):
+            # The broker round trip needs no DB access, so it may leave
+            # the thread shared with the ORM calls.
+            await sync_to_async(send_otp_email, thread_sensitive=False)(
+                user, otp
+            )
+        return Response(
+            {"message": Messages.OTP_SENT_TO_EMAIL.format(email=user.email)},
+            status=status.HTTP_200_OK,
+        )
+
+
+class AsyncOtpAuthView(AsyncAPIView):
+    permission_classes = (AllowAny,)
+    throttle_classes = AUTH_THROTTLE_CLASSES
+    throttle_scope = "otp_auth"
+    parser_classes = FAST_PARSER_CLASSES
+    renderer_classes = FAST_RENDERER_CLASSES
+
+    @swagger_auto_schema(
+        request_body=OtpAuthSerializer, responses={200: TokenSerializer}
+    )
+    async def post(self, request):
+        """Return jwt token for given email and otp code."""
+        payload = OtpAuthPayload(data=request.data)
+        payload.is_valid(raise_exception=True)
+        email = payload.validated_data["email"]
+        otp = payload.validated_data["otp"]
+        otp_store = get_otp_store()
+        user = await aget_user_or_404(email, otp_store.user_related)
+        if not user.is_active:
+            raise ValidationError({"message": Messages.PROFILE_IS_INACTIVE})
+        if not await sync_to_async(otp_store.consume)(user, otp):
+            raise ValidationError({"message": Messages.INCORRECT_OTP})
+        await sync_to_async(record_login)(user)
+        token_data = get_user_token(user)
+        return Response(token_data, status=status.HTTP_200_OK)
@@ -0,0 +1,124 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from . import metrics
+
+cache_hits = metrics.CACHE_REQUESTS.labels("token_user", "hit")
+cache_misses = metrics.CACHE_REQUESTS.labels("token_user", "miss")
+
+
+class TokenUserCache:
+    """Thread safe LRU of raw token -> (user, validated token).
+
+    Every entry expires at the token's `exp` claim or after `ttl` seconds,
+    whichever comes first, so a user edited in another process is seen
+    again after at most `ttl` seconds.
+    """
+
+    def __init__(self, max_size: int, ttl: int):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._user_tokens = {}
+        self._lock = threading.Lock()
+
+    def get(self, raw_token: bytes):
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(raw_token)
+            if entry is None:
+                self.misses += 1
+                cache_misses.inc()
+                return None
+            expires_at, user, validated_token = entry
+            if expires_at <= now:
+                self._remove(raw_token)
+                self.misses += 1
+                cache_misses.inc()
+                return None
+            self._entries.move_to_end(raw_token)
+            self.hits += 1
+            cache_hits.inc()
+        return copy.copy(user), validated_token
+
+    def set(self, raw_token: bytes, user, validated_token):
+        expires_at = min(validated_token["exp"], time.time() + self.ttl)
+        with self._lock:
+            if raw_token in self._entries:
+                self._remove(raw_token)
+            self._entries[raw_token] = (
+                expires_at,
+                copy.copy(user),
+                validated_token,
+            )
+            self._user_tokens.setdefault(user.pk, set()).add(raw_token)
+            while len(self._entries) > self.max_size:
+                self._remove(next(iter(self._entries)))
+
+    def invalidate_user(self, user_id):
+        with self._lock:
+            for raw_token in self._user_tokens.pop(user_id, ()):
+                self._entries.pop(raw_token, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._user_tokens.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "size": len(self._entries),
+            }
+
+    def _remove(self, raw_token):
+        _, user, _ = self._entries.pop(raw_token)
+        tokens = self._user_tokens.get(user.pk)
+        if tokens is not None:
+            tokens.discard(raw_token)
+            if not tokens:
+                del self._user_tokens[user.pk]
+
+
+token_user_cache = TokenUserCache(
+    max_size=settings.JWT_AUTH_CACHE_SIZE,
+    ttl=settings.JWT_AUTH_CACHE_TTL,
+)
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication that skips verification and user query on repeat.
+
+    Verified tokens are remembered with a snapshot of their user, so a
+    client reusing its access token costs no signature check and no
+    database query until the entry expires or the user is changed.
+    """
+
+    def authenticate(self, request):
+        header = self.get_header(request)
+        if header is None:
+            return None
+
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+
+        cached = token_user_cache.get(raw_token)
+        if cached is not None:
+            return cached
+
+        validated_token = self.get_validated_token(raw_token)
+        user = self.get_user(validated_token)
+        token_user_cache.set(raw_token, user, validated_token)
+        return user, validated_token
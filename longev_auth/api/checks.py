@@ -0,0 +1,27 @@
+from django.conf import settings
+from django.core.checks import Error, register
+
+
+@register()
+def check_password_hash_pool(app_configs, **kwargs):
+    """Admitted password checks must leave gunicorn a free request thread.
+
+    Every admitted check holds a request thread until its hash is done, so
+    a login flood could otherwise block every thread of a worker.
+    """
+    if settings.ASYNC_API:
+        return []
+    admitted = (
+        settings.PASSWORD_HASH_WORKERS + settings.PASSWORD_HASH_QUEUE_SIZE
+    )
+    if admitted < settings.GUNICORN_THREADS:
+        return []
+    return [
+        Error(
+            f"PASSWORD_HASH_WORKERS + PASSWORD_HASH_QUEUE_SIZE ({admitted})"
+            f" must be less than GUNICORN_THREADS"
+            f" ({settings.GUNICORN_THREADS}).",
+            hint="Lower PASSWORD_HASH_QUEUE_SIZE or raise GUNICORN_THREADS.",
+            id="api.E001",
+        )
+    ]
@@ -0,0 +1,120 @@
+import hashlib
+import logging
+import math
+
+import redis
+from django.conf import settings
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class EmailBloomFilter:
+    """Bloom filter of registered emails kept in a Redis string.
+
+    A negative answer means the email is surely not registered, a positive
+    one may be false with probability about `error_rate` once `capacity`
+    emails are added. Until the filter is built every email is reported as
+    possibly registered, and adding to a missing filter is a no-op, so a
+    partial filter never hides an existing user.
+    """
+
+    check_script = """
+        if redis.call("EXISTS", KEYS[1]) == 0 then
+            return 1
+        end
+        for _, offset in ipairs(ARGV) do
+            if redis.call("GETBIT", KEYS[1], offset) == 0 then
+                return 0
+            end
+        end
+        return 1
+    """
+    add_script = """
+        if redis.call("EXISTS", KEYS[1]) == 1 then
+            for _, offset in ipairs(ARGV) do
+                redis.call("SETBIT", KEYS[1], offset, 1)
+            end
+        end
+        return 0
+    """
+
+    def __init__(self, client, key: str, capacity: int, error_rate: float):
+        self.client = client
+        self.key = key
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.size = math.ceil(
+            -capacity * math.log(error_rate) / math.log(2) ** 2
+        )
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self._check = client.register_script(self.check_script)
+        self._add = client.register_script(self.add_script)
+
+    def offsets(self, email: str) -> list[int]:
+        digest = hashlib.blake2b(email.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hash_count)]
+
+    def might_contain(self, email: str) -> bool:
+        try:
+            found = bool(
+                self._check(keys=[self.key], args=self.offsets(email))
+            )
+        except redis.RedisError:
+            logger.warning("Email filter is unavailable")
+            return True
+        metrics.CACHE_REQUESTS.labels(
+            "email_filter", "miss" if found else "hit"
+        ).inc()
+        return found
+
+    def add(self, email: str) -> None:
+        try:
+            self._add(keys=[self.key], args=self.offsets(email))
+        except redis.RedisError:
+            logger.warning("Email filter is unavailable, %s not added", email)
+
+    def rebuild(self, emails) -> int:
+        """Replace filter with one built from emails, return their count."""
+        bits = bytearray(math.ceil(self.size / 8))
+        count = 0
+        for email in emails:
+            for offset in self.offsets(email):
+                bits[offset >> 3] |= 0x80 >> (offset & 7)
+            count += 1
+        tmp_key = f"{self.key}:rebuild"
+        self.client.set(tmp_key, bytes(bits))
+        self.client.rename(tmp_key, self.key)
+        return count
+
+    def expected_error_rate(self, count: int) -> float:
+        """False positive probability once count emails are added."""
+        k, m = self.hash_count, self.size
+        return (1 - math.exp(-k * count / m)) ** k
+
+
+def make_email_filter(**client_options) -> EmailBloomFilter:
+    return EmailBloomFilter(
+        client=redis.Redis.from_url(
+            settings.EMAIL_FILTER_REDIS_URL, **client_options
+        ),
+        key=settings.EMAIL_FILTER_KEY,
+        capacity=settings.EMAIL_FILTER_CAPACITY,
+        error_rate=settings.EMAIL_FILTER_ERROR_RATE,
+    )
+
+
+_filter = None
+
+
+def get_email_filter():
+    """Return the email filter, None when EMAIL_FILTER_ENABLED is off."""
+    global _filter
+    if _filter is None and settings.EMAIL_FILTER_ENABLED:
+        _filter = make_email_filter(
+            socket_connect_timeout=0.1, socket_timeout=0.1
+        )
+    return _filter
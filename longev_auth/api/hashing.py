@@ -0,0 +1,158 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import (
+    check_password,
+    get_hasher,
+    identify_hasher,
+    make_password,
+)
+from django.db import connection
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+from . import metrics
+from .authentication import token_user_cache
+from .profiling import phase
+from core.constants import Messages
+
+User = get_user_model()
+
+
+class HashingBusy(APIException):
+    """Hashing pool is saturated, client should retry later."""
+
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = Messages.SERVICE_BUSY
+    default_code = "service_busy"
+
+    def __init__(self, wait=None):
+        super().__init__({"message": Messages.SERVICE_BUSY})
+        self.wait = wait
+
+
+class HashingExecutor:
+    """Bounded thread pool for password hash verification.
+
+    argon2-cffi releases the GIL while hashing, so a small pool of threads
+    keeps hashing off the request threads and caps the CPU a login burst
+    can take. At most `max_workers + queue_size` verifications are
+    admitted at once, further ones are rejected immediately.
+    """
+
+    def __init__(self, max_workers: int, queue_size: int):
+        self.max_workers = max_workers
+        self.queue_size = queue_size
+        self._slots = threading.BoundedSemaphore(max_workers + queue_size)
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="pwd-hash"
+        )
+
+    def submit(self, func, *args, **kwargs):
+        if not self._slots.acquire(blocking=False):
+            raise HashingBusy(wait=settings.PASSWORD_HASH_RETRY_AFTER)
+        try:
+            future = self._executor.submit(func, *args, **kwargs)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def run(self, func, *args, **kwargs):
+        return self.submit(func, *args, **kwargs).result()
+
+    def shutdown(self, wait: bool = True):
+        self._executor.shutdown(wait=wait)
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_hashing_executor() -> HashingExecutor:
+    """Return the process wide hashing executor, created on first use.
+
+    Creation is lazy so every gunicorn worker gets its own pool after fork.
+    """
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = HashingExecutor(
+                    max_workers=settings.PASSWORD_HASH_WORKERS,
+                    queue_size=settings.PASSWORD_HASH_QUEUE_SIZE,
+                )
+    return _executor
+
+
+@metrics.PASSWORD_VERIFY_SECONDS.time()
+def timed_check_password(password: str, encoded: str) -> bool:
+    return check_password(password, encoded)
+
+
+def verify_password(password: str, encoded: str) -> bool:
+    """Check password against encoded hash on the hashing executor."""
+    with phase("hash"):
+        return get_hashing_executor().run(
+            timed_check_password, password, encoded
+        )
+
+
+async def averify_password(password: str, encoded: str) -> bool:
+    """Await password check on the hashing executor from the event loop."""
+    with phase("hash"):
+        future = get_hashing_executor().submit(
+            timed_check_password, password, encoded
+        )
+        return await asyncio.wrap_future(future)
+
+
+def needs_rehash(encoded: str) -> bool:
+    """Whether hash is not made by the preferred hasher with its costs."""
+    preferred = get_hasher("default")
+    try:
+        hasher = identify_hasher(encoded)
+    except ValueError:
+        return False
+    return hasher.algorithm != preferred.algorithm or preferred.must_update(
+        encoded
+    )
+
+
+def rehash_password(user_id, password: str, encoded: str) -> bool:
+    """Store password hashed by the preferred hasher.
+
+    Only the password column is written and only if it still holds the
+    hash that was checked, so a concurrent password change wins.
+    """
+    try:
+        updated = User.objects.filter(pk=user_id, password=encoded).update(
+            password=make_password(password)
+        )
+    finally:
+        # Executor threads are not request threads, nothing else closes it.
+        connection.close()
+    if updated:
+        # An update sends no post_save, drop snapshots with the old hash.
+        token_user_cache.invalidate_user(user_id)
+    return bool(updated)
+
+
+def schedule_rehash(user, password: str):
+    """Upgrade hash of just verified password in the background.
+
+    Returns the future of the rehash, None if it is not needed or the
+    executor is busy, the hash is then upgraded on a later login.
+    """
+    if not needs_rehash(user.password):
+        return None
+    try:
+        return get_hashing_executor().submit(
+            rehash_password, user.pk, password, user.password
+        )
+    except HashingBusy:
+        return None
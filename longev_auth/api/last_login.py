@@ -0,0 +1,81 @@
+import logging
+import time
+from datetime import datetime
+
+import redis
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.models import Q
+
+logger = logging.getLogger(__name__)
+
+User = get_user_model()
+
+
+class LastLoginBuffer:
+    """Latest login time per user buffered in a Redis hash.
+
+    A login only overwrites the user's hash field, so a user logging in
+    from many devices costs one row update per flush instead of one per
+    login. A flush moves the hash aside before writing it, logins arriving
+    meanwhile go to a new hash. While Redis is down logins are written to
+    the database right away, as the same single column update a flush
+    does, Redis is tried again after LAST_LOGIN_REDIS_RETRY seconds.
+    """
+
+    def __init__(self, url: str, key: str = "last_login"):
+        self.client = redis.Redis.from_url(
+            url, socket_connect_timeout=0.1, socket_timeout=1
+        )
+        self.key = key
+        self.flush_key = f"{key}:flushing"
+        self._redis_down_until = 0.0
+
+    def record(self, user) -> None:
+        """Buffer last_login of user."""
+        if time.monotonic() >= self._redis_down_until:
+            try:
+                self.client.hset(
+                    self.key, user.pk, user.last_login.isoformat()
+                )
+                return
+            except redis.RedisError:
+                logger.warning("Redis is unavailable, writing last logins")
+                self._redis_down_until = (
+                    time.monotonic() + settings.LAST_LOGIN_REDIS_RETRY
+                )
+        # No save(), its receivers would call the same Redis again.
+        User.objects.filter(
+            Q(last_login__isnull=True) | Q(last_login__lt=user.last_login),
+            pk=user.pk,
+        ).update(last_login=user.last_login)
+
+    def flush(self, batch_size: int) -> int:
+        """Write buffered logins to the database, return updated rows."""
+        # Logins left by a failed flush are written before the new ones.
+        if not self.client.exists(self.flush_key):
+            try:
+                self.client.rename(self.key, self.flush_key)
+            except redis.ResponseError:
+                return 0
+        logins = {
+            int(user_id): datetime.fromisoformat(last_login.decode())
+            for user_id, last_login in self.client.hgetall(
+                self.flush_key
+            ).items()
+        }
+        updated = User.objects.update_last_logins(logins, batch_size)
+        self.client.delete(self.flush_key)
+        return updated
+
+
+_buffer = None
+
+
+def get_last_login_buffer() -> LastLoginBuffer:
+    global _buffer
+    if _buffer is None:
+        _buffer = LastLoginBuffer(
+            settings.LAST_LOGIN_REDIS_URL, key=settings.LAST_LOGIN_REDIS_KEY
+        )
+    return _buffer
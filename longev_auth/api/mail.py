@@ -0,0 +1,74 @@
+import smtplib
+import threading
+import time
+
+from celery.signals import worker_process_shutdown
+from django.conf import settings
+from django.core.mail import get_connection
+
+
+class PersistentMailConnection:
+    """SMTP connection kept open between sends of one worker process.
+
+    Opening a connection costs a TCP and TLS handshake plus login, which
+    is most of the time spent on a single short email. The connection is
+    reopened when the server drops it and recycled after `max_age`
+    seconds, so it does not outlive server idle timeouts for long.
+    """
+
+    reconnect_errors = (
+        smtplib.SMTPServerDisconnected,
+        smtplib.SMTPConnectError,
+        ConnectionError,
+        TimeoutError,
+    )
+
+    def __init__(self, max_age: int):
+        self.max_age = max_age
+        self._connection = None
+        self._opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def send_messages(self, messages) -> int:
+        """Send messages over the shared connection, return sent count."""
+        with self._lock:
+            try:
+                return self._get().send_messages(messages)
+            except self.reconnect_errors:
+                self._close()
+                return self._get().send_messages(messages)
+
+    def close(self):
+        with self._lock:
+            self._close()
+
+    def _get(self):
+        if (
+            self._connection is not None
+            and time.monotonic() - self._opened_at > self.max_age
+        ):
+            self._close()
+        if self._connection is None:
+            self._connection = get_connection(fail_silently=False)
+            self._connection.open()
+            self._opened_at = time.monotonic()
+        return self._connection
+
+    def _close(self):
+        if self._connection is None:
+            return
+        try:
+            self._connection.close()
+        except Exception:
+            pass
+        self._connection = None
+
+
+mail_connection = PersistentMailConnection(
+    max_age=settings.EMAIL_CONNECTION_MAX_AGE
+)
+
+
+@worker_process_shutdown.connect
+def close_mail_connection(**kwargs):
+    mail_connection.close()
@@ -0,0 +1,107 @@
+import statistics
+import time
+
+from argon2.low_level import Type, hash_secret
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Memory costs in KiB tried from the smallest, 19 MiB is the OWASP minimum.
+MEMORY_COSTS = (19456, 47104, 65536, 102400, 262144)
+MAX_TIME_COST = 8
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure Argon2 hashing on this host and pick the costliest time"
+        " and memory parameters whose hash still fits the target latency."
+        " Prints logins per second per core for every measured set."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--target-ms",
+            type=float,
+            default=100,
+            help="Longest acceptable time of one hash.",
+        )
+        parser.add_argument(
+            "--parallelism",
+            type=int,
+            default=settings.ARGON2_PARALLELISM,
+            help="Argon2 lanes, ARGON2_PARALLELISM by default.",
+        )
+        parser.add_argument(
+            "--max-memory",
+            type=int,
+            default=max(MEMORY_COSTS),
+            help="Largest memory cost in KiB to try.",
+        )
+        parser.add_argument(
+            "--rounds",
+            type=int,
+            default=5,
+            help="Hashes measured per parameter set, the median is used.",
+        )
+
+    def handle(self, *args, **options):
+        target = options["target_ms"] / 1000
+        parallelism = options["parallelism"]
+        memory_costs = [m for m in MEMORY_COSTS if m <= options["max_memory"]]
+        if not memory_costs:
+            raise CommandError(f"--max-memory is below {MEMORY_COSTS[0]}")
+
+        self.stdout.write(
+            f"{'time':>5}{'memory KiB':>12}{'hash ms':>9}"
+            f"{'logins/s/core':>15}"
+        )
+        best = None
+        for memory_cost in memory_costs:
+            fits = False
+            for time_cost in range(1, MAX_TIME_COST + 1):
+                wall, cpu = self.measure(
+                    time_cost, memory_cost, parallelism, options["rounds"]
+                )
+                self.stdout.write(
+                    f"{time_cost:>5}{memory_cost:>12}{wall * 1000:>9.1f}"
+                    f"{1 / max(cpu, 1e-6):>15.1f}"
+                )
+                if wall > target:
+                    break
+                fits = True
+                # Larger memory wins over more passes at smaller memory.
+                best = (time_cost, memory_cost)
+            if not fits:
+                break
+
+        if best is None:
+            raise CommandError(
+                "No parameters fit the target, raise --target-ms"
+            )
+        time_cost, memory_cost = best
+        self.stdout.write(
+            self.style.SUCCESS(
+                "Put into the environment, existing hashes are upgraded on"
+                " the next login:\n"
+                f"ARGON2_TIME_COST={time_cost}\n"
+                f"ARGON2_MEMORY_COST={memory_cost}\n"
+                f"ARGON2_PARALLELISM={parallelism}"
+            )
+        )
+
+    def measure(self, time_cost, memory_cost, parallelism, rounds):
+        """Return median wall and CPU seconds of one hash."""
+        walls, cpus = [], []
+        for _ in range(rounds):
+            wall, cpu = time.perf_counter(), time.process_time()
+            hash_secret(
+                b"calibration password",
+                b"calibration salt",
+                time_cost=time_cost,
+                memory_cost=memory_cost,
+                parallelism=parallelism,
+                hash_len=32,
+                type=Type.ID,
+            )
+            walls.append(time.perf_counter() - wall)
+            cpus.append(time.process_time() - cpu)
+        return statistics.median(walls), statistics.median(cpus)
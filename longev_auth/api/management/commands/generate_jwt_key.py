@@ -0,0 +1,76 @@
+import os
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from api.tokens import (
+    ASYMMETRIC_ALGORITHMS,
+    KEY_NAME_FORMAT,
+    generate_private_key,
+    private_key_to_pem,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Add a new JWT signing key to JWT_KEYS_DIR. The key is published in"
+        " JWKS after restart and signs tokens from --activate-after seconds"
+        " on, older keys keep verifying them and may be removed once"
+        " REFRESH_TOKEN_LIFETIME_DAYS have passed."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--algorithm",
+            choices=sorted(ASYMMETRIC_ALGORITHMS),
+            default=settings.JWT_ALGORITHM,
+            help="Key algorithm, JWT_ALGORITHM by default.",
+        )
+        parser.add_argument(
+            "--if-missing",
+            action="store_true",
+            help="Do nothing when the directory already has a key.",
+        )
+        parser.add_argument(
+            "--activate-after",
+            type=int,
+            default=2 * settings.JWKS_MAX_AGE,
+            help=(
+                "Seconds before the key signs, twice JWKS_MAX_AGE by"
+                " default: servers are restarted within JWKS_MAX_AGE and"
+                " cached JWKS documents expire within another. The first"
+                " key of the directory signs at once."
+            ),
+        )
+
+    def handle(self, *args, **options):
+        algorithm = options["algorithm"]
+        if algorithm not in ASYMMETRIC_ALGORITHMS:
+            raise CommandError(f"{algorithm} tokens are not signed by keys")
+        keys_dir = Path(settings.JWT_KEYS_DIR)
+        keys_dir.mkdir(parents=True, exist_ok=True)
+        has_keys = any(keys_dir.glob("*.pem"))
+        if options["if_missing"] and has_keys:
+            return
+        if options["activate_after"] < 0:
+            raise CommandError("--activate-after must be >= 0")
+        # No verifier can know an older key, the first one signs at once.
+        activate_after = options["activate_after"] if has_keys else 0
+        not_before = timezone.now() + timedelta(seconds=activate_after)
+        # Names sort by activation time, the new key becomes the last one.
+        path = keys_dir / f"{not_before.strftime(KEY_NAME_FORMAT)}.pem"
+        if path.exists():
+            raise CommandError(f"{path} already exists")
+        pem = private_key_to_pem(generate_private_key(algorithm))
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        with os.fdopen(fd, "wb") as file:
+            file.write(pem)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Created {algorithm} key {path}, signing from"
+                f" {not_before:%Y-%m-%d %H:%M:%S} UTC"
+            )
+        )
@@ -0,0 +1,164 @@
+import csv
+import json
+import resource
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from pathlib import Path
+
+import django
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+from rest_framework.serializers import as_serializer_error
+
+from api.email_filter import get_email_filter
+from api.serializers import ImportUserSerializer
+
+User = get_user_model()
+
+
+def read_csv(path):
+    with open(path, newline="", encoding="utf-8") as file:
+        yield from csv.DictReader(file)
+
+
+def read_jsonl(path):
+    with open(path, encoding="utf-8") as file:
+        for line in file:
+            if line.strip():
+                yield json.loads(line)
+
+
+READERS = {
+    "csv": read_csv,
+    "jsonl": read_jsonl,
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Import users from a CSV or JSONL file with email, first_name,"
+        " last_name and either password or password_hash columns."
+        " Users with already registered emails are skipped, counted as"
+        " duplicates, or as skipped when registered during the import."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", type=Path)
+        parser.add_argument(
+            "--format",
+            choices=READERS,
+            help="Input format, guessed from file extension by default.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Rows validated, hashed and inserted at once.",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=None,
+            help="Processes hashing raw passwords, CPU count by default.",
+        )
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        file_format = options["format"] or path.suffix.lstrip(".").lower()
+        if file_format not in READERS:
+            raise CommandError(f"Unsupported input format: {file_format}")
+        rows = enumerate(READERS[file_format](path), start=1)
+
+        self.processed = self.invalid = self.duplicates = 0
+        self.created = self.skipped = 0
+        # One serializer validates every row, its fields are built once.
+        self.serializer = ImportUserSerializer()
+        started = time.perf_counter()
+        with ProcessPoolExecutor(
+            max_workers=options["workers"], initializer=django.setup
+        ) as pool:
+            while True:
+                batch = list(islice(rows, options["batch_size"]))
+                if not batch:
+                    break
+                self.import_batch(batch, pool)
+        elapsed = time.perf_counter() - started
+
+        peak_memory = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Hashing processes are waited for once the pool is shut down.
+        worker_memory = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+        rate = self.processed / elapsed if elapsed else 0
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Processed {self.processed} rows in {elapsed:.2f}s"
+                f" ({rate:.0f} rows/s): created {self.created},"
+                f" duplicates {self.duplicates}, skipped {self.skipped},"
+                f" invalid {self.invalid}."
+                f" Peak memory {peak_memory // 1024} MiB, hashing worker"
+                f" {worker_memory // 1024} MiB."
+            )
+        )
+
+    def import_batch(self, batch, pool):
+        self.processed += len(batch)
+        valid = {}
+        for line, row in batch:
+            row = {key: value for key, value in row.items() if value}
+            try:
+                data = self.serializer.run_validation(row)
+            except ValidationError as error:
+                self.invalid += 1
+                self.stderr.write(
+                    f"Line {line}: {as_serializer_error(error)}"
+                )
+                continue
+            if data["email"] in valid:
+                self.duplicates += 1
+                continue
+            valid[data["email"]] = data
+
+        existing = self.registered(valid)
+        self.duplicates += len(existing)
+        new_users = [
+            data for email, data in valid.items() if email not in existing
+        ]
+
+        raw_passwords = [
+            data["password"] for data in new_users if "password" in data
+        ]
+        hashes = iter(pool.map(make_password, raw_passwords, chunksize=16))
+        # Users of a batch share date_joined, which tells the rows the
+        # insert added from ones registered since the check above.
+        joined = timezone.now()
+        users = []
+        for data in new_users:
+            data = dict(data)
+            password = data.pop("password_hash", None)
+            if "password" in data:
+                data.pop("password")
+                password = next(hashes)
+            users.append(User(password=password, date_joined=joined, **data))
+        User.objects.bulk_create(users, ignore_conflicts=True)
+        created = User.objects.filter(
+            email__in=[user.email for user in users], date_joined=joined
+        ).count()
+        self.created += created
+        self.skipped += len(users) - created
+        # bulk_create sends no post_save, so the filter is updated here.
+        email_filter = get_email_filter()
+        if email_filter is not None:
+            for user in users:
+                email_filter.add(user.email)
+
+    @staticmethod
+    def registered(emails) -> set:
+        """Those of emails already registered."""
+        return set(
+            User.objects.filter(email__in=emails).values_list(
+                "email", flat=True
+            )
+        )
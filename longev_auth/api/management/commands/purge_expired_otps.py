@@ -0,0 +1,30 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from api.models import OtpCode
+
+
+class Command(BaseCommand):
+    help = "Delete expired OTP codes in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=settings.OTP_PURGE_BATCH_SIZE,
+            help="Rows deleted per statement.",
+        )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        deleted = OtpCode.objects.purge_expired(options["batch_size"])
+        elapsed = time.perf_counter() - started
+        rate = deleted / elapsed if elapsed else 0
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Deleted {deleted} expired OTP codes in {elapsed:.2f}s"
+                f" ({rate:.0f} rows/s)"
+            )
+        )
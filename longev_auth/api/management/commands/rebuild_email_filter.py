@@ -0,0 +1,38 @@
+import time
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from api.email_filter import make_email_filter
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = "Rebuild the Bloom filter of registered emails in Redis."
+
+    def handle(self, *args, **options):
+        email_filter = make_email_filter()
+        started_at = timezone.now()
+        started = time.perf_counter()
+        count = email_filter.rebuild(
+            User.objects.values_list("email", flat=True).iterator(
+                chunk_size=10000
+            )
+        )
+        # Users signed up during the rebuild went to the replaced filter.
+        for email in User.objects.filter(
+            date_joined__gte=started_at - timedelta(minutes=1)
+        ).values_list("email", flat=True):
+            email_filter.add(email)
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Added {count} emails in {elapsed:.2f}s:"
+                f" {email_filter.size // 8 // 1024} KiB,"
+                f" {email_filter.hash_count} hashes, expected false"
+                f" positive rate {email_filter.expected_error_rate(count):.4%}"
+            )
+        )
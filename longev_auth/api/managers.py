@@ -0,0 +1,95 @@
+from django.db import IntegrityError, connections, models, transaction
+from django.utils import timezone
+
+
+class OtpCodeManager(models.Manager):
+    def purge_expired(self, batch_size: int) -> int:
+        """Delete expired codes in batches, return number of deleted rows.
+
+        Every batch is a separate short statement, so the purge never holds
+        locks on a large part of the table.
+        """
+        now = timezone.now()
+        deleted = 0
+        while True:
+            pks = list(
+                self.filter(exp_time__lt=now).values_list("pk", flat=True)[
+                    :batch_size
+                ]
+            )
+            if not pks:
+                return deleted
+            # A code may have been reissued since it was selected.
+            count, _ = self.filter(pk__in=pks, exp_time__lt=now).delete()
+            deleted += count
+
+    def issue(self, user, otp: str, exp_time, replaceable) -> bool:
+        """Store code of user unless it has one expiring after replaceable.
+
+        Return whether the code was stored. On PostgreSQL and SQLite it is
+        one INSERT ... ON CONFLICT DO UPDATE ... WHERE, elsewhere an UPDATE
+        of a replaceable row or else an INSERT, which fails if the user
+        already has a code. Either way concurrent requests of one user
+        store at most one code.
+        """
+        connection = connections[self.db]
+        if connection.vendor in ("postgresql", "sqlite"):
+            return self._upsert(connection, user, otp, exp_time, replaceable)
+        if self.filter(user=user, exp_time__lte=replaceable).update(
+            otp=otp, exp_time=exp_time
+        ):
+            return True
+        try:
+            with transaction.atomic(using=self.db):
+                self.create(user=user, otp=otp, exp_time=exp_time)
+        except IntegrityError:
+            return False
+        return True
+
+    def consume(self, user, otp: str, now) -> bool:
+        """Delete code otp of user if valid at now, return whether it was.
+
+        One plain DELETE statement, without the transaction
+        QuerySet.delete() opens around it, which in autocommit mode costs
+        a BEGIN and a COMMIT round trip more.
+        """
+        connection = connections[self.db]
+        meta = self.model._meta
+        quote_name = connection.ops.quote_name
+        exp_field = meta.get_field("exp_time")
+        sql = (
+            f"DELETE FROM {quote_name(meta.db_table)}"
+            f" WHERE {quote_name(meta.get_field('user').column)} = %s"
+            f" AND {quote_name(meta.get_field('otp').column)} = %s"
+            f" AND {quote_name(exp_field.column)} >= %s"
+        )
+        params = [user.pk, otp, exp_field.get_db_prep_value(now, connection)]
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return cursor.rowcount > 0
+
+    def _upsert(self, connection, user, otp, exp_time, replaceable) -> bool:
+        meta = self.model._meta
+        quote_name = connection.ops.quote_name
+        table = quote_name(meta.db_table)
+        user_column = quote_name(meta.get_field("user").column)
+        otp_column = quote_name(meta.get_field("otp").column)
+        exp_field = meta.get_field("exp_time")
+        exp_column = quote_name(exp_field.column)
+        sql = (
+            f"INSERT INTO {table} ({user_column}, {otp_column}, {exp_column})"
+            " VALUES (%s, %s, %s)"
+            f" ON CONFLICT ({user_column}) DO UPDATE"
+            f" SET {otp_column} = excluded.{otp_column},"
+            f" {exp_column} = excluded.{exp_column}"
+            f" WHERE {table}.{exp_column} <= %s"
+        )
+        params = [
+            user.pk,
+            otp,
+            exp_field.get_db_prep_value(exp_time, connection),
+            exp_field.get_db_prep_value(replaceable, connection),
+        ]
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return cursor.rowcount > 0
@@ -0,0 +1,103 @@
+import os
+
+from celery.signals import worker_process_shutdown, worker_ready
+from django.conf import settings
+from prometheus_client import (
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    multiprocess,
+    start_http_server,
+)
+
+# Buckets from 0.5 ms to 2.5 s, wide enough for argon2 and smtp alike.
+TIME_BUCKETS = (
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+)
+
+PASSWORD_VERIFY_SECONDS = Histogram(
+    "auth_password_verify_seconds",
+    "Password hash check time.",
+    buckets=TIME_BUCKETS,
+)
+OTP_GENERATE_SECONDS = Histogram(
+    "auth_otp_generate_seconds",
+    "Otp code generation time.",
+    buckets=TIME_BUCKETS,
+)
+OTP_VERIFY_SECONDS = Histogram(
+    "auth_otp_verify_seconds",
+    "Otp code check and consumption time.",
+    buckets=TIME_BUCKETS,
+)
+TOKEN_MINT_SECONDS = Histogram(
+    "auth_token_mint_seconds",
+    "Jwt token pair creation time.",
+    buckets=TIME_BUCKETS,
+)
+VIEW_DB_QUERIES = Histogram(
+    "auth_view_db_queries",
+    "Database queries made by one request.",
+    ["view"],
+    buckets=(0, 1, 2, 3, 4, 6, 8, 12, 16, 32),
+)
+SEND_EMAIL_SECONDS = Histogram(
+    "auth_send_email_seconds",
+    "Email delivery time of the celery task.",
+    buckets=TIME_BUCKETS,
+)
+SEND_EMAIL_FAILURES = Counter(
+    "auth_send_email_failures",
+    "Emails the celery task failed to deliver.",
+)
+THROTTLE_REQUESTS = Counter(
+    "auth_throttle_requests",
+    "Requests checked by throttles, by result allowed or throttled.",
+    ["scope", "result"],
+)
+CACHE_REQUESTS = Counter(
+    "auth_cache_requests",
+    "Lookups of the token user cache and the email filter, by result hit"
+    " (answered without database) or miss.",
+    ["cache", "result"],
+)
+
+
+def multiprocess_enabled() -> bool:
+    return "PROMETHEUS_MULTIPROC_DIR" in os.environ
+
+
+def get_registry():
+    """Registry of this process, or of all workers in multiprocess mode."""
+    if not multiprocess_enabled():
+        return REGISTRY
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return registry
+
+
+@worker_ready.connect
+def start_worker_metrics_server(**kwargs):
+    """Serve metrics of celery worker processes on CELERY_METRICS_PORT."""
+    if settings.CELERY_METRICS_PORT:
+        start_http_server(
+            settings.CELERY_METRICS_PORT, registry=get_registry()
+        )
+
+
+@worker_process_shutdown.connect
+def mark_worker_process_dead(**kwargs):
+    if multiprocess_enabled():
+        multiprocess.mark_process_dead(os.getpid())
@@ -0,0 +1,147 @@
+import cProfile
+import random
+import re
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+from . import metrics
+from .profiling import collect_timings
+
+
+class QueryCounter:
+    """Execute wrapper counting queries run on a connection."""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+_query_counter = ContextVar("query_counter", default=None)
+
+
+def count_query(execute, sql, params, many, context):
+    """Execute wrapper counting queries of the current request, if any."""
+    counter = _query_counter.get()
+    if counter is not None:
+        counter.count += 1
+    return execute(sql, params, many, context)
+
+
+@contextmanager
+def count_queries():
+    """Count queries of the code run inside into a QueryCounter.
+
+    count_query is installed on every connection when it connects. It
+    finds the counter through a context variable, so queries of sync code
+    run by sync_to_async in other threads for an async request are
+    counted too and concurrent requests do not mix their counts.
+    """
+    counter = QueryCounter()
+    token = _query_counter.set(counter)
+    try:
+        yield counter
+    finally:
+        _query_counter.reset(token)
+
+
+class HybridMiddleware:
+    """Middleware serving sync and async handler chains natively.
+
+    Django adapts a sync only middleware under ASGI by running it and the
+    rest of the chain in one thread sensitive sync_to_async, which
+    serializes all async requests.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+
+class QueryCountMiddleware(HybridMiddleware):
+    """Observe number of database queries of every request per view."""
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        with count_queries() as counter:
+            response = self.get_response(request)
+        self.observe(request, counter.count)
+        return response
+
+    async def __acall__(self, request):
+        with count_queries() as counter:
+            response = await self.get_response(request)
+        self.observe(request, counter.count)
+        return response
+
+    @staticmethod
+    def observe(request, queries: int) -> None:
+        match = request.resolver_match
+        # Unresolved paths share one label to keep label count bounded.
+        view = match.view_name if match is not None else "unresolved"
+        metrics.VIEW_DB_QUERIES.labels(view).observe(queries)
+
+
+class ProfilingMiddleware(HybridMiddleware):
+    """Timings of a sample of requests, profiles of the slow ones.
+
+    A PROFILING_SAMPLE_RATE fraction of requests gets a Server-Timing
+    header with time spent in database queries, password hashing, token
+    minting and email enqueueing. Sampled requests slower than
+    PROFILING_SLOW_MS are profiled with cProfile into PROFILING_DIR, the
+    files open with `python -m pstats` or snakeviz. Async requests only
+    get the header: cProfile sees one thread, which under ASGI runs other
+    requests too while the views run in executor threads.
+    """
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        if random.random() >= settings.PROFILING_SAMPLE_RATE:
+            return self.get_response(request)
+        profiler = cProfile.Profile()
+        started = time.perf_counter()
+        with collect_timings() as timings:
+            profiler.enable()
+            try:
+                response = self.get_response(request)
+            finally:
+                profiler.disable()
+        total = time.perf_counter() - started
+        response["Server-Timing"] = timings.server_timing(total)
+        if total * 1000 >= settings.PROFILING_SLOW_MS:
+            self.dump(profiler, request, total)
+        return response
+
+    async def __acall__(self, request):
+        if random.random() >= settings.PROFILING_SAMPLE_RATE:
+            return await self.get_response(request)
+        started = time.perf_counter()
+        with collect_timings() as timings:
+            response = await self.get_response(request)
+        total = time.perf_counter() - started
+        response["Server-Timing"] = timings.server_timing(total)
+        return response
+
+    def dump(self, profiler, request, total: float) -> None:
+        path = re.sub(r"[^\w-]+", "_", request.path).strip("_") or "root"
+        name = (
+            f"{time.strftime('%Y%m%d-%H%M%S')}-{request.method}-{path}"
+            f"-{total * 1000:.0f}ms.prof"
+        )
+        profile_dir = Path(settings.PROFILING_DIR)
+        profile_dir.mkdir(parents=True, exist_ok=True)
+        profiler.dump_stats(profile_dir / name)
@@ -0,0 +1,44 @@
+# Generated by Django 3.2 on 2026-10-18 09:20
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class AddIndexConcurrentlyOnPostgres(AddIndexConcurrently):
+    """Build index without locking writes on PostgreSQL, plainly elsewhere."""
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            return super().database_forwards(
+                app_label, schema_editor, from_state, to_state
+            )
+        return migrations.AddIndex.database_forwards(
+            self, app_label, schema_editor, from_state, to_state
+        )
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            return super().database_backwards(
+                app_label, schema_editor, from_state, to_state
+            )
+        return migrations.AddIndex.database_backwards(
+            self, app_label, schema_editor, from_state, to_state
+        )
+
+
+class Migration(migrations.Migration):
+    # The OTP table takes an insert or update on every code request, a
+    # plain CREATE INDEX would block them while the index is built.
+
+    atomic = False
+
+    dependencies = [
+        ('api', '0001_initial'),
+    ]
+
+    operations = [
+        AddIndexConcurrentlyOnPostgres(
+            model_name='otpcode',
+            index=models.Index(fields=['exp_time'], name='api_otpcode_exp_tim_341c60_idx'),
+        ),
+    ]
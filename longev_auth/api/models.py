@@ -1,6 +1,8 @@
 from django.contrib.auth import get_user_model
 from django.db import models
 
+from .managers import OtpCodeManager
+
 User = get_user_model()
 
 
@@ -22,9 +24,14 @@ class OtpCode(models.Model):
     )
     exp_time = models.DateTimeField(verbose_name="Expiration time")
 
+    objects = OtpCodeManager()
+
     class Meta:
         verbose_name = "OTP code"
         verbose_name_plural = "Otp codes"
+        indexes = [
+            models.Index(fields=["exp_time"]),
+        ]
 
     def __str__(self):
         return f"{self.pk}: {self.otp}"
@@ -0,0 +1,40 @@
+import hmac
+import secrets
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+DIGITS = "0123456789"
+
+
+def generate_otp(length: int = None, alphabet: str = None) -> str:
+    """Return a code of length characters drawn uniformly from alphabet.
+
+    One random number below len(alphabet) ** length is written in base
+    len(alphabet), so every code is equally likely. Defaults come from
+    OTP_LENGTH and OTP_ALPHABET.
+    """
+    length = settings.OTP_LENGTH if length is None else length
+    alphabet = settings.OTP_ALPHABET if alphabet is None else alphabet
+    if length < 1:
+        raise ImproperlyConfigured("Otp length must be at least 1")
+    base = len(alphabet)
+    if base < 2 or len(set(alphabet)) != base:
+        raise ImproperlyConfigured(
+            "Otp alphabet needs at least two distinct characters"
+        )
+    number = secrets.randbelow(base**length)
+    if alphabet == DIGITS:
+        return f"{number:0{length}d}"
+    chars = []
+    for _ in range(length):
+        number, index = divmod(number, base)
+        chars.append(alphabet[index])
+    return "".join(chars)
+
+
+def otp_matches(stored, otp: str) -> bool:
+    """Compare codes in time independent of where they differ."""
+    if isinstance(stored, str):
+        stored = stored.encode()
+    return hmac.compare_digest(stored, otp.encode())
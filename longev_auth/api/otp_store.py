@@ -0,0 +1,122 @@
+from datetime import timedelta
+
+import redis
+from django.conf import settings
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from . import metrics
+from .models import OtpCode
+from .otp import otp_matches
+
+
+def resend_window() -> int:
+    """Seconds a new code is kept, at most the lifetime of the code."""
+    return min(settings.OTP_RESEND_WINDOW, settings.OTP_LIFETIME)
+
+
+class BaseOtpStore:
+    """Storage of the single pending otp code of every user."""
+
+    # Relations of the user consume() reads, login views load them along.
+    user_related = ()
+
+    def issue(self, user, otp: str) -> bool:
+        """Store otp unless a code was issued within the resend window.
+
+        Return whether otp was stored and so should be sent. Concurrent
+        requests of one user store at most one code.
+        """
+        raise NotImplementedError
+
+    def consume(self, user, otp: str) -> bool:
+        """Verify otp and delete it, so it can be used only once."""
+        raise NotImplementedError
+
+
+class DatabaseOtpStore(BaseOtpStore):
+    """Otp codes kept in the OtpCode table."""
+
+    user_related = ("otp",)
+
+    def issue(self, user, otp: str) -> bool:
+        exp_time = timezone.now() + timedelta(seconds=settings.OTP_LIFETIME)
+        # Codes expiring after this were issued within the resend window.
+        replaceable = exp_time - timedelta(seconds=resend_window())
+        return OtpCode.objects.issue(user, otp, exp_time, replaceable)
+
+    @metrics.OTP_VERIFY_SECONDS.time()
+    def consume(self, user, otp: str) -> bool:
+        now = timezone.now()
+        # Read with the user when it was loaded with user_related.
+        try:
+            stored = user.otp
+        except OtpCode.DoesNotExist:
+            return False
+        if stored.exp_time < now or not otp_matches(stored.otp, otp):
+            return False
+        # Conditional DELETE of the matched code, so of concurrent
+        # verifications of it only one removes the row and succeeds.
+        return OtpCode.objects.consume(user, stored.otp, now)
+
+
+class RedisOtpStore(BaseOtpStore):
+    """Otp codes kept in Redis keys expiring after OTP_LIFETIME."""
+
+    # Delete the key only if it still holds the given code, in one step.
+    consume_script = """
+        if redis.call("GET", KEYS[1]) == ARGV[1] then
+            return redis.call("DEL", KEYS[1])
+        end
+        return 0
+    """
+    # Set the code unless the key lives longer than the given ms, that is
+    # it was set within the resend window.
+    issue_script = """
+        if redis.call("PTTL", KEYS[1]) > tonumber(ARGV[3]) then
+            return 0
+        end
+        redis.call("SET", KEYS[1], ARGV[1], "PX", ARGV[2])
+        return 1
+    """
+
+    def __init__(self, url: str = None):
+        self.client = redis.Redis.from_url(
+            url or settings.OTP_REDIS_URL,
+            socket_connect_timeout=0.1,
+            socket_timeout=0.1,
+        )
+        self.key_prefix = settings.OTP_REDIS_KEY_PREFIX
+        self._consume = self.client.register_script(self.consume_script)
+        self._issue = self.client.register_script(self.issue_script)
+
+    def key(self, user) -> str:
+        return f"{self.key_prefix}{user.pk}"
+
+    def issue(self, user, otp: str) -> bool:
+        lifetime = settings.OTP_LIFETIME * 1000
+        replaceable = lifetime - resend_window() * 1000
+        issued = self._issue(
+            keys=[self.key(user)], args=[otp, lifetime, replaceable]
+        )
+        return bool(issued)
+
+    @metrics.OTP_VERIFY_SECONDS.time()
+    def consume(self, user, otp: str) -> bool:
+        stored = self.client.get(self.key(user))
+        if stored is None or not otp_matches(stored, otp):
+            return False
+        # The script deletes the key only if it still holds the matched
+        # code, so of concurrent verifications only one succeeds.
+        return bool(self._consume(keys=[self.key(user)], args=[stored]))
+
+
+_store = None
+
+
+def get_otp_store() -> BaseOtpStore:
+    """Return the otp store configured by OTP_STORE setting."""
+    global _store
+    if _store is None:
+        _store = import_string(settings.OTP_STORE)()
+    return _store
@@ -0,0 +1,107 @@
+from collections.abc import Mapping
+
+from django.contrib.auth import get_user_model
+from django.core.validators import ProhibitNullCharactersValidator
+from rest_framework import serializers
+from rest_framework.exceptions import ErrorDetail, ValidationError
+from rest_framework.settings import api_settings
+
+User = get_user_model()
+
+# Messages of the DRF fields the payloads stand in for, looked up once.
+_CHAR_MESSAGES = serializers.CharField().error_messages
+_INVALID_DATA = serializers.Serializer().error_messages["invalid"]
+_NULL_CHARACTERS = ProhibitNullCharactersValidator()
+_MISSING = object()
+
+
+def _error(code: str) -> list:
+    return [ErrorDetail(_CHAR_MESSAGES[code], code=code)]
+
+
+class Payload:
+    """Flat payload of required strings, validated like a DRF serializer.
+
+    Gives the validated data and errors a serializer of required
+    CharFields would, including `validate_<field>` methods, without
+    building serializer and field instances for every request.
+    """
+
+    fields: tuple = ()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._validators = tuple(
+            (name, getattr(cls, f"validate_{name}", None))
+            for name in cls.fields
+        )
+
+    def __init__(self, data):
+        self.initial_data = data
+
+    def is_valid(self, raise_exception: bool = False) -> bool:
+        self.validated_data, self.errors = self.validate(self.initial_data)
+        if self.errors and raise_exception:
+            raise ValidationError(self.errors)
+        return not self.errors
+
+    def validate(self, data) -> tuple:
+        """Return validated data and errors by field name."""
+        if data is None:
+            return {}, self.non_field_error("No data provided", "null")
+        if not isinstance(data, Mapping):
+            message = _INVALID_DATA.format(datatype=type(data).__name__)
+            return {}, self.non_field_error(message, "invalid")
+        validated, errors = {}, {}
+        for name, validator in self._validators:
+            value = data.get(name, _MISSING)
+            if value is _MISSING:
+                errors[name] = _error("required")
+            elif value is None:
+                errors[name] = _error("null")
+            elif str(value).strip() == "":
+                errors[name] = _error("blank")
+            elif isinstance(value, bool) or not isinstance(
+                value, (str, int, float)
+            ):
+                errors[name] = _error("invalid")
+            elif "\x00" in str(value):
+                errors[name] = [
+                    ErrorDetail(
+                        _NULL_CHARACTERS.message, code=_NULL_CHARACTERS.code
+                    )
+                ]
+            else:
+                value = str(value).strip()
+                if validator is not None:
+                    value = validator(self, value)
+                validated[name] = value
+        if errors:
+            return {}, errors
+        return validated, errors
+
+    @staticmethod
+    def non_field_error(message: str, code: str) -> dict:
+        detail = ErrorDetail(message, code=code)
+        return {api_settings.NON_FIELD_ERRORS_KEY: [detail]}
+
+
+class EmailLookupPayload(Payload):
+    """Fast counterpart of EmailLookupSerializer."""
+
+    fields = ("email",)
+
+    def validate_email(self, value):
+        return User.objects.normalize_email(value)
+
+
+class PasswordAuthPayload(EmailLookupPayload):
+    fields = ("email", "password")
+
+
+class OtpRequestPayload(EmailLookupPayload):
+    pass
+
+
+class OtpAuthPayload(EmailLookupPayload):
+    fields = ("email", "otp")
@@ -0,0 +1,99 @@
+import hashlib
+import json
+import uuid
+
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import transaction
+from django.shortcuts import get_object_or_404
+from django.utils.http import parse_etags
+from rest_framework import status
+from rest_framework.response import Response
+
+from .serializers import UpdateUserSerializer
+
+User = get_user_model()
+
+
+def profile_key(user_id, version) -> str:
+    return f"profile:{user_id}:{version}"
+
+
+def version_key(user_id) -> str:
+    return f"profile-version:{user_id}"
+
+
+def version_timeout(cache):
+    """Seconds a version key lives, twice as long as the entries it names.
+
+    An expired version only costs a miss, the TTL keeps keys of users who
+    stopped reading their profile from filling Redis.
+    """
+    if cache.default_timeout is None:
+        return None
+    return cache.default_timeout * 2
+
+
+def make_etag(data: dict) -> str:
+    payload = json.dumps(data, sort_keys=True, separators=(",", ":"))
+    return f'"{hashlib.sha1(payload.encode()).hexdigest()}"'
+
+
+def get_cached_profile(user) -> tuple:
+    """Return serialized profile of user and its ETag.
+
+    On a miss the user is read from the database rather than taken from
+    the request, whose user may come from a token cache of a process
+    that has not seen the latest update. The entry is keyed by the
+    profile version read before the user, so a read racing an update
+    caches the old profile under a version no longer read.
+    """
+    cache = caches["profile"]
+    version = cache.get_or_set(
+        version_key(user.pk), new_version, version_timeout(cache)
+    )
+    key = profile_key(user.pk, version)
+    cached = cache.get(key)
+    if cached is not None:
+        return cached
+    user = get_object_or_404(User, pk=user.pk, is_active=True)
+    data = dict(UpdateUserSerializer(user).data)
+    cached = (data, make_etag(data))
+    cache.set(key, cached)
+    return cached
+
+
+def new_version() -> str:
+    # Random, so a lost version key never brings back an old entry.
+    return uuid.uuid4().hex
+
+
+def bump_profile_version(user_id) -> None:
+    cache = caches["profile"]
+    cache.set(version_key(user_id), new_version(), version_timeout(cache))
+
+
+def invalidate_profile(user_id) -> None:
+    """Move reads of the profile to a new cache entry.
+
+    Done at once and again on commit, a read in between still sees the
+    old row and may cache it under the first new version.
+    """
+    bump_profile_version(user_id)
+    transaction.on_commit(lambda: bump_profile_version(user_id))
+
+
+def etag_matches(request, etag: str) -> bool:
+    etags = parse_etags(request.headers.get("If-None-Match", ""))
+    return "*" in etags or etag in etags
+
+
+def cached_profile_response(request) -> Response:
+    """Profile of request user, 304 if If-None-Match has its ETag."""
+    data, etag = get_cached_profile(request.user)
+    if etag_matches(request, etag):
+        response = Response(status=status.HTTP_304_NOT_MODIFIED)
+    else:
+        response = Response(data, status=status.HTTP_200_OK)
+    response["ETag"] = etag
+    return response
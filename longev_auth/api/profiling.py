@@ -0,0 +1,65 @@
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+_timings = ContextVar("request_timings", default=None)
+
+
+class RequestTimings:
+    """Time spent by one request in every phase, e.g. db or hash."""
+
+    def __init__(self):
+        self.durations = defaultdict(float)
+        self.counts = defaultdict(int)
+
+    def add(self, phase: str, seconds: float) -> None:
+        self.durations[phase] += seconds
+        self.counts[phase] += 1
+
+    def server_timing(self, total: float) -> str:
+        """Format timings as Server-Timing header value, in ms."""
+        metrics = [
+            f"{phase};dur={seconds * 1000:.1f}"
+            f';desc="{self.counts[phase]} calls"'
+            for phase, seconds in self.durations.items()
+        ]
+        metrics.append(f"total;dur={total * 1000:.1f}")
+        return ", ".join(metrics)
+
+
+@contextmanager
+def collect_timings():
+    """Collect phase timings of the code run inside into RequestTimings."""
+    timings = RequestTimings()
+    token = _timings.set(timings)
+    try:
+        yield timings
+    finally:
+        _timings.reset(token)
+
+
+@contextmanager
+def phase(name: str):
+    """Add time of the block to the phase of the profiled request, if any."""
+    timings = _timings.get()
+    if timings is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.add(name, time.perf_counter() - started)
+
+
+def time_query(execute, sql, params, many, context):
+    """Execute wrapper adding query time to the db phase, if profiled.
+
+    It is installed on every connection when it connects, so queries run
+    in sync_to_async threads of an async request are timed too.
+    """
+    if _timings.get() is None:
+        return execute(sql, params, many, context)
+    with phase("db"):
+        return execute(sql, params, many, context)
@@ -0,0 +1,32 @@
+import orjson
+from rest_framework.renderers import BrowsableAPIRenderer, JSONRenderer
+
+# Types orjson would format differently are left to the DRF encoder.
+ORJSON_OPTIONS = (
+    orjson.OPT_NON_STR_KEYS
+    | orjson.OPT_PASSTHROUGH_DATETIME
+    | orjson.OPT_PASSTHROUGH_DATACLASS
+)
+
+
+class ORJSONRenderer(JSONRenderer):
+    """JSONRenderer producing the same compact output with orjson."""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        indent = self.get_indent(accepted_media_type, renderer_context or {})
+        if data is None or indent is not None or not self.compact:
+            return super().render(
+                data, accepted_media_type, renderer_context
+            )
+        ret = orjson.dumps(
+            data,
+            default=self.encoder_class().default,
+            option=ORJSON_OPTIONS,
+        )
+        # Same escaping as JSONRenderer, keeping output a javascript subset.
+        return ret.replace(b"\xe2\x80\xa8", b"\\u2028").replace(
+            b"\xe2\x80\xa9", b"\\u2029"
+        )
+
+
+FAST_RENDERER_CLASSES = (ORJSONRenderer, BrowsableAPIRenderer)
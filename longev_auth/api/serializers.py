@@ -1,15 +1,25 @@
 from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import identify_hasher
 from django.core.validators import EmailValidator
 from rest_framework import serializers
 from rest_framework.validators import UniqueValidator
+from rest_framework_simplejwt.exceptions import TokenError
 
+from .tokens import RefreshToken
 from core.constants import Limits, Messages
 
 User = get_user_model()
 
 
+class NormalizedEmailField(serializers.EmailField):
+    """Email field returning email normalized the way it is stored."""
+
+    def to_internal_value(self, data):
+        return User.objects.normalize_email(super().to_internal_value(data))
+
+
 class CreateUserSerializer(serializers.ModelSerializer):
-    email = serializers.EmailField(
+    email = NormalizedEmailField(
         max_length=Limits.EMAIL_LENGTH,
         validators=[
             EmailValidator(),
@@ -43,6 +53,43 @@ class CreateUserSerializer(serializers.ModelSerializer):
         return user
 
 
+class ImportUserSerializer(CreateUserSerializer):
+    """Row of a bulk user import.
+
+    Same rules as signup, except email uniqueness is left to the import,
+    and a ready password hash may be given instead of a raw password.
+    """
+
+    email = NormalizedEmailField(
+        max_length=Limits.EMAIL_LENGTH,
+        validators=[EmailValidator()],
+    )
+    password = serializers.CharField(
+        min_length=Limits.MIN_PASSWORD_LENGTH,
+        max_length=Limits.MAX_PASSWORD_LENGTH,
+        required=False,
+        write_only=True,
+    )
+    password_hash = serializers.CharField(required=False, write_only=True)
+
+    class Meta(CreateUserSerializer.Meta):
+        fields = CreateUserSerializer.Meta.fields + ("password_hash",)
+
+    def validate_password_hash(self, value):
+        try:
+            identify_hasher(value)
+        except ValueError:
+            raise serializers.ValidationError(Messages.UNKNOWN_PASSWORD_HASH)
+        return value
+
+    def validate(self, attrs):
+        if ("password" in attrs) == ("password_hash" in attrs):
+            raise serializers.ValidationError(
+                Messages.PASSWORD_OR_HASH_REQUIRED
+            )
+        return attrs
+
+
 class UpdateUserSerializer(serializers.ModelSerializer):
     email = serializers.EmailField(read_only=True)
 
@@ -52,8 +99,16 @@ class UpdateUserSerializer(serializers.ModelSerializer):
         read_only_fields = ("email",)
 
 
-class PasswordAuthSerializer(serializers.Serializer):
+class EmailLookupSerializer(serializers.Serializer):
+    """Base for payloads identifying a user by email."""
+
     email = serializers.CharField(required=True)
+
+    def validate_email(self, value):
+        return User.objects.normalize_email(value)
+
+
+class PasswordAuthSerializer(EmailLookupSerializer):
     password = serializers.CharField(
         required=True, style={"input_type": "password"}
     )
@@ -61,12 +116,22 @@ class PasswordAuthSerializer(serializers.Serializer):
 
 class TokenSerializer(serializers.Serializer):
     token = serializers.CharField()
+    refresh = serializers.CharField()
 
 
-class OtpRequestSerializer(serializers.Serializer):
-    email = serializers.CharField(required=True)
+class RefreshTokenSerializer(serializers.Serializer):
+    refresh = serializers.CharField(required=True)
 
+    def validate_refresh(self, value):
+        try:
+            return RefreshToken(value)
+        except TokenError:
+            raise serializers.ValidationError(Messages.INVALID_REFRESH_TOKEN)
 
-class OtpAuthSerializer(serializers.Serializer):
-    email = serializers.CharField(required=True)
+
+class OtpRequestSerializer(EmailLookupSerializer):
+    pass
+
+
+class OtpAuthSerializer(EmailLookupSerializer):
     otp = serializers.CharField(required=True)
@@ -0,0 +1,77 @@
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.signals import request_finished, request_started
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .authentication import token_user_cache
+from .email_filter import get_email_filter
+from .middleware import count_query
+from .profile_cache import invalidate_profile
+from .profiling import time_query
+
+User = get_user_model()
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_cached_tokens(sender, instance, **kwargs):
+    """Drop cached token snapshots once the user row changes."""
+    token_user_cache.invalidate_user(instance.pk)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_cached_profile(sender, instance, **kwargs):
+    """Drop cached profile payload, its ETag changes with the next read."""
+    invalidate_profile(instance.pk)
+
+
+@receiver(post_save, sender=User)
+def add_to_email_filter(sender, instance, **kwargs):
+    """Let lookups of a new or changed email through the email filter."""
+    email_filter = get_email_filter()
+    if email_filter is not None:
+        email_filter.add(instance.email)
+
+
+@receiver(request_started)
+def close_unusable_connections(sender, **kwargs):
+    """Drop persistent connections the server closed while they were idle.
+
+    Django 3.2 reuses a connection kept by CONN_MAX_AGE without checking
+    it, so a connection cut by a database restart or pgbouncer would fail
+    the first query of the request. The check is a query itself, so only
+    connections idle for DB_CONN_HEALTH_CHECK_IDLE seconds are checked.
+    """
+    if not settings.DB_CONN_HEALTH_CHECKS:
+        return
+    checked_before = time.monotonic() - settings.DB_CONN_HEALTH_CHECK_IDLE
+    for connection in connections.all():
+        if (
+            connection.connection is not None
+            and getattr(connection, "idle_since", 0.0) <= checked_before
+            and not connection.is_usable()
+        ):
+            connection.close()
+
+
+@receiver(request_finished)
+def mark_connections_idle(sender, **kwargs):
+    """Remember when the connections kept for the next request were used."""
+    now = time.monotonic()
+    for connection in connections.all():
+        if connection.connection is not None:
+            connection.idle_since = now
+
+
+@receiver(connection_created)
+def install_query_wrappers(sender, connection, **kwargs):
+    """Let the middleware count and time queries of the new connection."""
+    for wrapper in (count_query, time_query):
+        if wrapper not in connection.execute_wrappers:
+            connection.execute_wrappers.append(wrapper)
@@ -1,10 +1,24 @@
 import smtplib
+from functools import lru_cache
 
 from celery import shared_task
+from django.conf import settings
 from django.core.mail import EmailMessage
+from django.template.loader import get_template
 from rest_framework import status
 from rest_framework.response import Response
 
+from . import metrics
+from .last_login import get_last_login_buffer
+from .mail import mail_connection
+from .models import OtpCode
+
+
+@lru_cache(maxsize=None)
+def get_compiled_template(template_name: str):
+    """Load and compile template once per worker process."""
+    return get_template(template_name)
+
 
 @shared_task
 def send_email(
@@ -14,8 +28,15 @@ def send_email(
     to: list[str],
     reply_to: list[str],
     content_subtype: str = "html",
+    template_name: str = None,
+    context: dict = None,
 ):
-    """Function to send email"""
+    """Function to send email.
+
+    If template_name is given, body is rendered from it with context.
+    """
+    if template_name is not None:
+        body = get_compiled_template(template_name).render(context)
     mail = EmailMessage(
         subject=subject,
         body=body,
@@ -25,7 +46,21 @@ def send_email(
     )
     mail.content_subtype = content_subtype
     try:
-        mail.send(fail_silently=False)
+        with metrics.SEND_EMAIL_SECONDS.time():
+            with metrics.SEND_EMAIL_FAILURES.count_exceptions():
+                mail_connection.send_messages([mail])
     except smtplib.SMTPSenderRefused as e:
         return Response({"data": str(e)}, status=status.HTTP_400_BAD_REQUEST)
     return True
+
+
+@shared_task
+def purge_expired_otps() -> int:
+    """Periodic removal of expired otp codes."""
+    return OtpCode.objects.purge_expired(settings.OTP_PURGE_BATCH_SIZE)
+
+
+@shared_task
+def flush_last_logins() -> int:
+    """Periodic write of buffered last login times."""
+    return get_last_login_buffer().flush(settings.LAST_LOGIN_BATCH_SIZE)
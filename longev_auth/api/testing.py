@@ -0,0 +1,80 @@
+import uuid
+from contextlib import ExitStack, contextmanager
+
+import redis
+from django.conf import settings
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+from . import email_filter, last_login, otp_store, throttling, token_store
+
+
+def reset_redis_clients() -> None:
+    """Drop clients built from settings, the next use reads them again."""
+    email_filter._filter = None
+    last_login._buffer = None
+    otp_store._store = None
+    throttling._backend = None
+    token_store._store = None
+
+
+@contextmanager
+def isolated_redis_data(prefix: str):
+    """Keep the Redis data of users under prefix.
+
+    Last logins, otp codes, throttle buckets, revoked tokens, cached
+    profiles and the email filter are kept in keys under prefix. Users of
+    a throwaway database share primary keys with real users, so their
+    data must not reach the keys the live services read. The keys are
+    deleted on exit.
+    """
+    with override_settings(
+        LAST_LOGIN_REDIS_KEY=f"{prefix}:last_login",
+        OTP_REDIS_KEY_PREFIX=f"{prefix}:otp:",
+        THROTTLE_REDIS_KEY_PREFIX=f"{prefix}:throttle:",
+        TOKEN_REDIS_KEY_PREFIX=f"{prefix}:revoked:",
+        EMAIL_FILTER_KEY=f"{prefix}:email_filter",
+        CACHES={
+            **settings.CACHES,
+            "profile": {**settings.CACHES["profile"], "KEY_PREFIX": prefix},
+        },
+    ):
+        reset_redis_clients()
+        try:
+            yield
+        finally:
+            delete_redis_keys(f"{prefix}:*")
+            reset_redis_clients()
+
+
+def delete_redis_keys(pattern: str) -> None:
+    urls = {
+        settings.LAST_LOGIN_REDIS_URL,
+        settings.OTP_REDIS_URL,
+        settings.THROTTLE_REDIS_URL,
+        settings.TOKEN_REDIS_URL,
+        settings.PROFILE_CACHE_URL,
+        settings.EMAIL_FILTER_REDIS_URL,
+    }
+    for url in urls:
+        client = redis.Redis.from_url(url, socket_connect_timeout=0.1)
+        try:
+            for key in client.scan_iter(pattern):
+                client.delete(key)
+        except redis.RedisError:
+            pass
+
+
+class TestRunner(DiscoverRunner):
+    """Test runner keeping Redis data of tests apart from live data."""
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self._redis_data = ExitStack()
+        self._redis_data.enter_context(
+            isolated_redis_data(f"test-{uuid.uuid4().hex}")
+        )
+
+    def teardown_test_environment(self, **kwargs):
+        self._redis_data.close()
+        super().teardown_test_environment(**kwargs)
@@ -0,0 +1,49 @@
+from django.test import override_settings
+from django.urls import include, path
+
+from api.async_views import (
+    AsyncOtpAuthView,
+    AsyncOtpRequestView,
+    AsyncPasswordAuthView,
+    AsyncProfileView,
+)
+from api.tests import test_auth, test_profile
+
+async_urlpatterns = [
+    path("user/profile/", AsyncProfileView.as_view(), name="user-profile"),
+    path(
+        "auth/token-pwd/",
+        AsyncPasswordAuthView.as_view(),
+        name="auth-token-pwd",
+    ),
+    path("auth/otp/", AsyncOtpRequestView.as_view(), name="auth-otp"),
+    path(
+        "auth/token-otp/", AsyncOtpAuthView.as_view(), name="auth-token-otp"
+    ),
+]
+
+urlpatterns = [
+    path("", include((async_urlpatterns, "api"))),
+]
+
+async_urlconf = override_settings(ROOT_URLCONF=__name__)
+
+
+@async_urlconf
+class TestAsyncPasswordAuthView(test_auth.TestPasswordAuthView):
+    """Password login API case served by the async view."""
+
+
+@async_urlconf
+class TestAsyncOtpRequestView(test_auth.TestOtpRequestView):
+    """Otp request API case served by the async view."""
+
+
+@async_urlconf
+class TestAsyncOtpAuthView(test_auth.TestOtpAuthView):
+    """Otp login API case served by the async view."""
+
+
+@async_urlconf
+class AsyncProfileViewTest(test_profile.ProfileViewTest):
+    """User profile API tests served by the async view."""
@@ -1,15 +1,20 @@
+import threading
 from datetime import timedelta
 from unittest.mock import patch
 
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.contrib.auth.hashers import make_password
+from django.test import SimpleTestCase, override_settings
 from django.utils import timezone
 from rest_framework import status
 from rest_framework.reverse import reverse
 from rest_framework.test import APITestCase
 
+from api.checks import check_password_hash_pool
+from api.hashing import HashingExecutor
 from api.models import OtpCode
+from api.throttling import get_throttle_backend
 from core.constants import Messages
 
 User = get_user_model()
@@ -39,6 +44,9 @@ class TestPasswordAuthView(APITestCase):
             password=make_password(cls.inactive_user_raw_password),
         )
 
+    def setUp(self):
+        get_throttle_backend().clear()
+
     def test_auth_with_correct_password(self):
         data = {
             "email": self.user1.email,
@@ -48,6 +56,15 @@ class TestPasswordAuthView(APITestCase):
         self.assertEquals(response.status_code, status.HTTP_200_OK)
         self.assertIn("token", response.data)
 
+    def test_auth_with_email_in_other_case(self):
+        data = {
+            "email": self.user1.email.upper(),
+            "password": self.user1_raw_password,
+        }
+        response = self.client.post(self.url, data)
+        self.assertEquals(response.status_code, status.HTTP_200_OK)
+        self.assertIn("token", response.data)
+
     def test_auth_with_incorrect_password(self):
         data = {
             "email": self.user1.email,
@@ -78,6 +95,50 @@ class TestPasswordAuthView(APITestCase):
             response.data["message"], Messages.PROFILE_IS_INACTIVE
         )
 
+    def test_auth_when_hashing_pool_is_saturated(self):
+        executor = HashingExecutor(max_workers=1, queue_size=0)
+        release = threading.Event()
+        executor.submit(release.wait)
+        data = {
+            "email": self.user1.email,
+            "password": self.user1_raw_password,
+        }
+        try:
+            with patch(
+                "api.hashing.get_hashing_executor", return_value=executor
+            ):
+                response = self.client.post(self.url, data)
+        finally:
+            release.set()
+            executor.shutdown()
+        self.assertEquals(
+            response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE
+        )
+        self.assertEquals(response.data["message"], Messages.SERVICE_BUSY)
+        self.assertEquals(
+            response["Retry-After"], str(settings.PASSWORD_HASH_RETRY_AFTER)
+        )
+
+
+@override_settings(ASYNC_API=False, GUNICORN_THREADS=4)
+class TestPasswordHashPoolCheck(SimpleTestCase):
+    """Hashing pool size against gunicorn request threads."""
+
+    @override_settings(PASSWORD_HASH_WORKERS=2, PASSWORD_HASH_QUEUE_SIZE=1)
+    def test_pool_leaving_a_free_thread_passes(self):
+        self.assertEquals(check_password_hash_pool(None), [])
+
+    @override_settings(PASSWORD_HASH_WORKERS=2, PASSWORD_HASH_QUEUE_SIZE=2)
+    def test_pool_taking_every_thread_fails(self):
+        errors = check_password_hash_pool(None)
+        self.assertEquals([error.id for error in errors], ["api.E001"])
+
+    @override_settings(
+        ASYNC_API=True, PASSWORD_HASH_WORKERS=2, PASSWORD_HASH_QUEUE_SIZE=8
+    )
+    def test_pool_is_not_checked_under_asgi(self):
+        self.assertEquals(check_password_hash_pool(None), [])
+
 
 class TestOtpRequestView(APITestCase):
     """Login with email and otp API case."""
@@ -95,7 +156,10 @@ class TestOtpRequestView(APITestCase):
             password=make_password(cls.user1_raw_password),
         )
 
-    @patch("api.tasks.send_email.delay")
+    def setUp(self):
+        get_throttle_backend().clear()
+
+    @patch("api.tasks.send_email.apply_async")
     def test_auth_get_otp_via_email(self, mock_task):
         data = {"email": self.user1.email}
         now = timezone.now()
@@ -113,6 +177,35 @@ class TestOtpRequestView(APITestCase):
             delta.total_seconds(), settings.OTP_LIFETIME, delta=10
         )
 
+    @patch("api.tasks.send_email.apply_async")
+    def test_otp_email_is_rendered_by_task(self, mock_task):
+        data = {"email": self.user1.email}
+        self.client.post(self.url, data)
+        kwargs = mock_task.call_args.kwargs["kwargs"]
+        self.assertEquals(kwargs["body"], "")
+        self.assertEquals(kwargs["template_name"], "otp_auth_template.html")
+        self.assertEquals(kwargs["context"]["otp"], self.user1.otp.otp)
+        self.assertEquals(kwargs["context"]["email"], self.user1.email)
+
+    @patch("api.tasks.send_email.apply_async")
+    def test_repeated_request_sends_one_email(self, mock_task):
+        data = {"email": self.user1.email}
+        for _ in range(3):
+            response = self.client.post(self.url, data)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+        mock_task.assert_called_once()
+        sent_otp = mock_task.call_args.kwargs["kwargs"]["context"]["otp"]
+        self.user1.refresh_from_db()
+        self.assertEqual(self.user1.otp.otp, sent_otp)
+
+    @patch("api.tasks.send_email.apply_async")
+    def test_otp_email_expires_with_code(self, mock_task):
+        self.client.post(self.url, {"email": self.user1.email})
+        options = mock_task.call_args.kwargs
+        self.assertEqual(options["queue"], settings.CELERY_OTP_QUEUE)
+        self.assertEqual(options["expires"], settings.OTP_LIFETIME)
+        self.assertEqual(options["priority"], settings.CELERY_OTP_PRIORITY)
+
     def test_auth_get_otp_for_unknown_email(self):
         data = {"email": "unknown@example.com"}
         response = self.client.post(self.url, data)
@@ -165,12 +258,39 @@ class TestOtpAuthView(APITestCase):
             user=cls.inactive_user, otp="345678", exp_time=exp_time
         )
 
+    def setUp(self):
+        get_throttle_backend().clear()
+
     def test_auth_with_correct_otp(self):
         data = {"email": self.user1.email, "otp": self.user1.otp.otp}
         response = self.client.post(self.url, data)
         self.assertEquals(response.status_code, status.HTTP_200_OK)
         self.assertIn("token", response.data)
 
+    @patch("api.utils.get_last_login_buffer")
+    def test_auth_with_correct_otp_queries(self, mock_get_buffer):
+        """User lookup with its otp and conditional delete, no user update."""
+        data = {"email": self.user1.email, "otp": self.user1.otp.otp}
+        with self.assertNumQueries(2):
+            response = self.client.post(self.url, data)
+        self.assertEquals(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(OtpCode.objects.filter(user=self.user1).exists())
+        mock_get_buffer.return_value.record.assert_called_once()
+
+    def test_otp_can_be_used_once(self):
+        data = {"email": self.user1.email, "otp": self.user1.otp.otp}
+        response = self.client.post(self.url, data)
+        self.assertEquals(response.status_code, status.HTTP_200_OK)
+        response = self.client.post(self.url, data)
+        self.assertEquals(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEquals(response.data["message"], Messages.INCORRECT_OTP)
+
+    def test_auth_with_incorrect_otp_keeps_code(self):
+        data = {"email": self.user1.email, "otp": "000000"}
+        with self.assertNumQueries(1):
+            self.client.post(self.url, data)
+        self.assertTrue(OtpCode.objects.filter(user=self.user1).exists())
+
     def test_auth_with_incorrect_otp(self):
         data = {
             "email": self.user1.email,
@@ -0,0 +1,107 @@
+from django.contrib.auth.hashers import make_password
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient, APITestCase
+
+from api.authentication import token_user_cache
+from api.hashing import rehash_password
+from api.tests.test_profile_cache import LOCMEM_CACHES
+from api.utils import get_user_token
+from users.models import User
+
+
+class CachedJWTAuthenticationTest(APITestCase):
+    """Access token cache on the profile endpoint."""
+
+    url_profile = reverse("api:user-profile")
+
+    def setUp(self):
+        token_user_cache.clear()
+        self.user1 = User.objects.create(
+            email="user1@example.com",
+            first_name="firstname",
+            last_name="lastname",
+            is_active=True,
+        )
+        token = get_user_token(self.user1)["token"]
+        self.user1client = APIClient()
+        self.user1client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+
+    def tearDown(self):
+        token_user_cache.clear()
+
+    @override_settings(CACHES=LOCMEM_CACHES)
+    def test_repeated_request_makes_no_queries(self):
+        response = self.user1client.get(self.url_profile)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        with self.assertNumQueries(0):
+            response = self.user1client.get(self.url_profile)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["email"], self.user1.email)
+        stats = token_user_cache.stats()
+        self.assertEqual(stats["hits"], 1)
+        self.assertEqual(stats["misses"], 1)
+
+    def test_profile_update_invalidates_cache(self):
+        self.user1client.get(self.url_profile)
+        response = self.user1client.patch(
+            self.url_profile, {"first_name": "newname"}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response = self.user1client.get(self.url_profile)
+        self.assertEqual(response.data["first_name"], "newname")
+
+    def test_deleted_profile_token_is_rejected(self):
+        self.user1client.get(self.url_profile)
+        response = self.user1client.delete(self.url_profile)
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        response = self.user1client.get(self.url_profile)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_put_does_not_reactivate_deactivated_user(self):
+        self.user1client.get(self.url_profile)
+        # Deactivated elsewhere, no post_save evicts the cached snapshot.
+        User.objects.filter(pk=self.user1.pk).update(is_active=False)
+        response = self.user1client.put(
+            self.url_profile, {"first_name": "new", "last_name": "new"}
+        )
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.user1.refresh_from_db()
+        self.assertFalse(self.user1.is_active)
+        self.assertEqual(self.user1.first_name, "firstname")
+
+    def test_put_keeps_rehashed_password(self):
+        legacy = make_password("user1password", hasher="pbkdf2_sha256")
+        User.objects.filter(pk=self.user1.pk).update(password=legacy)
+        self.user1client.get(self.url_profile)
+        self.assertTrue(
+            rehash_password(self.user1.pk, "user1password", legacy)
+        )
+        self.assertEqual(token_user_cache.stats()["size"], 0)
+        response = self.user1client.put(
+            self.url_profile, {"first_name": "new", "last_name": "new"}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.user1.refresh_from_db()
+        self.assertTrue(self.user1.password.startswith("argon2"))
+        self.assertEqual(self.user1.first_name, "new")
+
+    def test_put_with_cached_token_keeps_other_columns(self):
+        self.user1client.get(self.url_profile)
+        legacy = make_password("user1password", hasher="pbkdf2_sha256")
+        # Columns changed by an update do not evict the cached snapshot.
+        User.objects.filter(pk=self.user1.pk).update(password=legacy)
+        response = self.user1client.put(
+            self.url_profile, {"first_name": "new", "last_name": "new"}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.user1.refresh_from_db()
+        self.assertEqual(self.user1.password, legacy)
+
+    def test_invalid_token_is_rejected(self):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION="Bearer invalid")
+        response = client.get(self.url_profile)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(token_user_cache.stats()["size"], 0)
@@ -0,0 +1,54 @@
+from unittest.mock import MagicMock, patch
+
+from django.core.signals import request_finished, request_started
+from django.test import SimpleTestCase, override_settings
+
+
+class ConnectionHealthCheckTest(SimpleTestCase):
+    """Check of persistent database connections at request start."""
+
+    def setUp(self):
+        self.connection = MagicMock()
+        patcher = patch("api.signals.connections")
+        mock_connections = patcher.start()
+        self.addCleanup(patcher.stop)
+        mock_connections.all.return_value = [self.connection]
+        # Idle since long before the check.
+        self.connection.idle_since = 0.0
+
+    @override_settings(DB_CONN_HEALTH_CHECKS=True)
+    def test_broken_connection_is_closed(self):
+        self.connection.is_usable.return_value = False
+        request_started.send(sender=self.__class__)
+        self.connection.close.assert_called_once()
+
+    @override_settings(DB_CONN_HEALTH_CHECKS=True)
+    def test_usable_connection_is_kept(self):
+        self.connection.is_usable.return_value = True
+        request_started.send(sender=self.__class__)
+        self.connection.close.assert_not_called()
+
+    @override_settings(DB_CONN_HEALTH_CHECKS=True)
+    def test_closed_connection_is_not_checked(self):
+        self.connection.connection = None
+        request_started.send(sender=self.__class__)
+        self.connection.is_usable.assert_not_called()
+
+    @override_settings(DB_CONN_HEALTH_CHECKS=True)
+    def test_connection_in_use_is_not_checked(self):
+        request_finished.send(sender=self.__class__)
+        request_started.send(sender=self.__class__)
+        self.connection.is_usable.assert_not_called()
+
+    @override_settings(DB_CONN_HEALTH_CHECKS=True, DB_CONN_HEALTH_CHECK_IDLE=0)
+    def test_connection_idle_long_enough_is_checked(self):
+        self.connection.is_usable.return_value = False
+        request_finished.send(sender=self.__class__)
+        request_started.send(sender=self.__class__)
+        self.connection.close.assert_called_once()
+
+    @override_settings(DB_CONN_HEALTH_CHECKS=False)
+    def test_check_can_be_disabled(self):
+        self.connection.is_usable.return_value = False
+        request_started.send(sender=self.__class__)
+        self.connection.is_usable.assert_not_called()
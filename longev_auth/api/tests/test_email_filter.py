@@ -0,0 +1,74 @@
+from unittest import skipUnless
+from unittest.mock import patch
+
+import redis
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from rest_framework import status
+from rest_framework.reverse import reverse
+from rest_framework.test import APITestCase
+
+from api.email_filter import EmailBloomFilter
+from api.throttling import get_throttle_backend
+
+User = get_user_model()
+
+
+def redis_available() -> bool:
+    try:
+        return redis.Redis.from_url(settings.EMAIL_FILTER_REDIS_URL).ping()
+    except redis.RedisError:
+        return False
+
+
+@skipUnless(redis_available(), "Redis server is not available")
+class EmailBloomFilterTest(APITestCase):
+    """Unknown email logins answered by the email filter."""
+
+    url_signup = reverse("api:user-signup")
+    url_token_pwd = reverse("api:auth-token-pwd")
+
+    def setUp(self):
+        get_throttle_backend().clear()
+        client = redis.Redis.from_url(settings.EMAIL_FILTER_REDIS_URL)
+        self.filter = EmailBloomFilter(
+            client, key="test_email_filter", capacity=1000, error_rate=0.01
+        )
+        client.delete(self.filter.key)
+        self.addCleanup(client.delete, self.filter.key)
+        patcher = patch("api.email_filter._filter", self.filter)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_filter_is_open_until_built(self):
+        self.filter.add("user1@example.com")
+        self.assertFalse(self.filter.client.exists(self.filter.key))
+        self.assertTrue(self.filter.might_contain("unknown@example.com"))
+
+    def test_false_positive_rate(self):
+        emails = [f"user{i}@example.com" for i in range(1000)]
+        self.assertEqual(self.filter.rebuild(emails), 1000)
+        self.assertTrue(all(map(self.filter.might_contain, emails)))
+        false_positives = sum(
+            self.filter.might_contain(f"other{i}@example.com")
+            for i in range(1000)
+        )
+        self.assertLess(false_positives, 30)
+        self.assertAlmostEqual(
+            self.filter.expected_error_rate(1000), 0.01, delta=0.002
+        )
+
+    def test_unknown_email_login_makes_no_queries(self):
+        self.filter.rebuild([])
+        data = {"email": "unknown@example.com", "password": "password"}
+        with self.assertNumQueries(0):
+            response = self.client.post(self.url_token_pwd, data)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_signed_up_user_can_login(self):
+        self.filter.rebuild([])
+        data = {"email": "user1@example.com", "password": "user1password"}
+        response = self.client.post(self.url_signup, data)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        response = self.client.post(self.url_token_pwd, data)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
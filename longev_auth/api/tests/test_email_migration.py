@@ -0,0 +1,54 @@
+from datetime import timedelta
+from importlib import import_module
+from unittest.mock import patch
+
+from django.apps import apps
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.utils import timezone
+
+User = get_user_model()
+migration = import_module("users.migrations.0003_lowercase_user_emails")
+
+
+class LowercaseEmailsMigrationTest(TestCase):
+    """Data migration storing existing emails lowercased."""
+
+    def migrate(self):
+        migration.lowercase_emails(apps, connection.schema_editor())
+
+    def create(self, email, **fields):
+        # Stored as given, like emails saved before normalization.
+        user = User.objects.create(email=f"new-{email}", **fields)
+        User.objects.filter(pk=user.pk).update(email=email)
+        return user
+
+    @patch.object(migration, "BATCH_SIZE", 2)
+    def test_emails_are_lowercased_in_batches(self):
+        users = [self.create(f"User{i}@Example.com") for i in range(5)]
+        self.migrate()
+        self.assertEqual(
+            [User.objects.get(pk=user.pk).email for user in users],
+            [f"user{i}@example.com" for i in range(5)],
+        )
+
+    def test_case_duplicates_keep_newest_active_account(self):
+        now = timezone.now()
+        inactive = self.create("a@x.com", date_joined=now, is_active=False)
+        newest = self.create("A@x.com", date_joined=now, is_active=True)
+        older = self.create(
+            "A@X.com", date_joined=now - timedelta(days=1), is_active=True
+        )
+        with self.assertLogs(migration.logger, "WARNING") as logs:
+            self.migrate()
+        self.assertEqual(len(logs.output), 2)
+        self.assertEqual(User.objects.get(pk=newest.pk).email, "a@x.com")
+        self.assertEqual(
+            User.objects.get(pk=older.pk).email,
+            f"a+duplicate-{older.pk}@x.com",
+        )
+        self.assertEqual(
+            User.objects.get(pk=inactive.pk).email,
+            f"a+duplicate-{inactive.pk}@x.com",
+        )
@@ -0,0 +1,89 @@
+import json
+import tempfile
+from io import StringIO
+from pathlib import Path
+from unittest.mock import patch
+
+from django.contrib.auth.hashers import check_password, make_password
+from django.core.management import call_command
+from django.test import TestCase
+
+from api.management.commands.import_users import Command
+from users.models import User
+
+
+class ImportUsersCommandTest(TestCase):
+    """Bulk user import from CSV and JSONL files."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user1 = User.objects.create(
+            email="user1@example.com",
+            password=make_password("user1password"),
+        )
+
+    def setUp(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.tmp_dir = Path(tmp_dir.name)
+
+    def import_file(self, name, content, **options):
+        path = self.tmp_dir / name
+        path.write_text(content)
+        out, err = StringIO(), StringIO()
+        call_command(
+            "import_users", path, workers=1, stdout=out, stderr=err, **options
+        )
+        return out.getvalue(), err.getvalue()
+
+    def test_import_csv(self):
+        content = (
+            "email,first_name,last_name,password,password_hash\n"
+            "User2@Example.com,First,Last,user2password,\n"
+            f'user3@example.com,,,,"{make_password("user3password")}"\n'
+            "USER1@example.com,First,Last,user1password,\n"
+            "user2@example.com,First,Last,user2password,\n"
+            "bademail,First,Last,user4password,\n"
+            "user5@example.com,First,Last,short,\n"
+        )
+        out, err = self.import_file("users.csv", content, batch_size=2)
+        self.assertIn("created 2, duplicates 2, skipped 0, invalid 2", out)
+        self.assertIn("Line 5", err)
+        self.assertIn("Line 6", err)
+        user2 = User.objects.get(email="user2@example.com")
+        self.assertEqual(user2.first_name, "First")
+        self.assertTrue(check_password("user2password", user2.password))
+        user3 = User.objects.get(email="user3@example.com")
+        self.assertTrue(check_password("user3password", user3.password))
+        self.assertEqual(User.objects.count(), 3)
+
+    def test_import_jsonl(self):
+        rows = [
+            {"email": "user2@example.com", "password": "user2password"},
+            {"email": "user3@example.com", "password_hash": "unknown$hash"},
+            {
+                "email": "user4@example.com",
+                "password": "user4password",
+                "password_hash": make_password("user4password"),
+            },
+        ]
+        content = "\n".join(json.dumps(row) for row in rows)
+        out, err = self.import_file("users.jsonl", content)
+        self.assertIn("created 1, duplicates 0, skipped 0, invalid 2", out)
+        self.assertTrue(
+            User.objects.filter(email="user2@example.com").exists()
+        )
+
+    def test_users_registered_during_import_are_skipped(self):
+        content = (
+            "email,first_name,last_name,password,password_hash\n"
+            "user1@example.com,First,Last,user1password,\n"
+            "user2@example.com,First,Last,user2password,\n"
+        )
+        # user1 registers after the check, so the insert skips the row.
+        with patch.object(Command, "registered", return_value=set()):
+            out, _ = self.import_file("users.csv", content)
+        self.assertIn("created 1, duplicates 0, skipped 1, invalid 0", out)
+        self.user1.refresh_from_db()
+        self.assertIsNone(self.user1.first_name)
+        self.assertEqual(User.objects.count(), 2)
@@ -0,0 +1,136 @@
+from datetime import timedelta
+from unittest import skipUnless
+from unittest.mock import patch
+
+import redis
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.utils import timezone
+
+from api.last_login import LastLoginBuffer, get_last_login_buffer
+
+User = get_user_model()
+
+
+def redis_available() -> bool:
+    try:
+        return redis.Redis.from_url(settings.LAST_LOGIN_REDIS_URL).ping()
+    except redis.RedisError:
+        return False
+
+
+class UpdateLastLoginsTest(TestCase):
+    """Batched last_login writes of the user manager."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user1 = User.objects.create(email="user1@example.com")
+        cls.user2 = User.objects.create(email="user2@example.com")
+
+    def test_last_logins_are_written(self):
+        now = timezone.now()
+        updated = User.objects.update_last_logins(
+            {self.user1.pk: now, self.user2.pk: now}, batch_size=1
+        )
+        self.assertEqual(updated, 2)
+        self.assertEqual(
+            set(User.objects.values_list("last_login", flat=True)), {now}
+        )
+
+    def test_last_login_is_not_moved_back(self):
+        now = timezone.now()
+        User.objects.filter(pk=self.user1.pk).update(last_login=now)
+        updated = User.objects.update_last_logins(
+            {self.user1.pk: now - timedelta(minutes=1)}, batch_size=10
+        )
+        self.assertEqual(updated, 0)
+        self.user1.refresh_from_db()
+        self.assertEqual(self.user1.last_login, now)
+
+    def test_redis_failure_writes_login_at_once(self):
+        buffer = LastLoginBuffer("redis://localhost:1/0")
+        self.user1.last_login = timezone.now()
+        buffer.record(self.user1)
+        self.assertEqual(
+            User.objects.get(pk=self.user1.pk).last_login,
+            self.user1.last_login,
+        )
+
+    def test_down_redis_is_not_tried_again(self):
+        buffer = LastLoginBuffer("redis://localhost:1/0")
+        self.user1.last_login = timezone.now()
+        buffer.record(self.user1)
+        self.user2.last_login = timezone.now()
+        with patch.object(buffer.client, "hset") as hset:
+            with self.assertNumQueries(1):
+                buffer.record(self.user2)
+        hset.assert_not_called()
+        self.assertEqual(
+            User.objects.get(pk=self.user2.pk).last_login,
+            self.user2.last_login,
+        )
+
+    def test_redis_failure_write_skips_save_signals(self):
+        buffer = LastLoginBuffer("redis://localhost:1/0")
+        self.user1.last_login = timezone.now()
+        with patch("api.signals.invalidate_profile") as invalidate:
+            buffer.record(self.user1)
+        invalidate.assert_not_called()
+
+    def test_redis_failure_does_not_move_login_back(self):
+        buffer = LastLoginBuffer("redis://localhost:1/0")
+        now = timezone.now()
+        User.objects.filter(pk=self.user1.pk).update(last_login=now)
+        self.user1.last_login = now - timedelta(minutes=1)
+        buffer.record(self.user1)
+        self.assertEqual(User.objects.get(pk=self.user1.pk).last_login, now)
+
+    def test_tests_use_own_key(self):
+        key = get_last_login_buffer().key
+        self.assertNotEqual(key, "last_login")
+        self.assertTrue(key.startswith("test-"))
+
+
+@skipUnless(redis_available(), "Redis server is not available")
+class LastLoginBufferTest(TestCase):
+    """Coalesced last_login writes through Redis."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user1 = User.objects.create(email="user1@example.com")
+        cls.user2 = User.objects.create(email="user2@example.com")
+
+    def setUp(self):
+        self.buffer = LastLoginBuffer(
+            settings.LAST_LOGIN_REDIS_URL, key="test:last_login"
+        )
+        self.buffer.client.delete(self.buffer.key, self.buffer.flush_key)
+        self.addCleanup(
+            self.buffer.client.delete, self.buffer.key, self.buffer.flush_key
+        )
+
+    def test_logins_are_coalesced(self):
+        now = timezone.now()
+        with self.assertNumQueries(0):
+            for seconds in range(5):
+                self.user1.last_login = now + timedelta(seconds=seconds)
+                self.buffer.record(self.user1)
+            self.user2.last_login = now
+            self.buffer.record(self.user2)
+        self.assertEqual(self.buffer.flush(batch_size=100), 2)
+        self.user1.refresh_from_db()
+        self.user2.refresh_from_db()
+        self.assertEqual(self.user1.last_login, now + timedelta(seconds=4))
+        self.assertEqual(self.user2.last_login, now)
+        self.assertEqual(self.buffer.flush(batch_size=100), 0)
+
+    def test_failed_flush_is_retried(self):
+        now = timezone.now()
+        self.user1.last_login = self.user2.last_login = now
+        self.buffer.record(self.user1)
+        self.buffer.client.rename(self.buffer.key, self.buffer.flush_key)
+        self.buffer.record(self.user2)
+        self.assertEqual(self.buffer.flush(batch_size=100), 1)
+        self.assertEqual(self.buffer.flush(batch_size=100), 1)
+        self.assertEqual(User.objects.filter(last_login=now).count(), 2)
@@ -0,0 +1,78 @@
+import smtplib
+from unittest.mock import MagicMock, patch
+
+from django.core import mail
+from django.test import SimpleTestCase, override_settings
+
+from api.mail import PersistentMailConnection
+from api.tasks import send_email
+
+
+@override_settings(
+    EMAIL_BACKEND="django.core.mail.backends.locmem.EmailBackend"
+)
+class PersistentMailConnectionTest(SimpleTestCase):
+    """SMTP connection reuse of celery mail tasks."""
+
+    def setUp(self):
+        self.connection = PersistentMailConnection(max_age=60)
+        patcher = patch("api.tasks.mail_connection", self.connection)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self.connection.close)
+
+    def send(self, to):
+        return send_email(
+            subject="subject",
+            body="body",
+            from_email=None,
+            to=[to],
+            reply_to=["noreply"],
+        )
+
+    def test_connection_is_reused(self):
+        with patch(
+            "api.mail.get_connection", wraps=mail.get_connection
+        ) as mock_get_connection:
+            self.assertTrue(self.send("user1@example.com"))
+            self.assertTrue(self.send("user2@example.com"))
+        mock_get_connection.assert_called_once()
+        self.assertEqual(len(mail.outbox), 2)
+
+    def test_reconnect_after_server_disconnect(self):
+        broken = MagicMock()
+        broken.send_messages.side_effect = smtplib.SMTPServerDisconnected
+        with patch(
+            "api.mail.get_connection",
+            side_effect=[broken, mail.get_connection()],
+        ):
+            self.assertTrue(self.send("user1@example.com"))
+        broken.close.assert_called_once()
+        self.assertEqual(len(mail.outbox), 1)
+
+    def test_connection_is_recycled_after_max_age(self):
+        self.connection.max_age = 0
+        with patch(
+            "api.mail.get_connection", wraps=mail.get_connection
+        ) as mock_get_connection:
+            self.send("user1@example.com")
+            self.send("user2@example.com")
+        self.assertEqual(mock_get_connection.call_count, 2)
+
+    def test_body_is_rendered_from_template(self):
+        send_email(
+            subject="subject",
+            body="",
+            from_email=None,
+            to=["user1@example.com"],
+            reply_to=["noreply"],
+            template_name="otp_auth_template.html",
+            context={
+                "fullname": "firstname lastname",
+                "email": "user1@example.com",
+                "otp": "123456",
+            },
+        )
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertIn("otp code: 123456", mail.outbox[0].body)
+        self.assertIn("Dear firstname lastname", mail.outbox[0].body)
@@ -0,0 +1,76 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from prometheus_client import REGISTRY
+from rest_framework import status
+from rest_framework.reverse import reverse
+from rest_framework.test import APITestCase
+
+from api.throttling import get_throttle_backend
+
+User = get_user_model()
+
+
+class MetricsTest(APITestCase):
+    """Auth metrics exported at /metrics."""
+
+    url_metrics = reverse("api:metrics")
+    url_login = reverse("api:auth-token-pwd")
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user1 = User.objects.create(
+            email="user1@example.com",
+            password=make_password("user1password"),
+            is_active=True,
+        )
+
+    def setUp(self):
+        get_throttle_backend().clear()
+
+    def sample(self, name, **labels):
+        return REGISTRY.get_sample_value(name, labels) or 0
+
+    def test_login_is_measured(self):
+        verify_count = self.sample("auth_password_verify_seconds_count")
+        mint_count = self.sample("auth_token_mint_seconds_count")
+        view_count = self.sample(
+            "auth_view_db_queries_count", view="api:auth-token-pwd"
+        )
+        allowed = self.sample(
+            "auth_throttle_requests_total",
+            scope="password.email",
+            result="allowed",
+        )
+        response = self.client.post(
+            self.url_login,
+            {"email": self.user1.email, "password": "user1password"},
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            self.sample("auth_password_verify_seconds_count"),
+            verify_count + 1,
+        )
+        self.assertEqual(
+            self.sample("auth_token_mint_seconds_count"), mint_count + 1
+        )
+        self.assertEqual(
+            self.sample(
+                "auth_view_db_queries_count", view="api:auth-token-pwd"
+            ),
+            view_count + 1,
+        )
+        self.assertEqual(
+            self.sample(
+                "auth_throttle_requests_total",
+                scope="password.email",
+                result="allowed",
+            ),
+            allowed + 1,
+        )
+
+    def test_metrics_endpoint(self):
+        response = self.client.get(self.url_metrics)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response["Content-Type"].startswith("text/plain"))
+        self.assertIn(b"auth_password_verify_seconds", response.content)
+        self.assertIn(b"auth_cache_requests_total", response.content)
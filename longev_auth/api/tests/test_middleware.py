@@ -0,0 +1,82 @@
+import asyncio
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.http import HttpResponse
+from django.test import TestCase, override_settings
+from django.urls import path
+from prometheus_client import REGISTRY
+
+User = get_user_model()
+
+
+async def sleeping_view(request):
+    await asyncio.sleep(0.2)
+    return HttpResponse()
+
+
+async def querying_view(request):
+    await sync_to_async(User.objects.count)()
+    await sync_to_async(User.objects.exists)()
+    return HttpResponse()
+
+
+urlpatterns = [
+    path("sleep/", sleeping_view, name="sleep"),
+    path("query/", querying_view, name="query"),
+]
+
+
+@override_settings(ROOT_URLCONF=__name__)
+class QueryCountMiddlewareAsyncTest(TestCase):
+    """Query counting under the async handler."""
+
+    async def test_async_requests_are_not_serialized(self):
+        started = time.perf_counter()
+        responses = await asyncio.gather(
+            *(self.async_client.get("/sleep/") for _ in range(5))
+        )
+        elapsed = time.perf_counter() - started
+        self.assertEqual(
+            {response.status_code for response in responses}, {200}
+        )
+        # One after another they would take 1 s.
+        self.assertLess(elapsed, 0.6)
+
+    async def test_async_view_queries_are_counted(self):
+        def observed():
+            return REGISTRY.get_sample_value(
+                "auth_view_db_queries_sum", {"view": "query"}
+            ) or 0
+
+        before = observed()
+        response = await self.async_client.get("/query/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(observed(), before + 2)
+
+
+@override_settings(
+    ROOT_URLCONF=__name__,
+    MIDDLEWARE=["api.middleware.ProfilingMiddleware", *settings.MIDDLEWARE],
+    PROFILING_SAMPLE_RATE=1,
+    PROFILING_SLOW_MS=0,
+)
+class ProfilingMiddlewareAsyncTest(TestCase):
+    """Sampled async requests under the async handler."""
+
+    async def test_async_requests_are_not_serialized(self):
+        started = time.perf_counter()
+        await asyncio.gather(
+            *(self.async_client.get("/sleep/") for _ in range(5))
+        )
+        self.assertLess(time.perf_counter() - started, 0.6)
+
+    async def test_async_view_queries_are_timed(self):
+        response = await self.async_client.get("/query/")
+        phases = {
+            metric.split(";")[0]
+            for metric in response["Server-Timing"].split(", ")
+        }
+        self.assertEqual(phases, {"db", "total"})
@@ -0,0 +1,60 @@
+from collections import Counter
+from unittest.mock import patch
+
+from django.core.exceptions import ImproperlyConfigured
+from django.test import SimpleTestCase, override_settings
+
+from api.otp import generate_otp, otp_matches
+
+# 99.9% quantile of chi-squared with 3 degrees of freedom.
+CHI2_LIMIT_3 = 16.27
+
+
+class GenerateOtpTest(SimpleTestCase):
+    """Otp codes of uniform random characters."""
+
+    @override_settings(OTP_LENGTH=6, OTP_ALPHABET="0123456789")
+    def test_default_digits(self):
+        otp = generate_otp()
+        self.assertEqual(len(otp), 6)
+        self.assertTrue(otp.isdigit())
+
+    def test_leading_zeros_kept(self):
+        with patch("api.otp.secrets.randbelow", return_value=42):
+            self.assertEqual(generate_otp(6, "0123456789"), "000042")
+
+    def test_length_and_alphabet(self):
+        otp = generate_otp(12, "ABC")
+        self.assertEqual(len(otp), 12)
+        self.assertLessEqual(set(otp), set("ABC"))
+
+    def test_custom_alphabet_maps_number(self):
+        # 5 is "12" in base 3, written from the lowest position.
+        with patch("api.otp.secrets.randbelow", return_value=5):
+            self.assertEqual(generate_otp(3, "abc"), "cba")
+
+    def test_invalid_settings(self):
+        for length, alphabet in ((0, "01"), (6, "0"), (6, "001")):
+            with self.subTest(length=length, alphabet=alphabet):
+                with self.assertRaises(ImproperlyConfigured):
+                    generate_otp(length, alphabet)
+
+    def test_positions_uniform(self):
+        alphabet, count = "ABCD", 4000
+        codes = [generate_otp(4, alphabet) for _ in range(count)]
+        expected = count / len(alphabet)
+        for position in range(4):
+            counts = Counter(code[position] for code in codes)
+            chi2 = sum(
+                (counts[char] - expected) ** 2 / expected for char in alphabet
+            )
+            self.assertLess(chi2, CHI2_LIMIT_3)
+
+
+class OtpMatchesTest(SimpleTestCase):
+    def test_matches(self):
+        self.assertTrue(otp_matches("123456", "123456"))
+        self.assertTrue(otp_matches(b"123456", "123456"))
+        self.assertFalse(otp_matches("123456", "123457"))
+        self.assertFalse(otp_matches("123456", "12345"))
+        self.assertFalse(otp_matches("123456", "١٢٣٤٥٦"))
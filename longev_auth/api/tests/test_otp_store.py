@@ -0,0 +1,237 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import skipUnless
+from unittest.mock import patch
+
+import redis
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.reverse import reverse
+from rest_framework.test import APITestCase
+
+from api.models import OtpCode
+from api.otp import otp_matches
+from api.otp_store import DatabaseOtpStore, RedisOtpStore
+from api.tasks import purge_expired_otps
+from api.throttling import get_throttle_backend
+
+User = get_user_model()
+
+
+def redis_available() -> bool:
+    try:
+        return redis.Redis.from_url(settings.OTP_REDIS_URL).ping()
+    except redis.RedisError:
+        return False
+
+
+class DatabaseOtpStoreTest(TestCase):
+    """Otp codes stored in OtpCode table."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user1 = User.objects.create(email="user1@example.com")
+
+    def setUp(self):
+        self.store = DatabaseOtpStore()
+
+    def stored(self):
+        return OtpCode.objects.get(user=self.user1).otp
+
+    def test_consume_is_single_use(self):
+        self.store.issue(self.user1, "111111")
+        self.assertFalse(self.store.consume(self.user1, "000000"))
+        self.assertTrue(self.store.consume(self.user1, "111111"))
+        self.assertFalse(self.store.consume(self.user1, "111111"))
+
+    def test_consume_compares_in_constant_time(self):
+        self.store.issue(self.user1, "111111")
+        with patch(
+            "api.otp_store.otp_matches", wraps=otp_matches
+        ) as matches:
+            self.assertTrue(self.store.consume(self.user1, "111111"))
+        matches.assert_called_once_with("111111", "111111")
+
+    def test_code_replaced_during_consume_is_kept(self):
+        self.store.issue(self.user1, "111111")
+
+        def replace_code(stored, otp):
+            OtpCode.objects.filter(user=self.user1).update(otp="222222")
+            return True
+
+        with patch("api.otp_store.otp_matches", side_effect=replace_code):
+            self.assertFalse(self.store.consume(self.user1, "111111"))
+        self.assertEqual(self.stored(), "222222")
+
+    def test_expired_code_is_rejected(self):
+        OtpCode.objects.create(
+            user=self.user1,
+            otp="111111",
+            exp_time=timezone.now() - timedelta(seconds=1),
+        )
+        self.assertFalse(self.store.consume(self.user1, "111111"))
+
+    def test_issue_within_resend_window_keeps_code(self):
+        self.assertTrue(self.store.issue(self.user1, "111111"))
+        self.assertFalse(self.store.issue(self.user1, "222222"))
+        self.assertEqual(self.stored(), "111111")
+
+    def test_issue_after_resend_window_replaces_code(self):
+        issued = timezone.now() - timedelta(
+            seconds=settings.OTP_RESEND_WINDOW + 1
+        )
+        OtpCode.objects.create(
+            user=self.user1,
+            otp="111111",
+            exp_time=issued + timedelta(seconds=settings.OTP_LIFETIME),
+        )
+        self.assertTrue(self.store.issue(self.user1, "222222"))
+        self.assertEqual(self.stored(), "222222")
+
+    def test_issue_replaces_expired_code(self):
+        OtpCode.objects.create(
+            user=self.user1,
+            otp="111111",
+            exp_time=timezone.now() - timedelta(seconds=1),
+        )
+        self.assertTrue(self.store.issue(self.user1, "222222"))
+        self.assertEqual(self.stored(), "222222")
+
+    @override_settings(OTP_RESEND_WINDOW=0)
+    def test_issue_without_resend_window_replaces_code(self):
+        self.assertTrue(self.store.issue(self.user1, "111111"))
+        self.assertTrue(self.store.issue(self.user1, "222222"))
+        self.assertEqual(self.stored(), "222222")
+
+
+class DatabaseOtpStoreAutocommitTest(TransactionTestCase):
+    """Otp codes consumed outside of a transaction."""
+
+    def test_consume_of_loaded_code_is_one_delete(self):
+        user = User.objects.create(email="user1@example.com")
+        store = DatabaseOtpStore()
+        store.issue(user, "111111")
+        user = User.objects.select_related(*store.user_related).get(
+            pk=user.pk
+        )
+        with self.assertNumQueries(1):
+            self.assertTrue(store.consume(user, "111111"))
+        self.assertFalse(OtpCode.objects.filter(user=user).exists())
+
+    def test_consume_reads_code_not_loaded(self):
+        user = User.objects.create(email="user1@example.com")
+        store = DatabaseOtpStore()
+        store.issue(user, "111111")
+        user = User.objects.get(pk=user.pk)
+        with self.assertNumQueries(2):
+            self.assertTrue(store.consume(user, "111111"))
+
+
+class PurgeExpiredOtpsTest(TestCase):
+    """Batched removal of expired otp codes."""
+
+    @classmethod
+    def setUpTestData(cls):
+        now = timezone.now()
+        for i in range(5):
+            user = User.objects.create(email=f"expired{i}@example.com")
+            OtpCode.objects.create(
+                user=user, otp="111111", exp_time=now - timedelta(seconds=1)
+            )
+        cls.user1 = User.objects.create(email="user1@example.com")
+        OtpCode.objects.create(
+            user=cls.user1, otp="222222", exp_time=now + timedelta(minutes=10)
+        )
+
+    def test_purge_command_deletes_expired_codes_in_batches(self):
+        out = StringIO()
+        call_command("purge_expired_otps", batch_size=2, stdout=out)
+        self.assertIn("Deleted 5 expired OTP codes", out.getvalue())
+        self.assertEqual(
+            list(OtpCode.objects.values_list("pk", flat=True)),
+            [self.user1.pk],
+        )
+
+    def test_purge_task(self):
+        self.assertEqual(purge_expired_otps(), 5)
+        self.assertEqual(purge_expired_otps(), 0)
+
+
+@skipUnless(redis_available(), "Redis server is not available")
+class RedisOtpStoreTest(APITestCase):
+    """Otp codes stored in Redis keys with expiration."""
+
+    url_otp = reverse("api:auth-otp")
+    url_token_otp = reverse("api:auth-token-otp")
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user1 = User.objects.create(
+            email="user1@example.com", is_active=True
+        )
+
+    def setUp(self):
+        get_throttle_backend().clear()
+        self.store = RedisOtpStore()
+        self.store.client.delete(self.store.key(self.user1))
+        patcher = patch("api.otp_store._store", self.store)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self.store.client.delete(self.store.key(self.user1))
+
+    def stored(self):
+        return self.store.client.get(self.store.key(self.user1))
+
+    def test_issue_within_resend_window_keeps_code(self):
+        self.assertTrue(self.store.issue(self.user1, "111111"))
+        self.assertFalse(self.store.issue(self.user1, "222222"))
+        self.assertEqual(self.stored(), b"111111")
+        ttl = self.store.client.ttl(self.store.key(self.user1))
+        self.assertAlmostEqual(ttl, settings.OTP_LIFETIME, delta=10)
+
+    def test_issue_after_resend_window_replaces_code(self):
+        self.store.issue(self.user1, "111111")
+        # Age the code past the resend window.
+        self.store.client.expire(
+            self.store.key(self.user1),
+            settings.OTP_LIFETIME - settings.OTP_RESEND_WINDOW - 1,
+        )
+        self.assertTrue(self.store.issue(self.user1, "222222"))
+        self.assertEqual(self.stored(), b"222222")
+
+    def test_consume_is_single_use(self):
+        self.store.issue(self.user1, "111111")
+        self.assertFalse(self.store.consume(self.user1, "000000"))
+        self.assertEqual(self.stored(), b"111111")
+        self.assertTrue(self.store.consume(self.user1, "111111"))
+        self.assertFalse(self.store.consume(self.user1, "111111"))
+
+    def test_code_replaced_during_consume_is_kept(self):
+        self.store.issue(self.user1, "111111")
+
+        def replace_code(stored, otp):
+            self.store.client.set(self.store.key(self.user1), "222222")
+            return True
+
+        with patch("api.otp_store.otp_matches", side_effect=replace_code):
+            self.assertFalse(self.store.consume(self.user1, "111111"))
+        self.assertEqual(self.stored(), b"222222")
+
+    @patch("api.views.generate_otp_code", return_value="123456")
+    @patch("api.tasks.send_email.apply_async")
+    def test_otp_login_flow(self, mock_task, mock_generate):
+        response = self.client.post(self.url_otp, {"email": self.user1.email})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(OtpCode.objects.filter(user=self.user1).exists())
+        data = {"email": self.user1.email, "otp": "123456"}
+        response = self.client.post(self.url_token_otp, data)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn("token", response.data)
+        response = self.client.post(self.url_token_otp, data)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,136 @@
+import io
+from datetime import datetime, timezone
+from decimal import Decimal
+
+from django.http import QueryDict
+from django.test import SimpleTestCase
+from rest_framework import status
+from rest_framework.exceptions import ParseError, ValidationError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.reverse import reverse
+from rest_framework.test import APITestCase
+
+from api.parsers import ORJSONParser
+from api.payloads import OtpAuthPayload, PasswordAuthPayload
+from api.renderers import ORJSONRenderer
+from api.serializers import OtpAuthSerializer, PasswordAuthSerializer
+
+
+class PayloadTest(SimpleTestCase):
+    """Fast payloads give the results of the serializers they replace."""
+
+    cases = (
+        {"email": " User@Example.COM ", "password": "password123"},
+        {"email": "user@example.com", "password": 12345678},
+        {},
+        {"email": "", "password": "   "},
+        {"email": None, "password": True},
+        {"email": ["user@example.com"], "password": {"a": 1}},
+        {"email": "user\x00@example.com", "password": "password"},
+        [],
+        "email",
+        None,
+    )
+
+    def assert_same(self, serializer, payload):
+        self.assertEqual(serializer.is_valid(), payload.is_valid())
+        self.assertEqual(
+            dict(serializer.validated_data), payload.validated_data
+        )
+        self.assertEqual(
+            JSONRenderer().render(serializer.errors),
+            JSONRenderer().render(payload.errors),
+        )
+        self.assertEqual(
+            ValidationError(serializer.errors).get_codes(),
+            ValidationError(payload.errors).get_codes(),
+        )
+
+    def test_same_as_serializer(self):
+        for data in self.cases:
+            with self.subTest(data=data):
+                self.assert_same(
+                    PasswordAuthSerializer(data=data),
+                    PasswordAuthPayload(data=data),
+                )
+
+    def test_form_data(self):
+        data = QueryDict("email=user@example.com&otp=1&otp=123456")
+        self.assert_same(OtpAuthSerializer(data=data), OtpAuthPayload(data))
+
+    def test_raise_exception(self):
+        with self.assertRaises(ValidationError) as cm:
+            PasswordAuthPayload(data={}).is_valid(raise_exception=True)
+        self.assertEqual(
+            cm.exception.get_codes(),
+            {"email": ["required"], "password": ["required"]},
+        )
+
+
+class ORJSONTest(SimpleTestCase):
+    """orjson renderer and parser behave like the DRF json ones."""
+
+    def test_render_same_bytes(self):
+        data = {
+            "message": "Пароль sent",
+            "when": datetime(2024, 1, 2, 3, 4, 5, 678901, timezone.utc),
+            "amount": Decimal("1.50"),
+            1: [None, True, 1.5],
+        }
+        self.assertEqual(
+            ORJSONRenderer().render(data), JSONRenderer().render(data)
+        )
+        self.assertEqual(ORJSONRenderer().render(None), b"")
+
+    def test_indent_rendered_by_drf(self):
+        data = {"token": "a"}
+        self.assertEqual(
+            ORJSONRenderer().render(data, "application/json; indent=4"),
+            JSONRenderer().render(data, "application/json; indent=4"),
+        )
+
+    def test_parse(self):
+        body = '{"email": "пользователь@example.com"}'.encode()
+        self.assertEqual(
+            ORJSONParser().parse(io.BytesIO(body)),
+            JSONParser().parse(io.BytesIO(body)),
+        )
+        with self.assertRaises(ParseError):
+            ORJSONParser().parse(io.BytesIO(b'{"email": NaN}'))
+
+
+class FastAuthViewTest(APITestCase):
+    """Auth endpoints keep their error format with the fast payloads."""
+
+    def test_missing_fields(self):
+        response = self.client.post(
+            reverse("api:auth-token-pwd"), {}, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            response.json(),
+            {
+                "email": ["This field is required."],
+                "password": ["This field is required."],
+            },
+        )
+
+    def test_not_an_object(self):
+        response = self.client.post(
+            reverse("api:auth-otp"), [], format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            response.json(),
+            {"errors": ["Invalid data. Expected a dictionary, but got list."]},
+        )
+
+    def test_malformed_json(self):
+        response = self.client.post(
+            reverse("api:auth-token-otp"),
+            b"{",
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("JSON parse error", response.json()["detail"])
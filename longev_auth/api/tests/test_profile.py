@@ -46,6 +46,7 @@ class ProfileViewTest(APITestCase):
         data = {"first_name": new_first_name}
         response = self.user1client.patch(self.url_profile, data)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.user1.refresh_from_db()
         self.assertEqual(response.data["email"], self.user1.email)
         self.assertEqual(response.data["first_name"], self.user1.first_name)
         self.assertEqual(response.data["first_name"], new_first_name)
@@ -56,6 +57,7 @@ class ProfileViewTest(APITestCase):
         data = {"last_name": new_last_name}
         response = self.user1client.patch(self.url_profile, data)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.user1.refresh_from_db()
         self.assertEqual(response.data["email"], self.user1.email)
         self.assertEqual(response.data["first_name"], self.user1.first_name)
         self.assertEqual(response.data["last_name"], new_last_name)
@@ -67,6 +69,7 @@ class ProfileViewTest(APITestCase):
         data = {"first_name": new_first_name, "last_name": new_last_name}
         response = self.user1client.put(self.url_profile, data)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.user1.refresh_from_db()
         self.assertEqual(response.data["email"], self.user1.email)
         self.assertEqual(response.data["first_name"], new_first_name)
         self.assertEqual(response.data["first_name"], self.user1.first_name)
@@ -82,6 +85,7 @@ class ProfileViewTest(APITestCase):
         }
         response = self.user1client.put(self.url_profile, data)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.user1.refresh_from_db()
         self.assertEqual(response.data["email"], self.user1.email)
         self.assertEqual(response.data["first_name"], new_first_name)
         self.assertEqual(response.data["first_name"], self.user1.first_name)
@@ -91,6 +95,7 @@ class ProfileViewTest(APITestCase):
     def test_delete_profile_for_authorized_user(self):
         response = self.user1client.delete(self.url_profile)
         self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.user1.refresh_from_db()
         self.assertEqual(self.user1.is_active, False)
         self.assertEqual(response.data["message"], "Profile has been deleted")
 
@@ -0,0 +1,112 @@
+import time
+from unittest.mock import patch
+
+from django.core.cache import caches
+from django.http import Http404
+from django.shortcuts import get_object_or_404
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient, APITestCase
+
+from api.authentication import token_user_cache
+from api.profile_cache import get_cached_profile, version_key
+from api.utils import get_user_token
+from users.models import User
+
+# Profile cache in process memory, tests do not need a Redis server.
+LOCMEM_CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    "profile": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "profile-test",
+    },
+}
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class ProfileCacheTest(APITestCase):
+    """Cached profile reads with ETag revalidation."""
+
+    url_profile = reverse("api:user-profile")
+
+    def setUp(self):
+        token_user_cache.clear()
+        self.user1 = User.objects.create(
+            email="user1@example.com",
+            first_name="firstname",
+            last_name="lastname",
+            is_active=True,
+        )
+        token = get_user_token(self.user1)["token"]
+        self.user1client = APIClient()
+        self.user1client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+
+    def test_repeated_read_is_cached(self):
+        response = self.user1client.get(self.url_profile)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        with self.assertNumQueries(0):
+            cached = self.user1client.get(self.url_profile)
+        self.assertEqual(cached.data, response.data)
+        self.assertEqual(cached["ETag"], response["ETag"])
+
+    def test_version_key_expires_after_entries(self):
+        cache = caches["profile"]
+        started = time.time()
+        with patch("time.time", return_value=started):
+            get_cached_profile(self.user1)
+        key = version_key(self.user1.pk)
+        ttl = cache.default_timeout
+        with patch("time.time", return_value=started + ttl + 1):
+            self.assertIsNotNone(cache.get(key))
+        with patch("time.time", return_value=started + 2 * ttl + 1):
+            self.assertIsNone(cache.get(key))
+
+    def test_matching_etag_gets_not_modified(self):
+        etag = self.user1client.get(self.url_profile)["ETag"]
+        response = self.user1client.get(
+            self.url_profile, HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response.content, b"")
+        self.assertEqual(response["ETag"], etag)
+
+    def test_update_changes_etag(self):
+        etag = self.user1client.get(self.url_profile)["ETag"]
+        self.user1client.patch(self.url_profile, {"first_name": "newname"})
+        response = self.user1client.get(
+            self.url_profile, HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["first_name"], "newname")
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_deleted_profile_is_not_served_from_cache(self):
+        self.user1client.get(self.url_profile)
+        self.user1client.delete(self.url_profile)
+        response = self.user1client.get(self.url_profile)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_read_racing_update_does_not_cache_old_profile(self):
+        def update_after_read(*args, **kwargs):
+            user = get_object_or_404(*args, **kwargs)
+            # Update committed while the old row is being serialized.
+            User.objects.filter(pk=user.pk).update(first_name="newname")
+            User.objects.get(pk=user.pk).save()
+            return user
+
+        with patch(
+            "api.profile_cache.get_object_or_404",
+            side_effect=update_after_read,
+        ):
+            data, _ = get_cached_profile(self.user1)
+        self.assertEqual(data["first_name"], "firstname")
+        data, _ = get_cached_profile(self.user1)
+        self.assertEqual(data["first_name"], "newname")
+
+    def test_inactive_profile_is_not_cached(self):
+        User.objects.filter(pk=self.user1.pk).update(is_active=False)
+        with self.assertRaises(Http404):
+            get_cached_profile(self.user1)
@@ -0,0 +1,76 @@
+import pstats
+import tempfile
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.test import override_settings
+from rest_framework import status
+from rest_framework.reverse import reverse
+from rest_framework.test import APITestCase
+
+from api.throttling import get_throttle_backend
+
+User = get_user_model()
+
+
+@override_settings(
+    MIDDLEWARE=["api.middleware.ProfilingMiddleware", *settings.MIDDLEWARE]
+)
+class ProfilingMiddlewareTest(APITestCase):
+    """Server-Timing header and slow request profiles."""
+
+    url_login = reverse("api:auth-token-pwd")
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user1 = User.objects.create(
+            email="user1@example.com",
+            password=make_password("user1password"),
+            is_active=True,
+        )
+
+    def setUp(self):
+        get_throttle_backend().clear()
+        profile_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(profile_dir.cleanup)
+        self.profile_dir = Path(profile_dir.name)
+
+    def login(self):
+        return self.client.post(
+            self.url_login,
+            {"email": self.user1.email, "password": "user1password"},
+        )
+
+    def test_sampled_request_has_server_timing(self):
+        with self.settings(
+            PROFILING_SAMPLE_RATE=1,
+            PROFILING_SLOW_MS=60000,
+            PROFILING_DIR=self.profile_dir,
+        ):
+            response = self.login()
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        phases = {
+            metric.split(";")[0]
+            for metric in response["Server-Timing"].split(", ")
+        }
+        self.assertEqual(phases, {"db", "hash", "token", "total"})
+        self.assertEqual(list(self.profile_dir.iterdir()), [])
+
+    def test_slow_request_profile_is_saved(self):
+        with self.settings(
+            PROFILING_SAMPLE_RATE=1,
+            PROFILING_SLOW_MS=0,
+            PROFILING_DIR=self.profile_dir,
+        ):
+            self.login()
+        (profile,) = self.profile_dir.iterdir()
+        self.assertIn("POST-auth_token-pwd", profile.name)
+        self.assertGreater(pstats.Stats(str(profile)).total_calls, 0)
+
+    def test_request_out_of_sample_is_not_timed(self):
+        with self.settings(PROFILING_SAMPLE_RATE=0):
+            response = self.login()
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(response.has_header("Server-Timing"))
@@ -0,0 +1,115 @@
+from io import StringIO
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import check_password, make_password
+from django.core.management import CommandError, call_command
+from django.test import SimpleTestCase, TransactionTestCase, override_settings
+from rest_framework import status
+from rest_framework.reverse import reverse
+from rest_framework.test import APITestCase
+
+from api.hashing import needs_rehash, schedule_rehash
+from api.throttling import get_throttle_backend
+
+User = get_user_model()
+
+
+class NeedsRehashTest(SimpleTestCase):
+    """Detection of hashes not made by the preferred hasher."""
+
+    def test_current_hash_is_kept(self):
+        self.assertFalse(needs_rehash(make_password("password")))
+
+    def test_legacy_hash_is_upgraded(self):
+        encoded = make_password("password", hasher="pbkdf2_sha256")
+        self.assertTrue(needs_rehash(encoded))
+
+    def test_hash_with_old_cost_is_upgraded(self):
+        encoded = make_password("password")
+        with override_settings(ARGON2_TIME_COST=3):
+            self.assertTrue(needs_rehash(encoded))
+
+    def test_unusable_password_is_kept(self):
+        self.assertFalse(needs_rehash(make_password(None)))
+
+
+class RehashTest(TransactionTestCase):
+    """Background upgrade of a verified password hash."""
+
+    def setUp(self):
+        self.user1 = User.objects.create(
+            email="user1@example.com",
+            password=make_password("user1password", hasher="pbkdf2_sha256"),
+            is_active=True,
+        )
+
+    def test_password_is_rehashed(self):
+        future = schedule_rehash(self.user1, "user1password")
+        self.assertTrue(future.result())
+        self.user1.refresh_from_db()
+        self.assertTrue(self.user1.password.startswith("argon2"))
+        self.assertTrue(check_password("user1password", self.user1.password))
+
+    def test_changed_password_is_not_overwritten(self):
+        legacy_password = self.user1.password
+        self.user1.set_password("newpassword")
+        self.user1.save()
+        self.user1.password = legacy_password
+        future = schedule_rehash(self.user1, "user1password")
+        self.assertFalse(future.result())
+        self.user1.refresh_from_db()
+        self.assertTrue(check_password("newpassword", self.user1.password))
+
+
+class RehashOnLoginTest(APITestCase):
+    url = reverse("api:auth-token-pwd")
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user1 = User.objects.create(
+            email="user1@example.com",
+            password=make_password("user1password", hasher="pbkdf2_sha256"),
+            is_active=True,
+        )
+
+    def setUp(self):
+        get_throttle_backend().clear()
+
+    @patch("api.views.schedule_rehash")
+    def test_successful_login_schedules_rehash(self, mock_schedule_rehash):
+        data = {"email": self.user1.email, "password": "user1password"}
+        response = self.client.post(self.url, data)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        mock_schedule_rehash.assert_called_once()
+
+    @patch("api.views.schedule_rehash")
+    def test_failed_login_does_not_rehash(self, mock_schedule_rehash):
+        data = {"email": self.user1.email, "password": "wrongpassword"}
+        response = self.client.post(self.url, data)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        mock_schedule_rehash.assert_not_called()
+
+
+class CalibratePasswordHasherTest(SimpleTestCase):
+    def test_costliest_fitting_parameters_are_printed(self):
+        stdout = StringIO()
+        call_command(
+            "calibrate_password_hasher",
+            target_ms=10000,
+            max_memory=19456,
+            parallelism=1,
+            rounds=1,
+            stdout=stdout,
+        )
+        self.assertIn("ARGON2_TIME_COST=8", stdout.getvalue())
+        self.assertIn("ARGON2_MEMORY_COST=19456", stdout.getvalue())
+
+    def test_unreachable_target(self):
+        with self.assertRaises(CommandError):
+            call_command(
+                "calibrate_password_hasher",
+                target_ms=0.001,
+                rounds=1,
+                stdout=StringIO(),
+            )
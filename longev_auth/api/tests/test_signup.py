@@ -72,6 +72,31 @@ class SignUpViewTest(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
         self.assertEqual(User.objects.count(), 1)
 
+    def test_signup_stores_lowercased_email(self):
+        data = {
+            "email": "User2@Example.COM",
+            "first_name": "Firstname",
+            "last_name": "Lastname",
+            "password": "user2password",
+        }
+        response = self.client.post(self.url_signup, data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data["email"], "user2@example.com")
+        self.assertTrue(
+            User.objects.filter(email="user2@example.com").exists()
+        )
+
+    def test_signup_failed_for_duplicate_email_in_other_case(self):
+        data = {
+            "email": self.user1.email.upper(),
+            "first_name": "Firstname",
+            "last_name": "Lastname",
+            "password": "user2password",
+        }
+        response = self.client.post(self.url_signup, data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(User.objects.count(), 1)
+
     def test_signup_failed_without_password(self):
         data = {
             "email": "somemail@example.com",
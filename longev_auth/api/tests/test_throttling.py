@@ -0,0 +1,195 @@
+from types import SimpleNamespace
+from unittest import skipUnless
+from unittest.mock import patch
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, override_settings
+from rest_framework import status
+from rest_framework.reverse import reverse
+from rest_framework.test import APITestCase
+
+from api.tests.test_email_filter import redis_available
+from api.throttling import (
+    AuthRateThrottle,
+    LocalTokenBuckets,
+    RedisTokenBuckets,
+    get_throttle_backend,
+)
+
+User = get_user_model()
+
+THROTTLE_RATES = {
+    "otp.email": "2/min",
+    "otp.ip": "3/min",
+    "otp.global": "100/min",
+}
+
+
+@override_settings(
+    REST_FRAMEWORK={
+        **settings.REST_FRAMEWORK,
+        "DEFAULT_THROTTLE_RATES": THROTTLE_RATES,
+    }
+)
+class OtpRequestThrottleTest(APITestCase):
+    """Throttling of otp requests per email and per client address."""
+
+    url = reverse("api:auth-otp")
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user1 = User.objects.create(email="user1@example.com")
+        cls.user2 = User.objects.create(email="user2@example.com")
+
+    def setUp(self):
+        get_throttle_backend().clear()
+        patcher = patch("api.tasks.send_email.apply_async")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def post(self, email, ip="10.0.0.1"):
+        return self.client.post(
+            self.url, {"email": email}, HTTP_X_REAL_IP=ip
+        )
+
+    def test_email_limit(self):
+        for _ in range(2):
+            response = self.post(self.user1.email)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response = self.post(self.user1.email.upper(), ip="10.0.0.2")
+        self.assertEqual(
+            response.status_code, status.HTTP_429_TOO_MANY_REQUESTS
+        )
+        self.assertGreater(int(response["Retry-After"]), 0)
+        response = self.post(self.user2.email, ip="10.0.0.2")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_ip_limit(self):
+        for email in ("user1@example.com", "user2@example.com", "x@y.com"):
+            self.post(email)
+        response = self.post("z@y.com")
+        self.assertEqual(
+            response.status_code, status.HTTP_429_TOO_MANY_REQUESTS
+        )
+        response = self.post("z@y.com", ip="10.0.0.2")
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+@override_settings(
+    REST_FRAMEWORK={
+        **settings.REST_FRAMEWORK,
+        "DEFAULT_THROTTLE_RATES": {
+            "token_refresh.ip": "2/min",
+            "token_revoke.ip": "2/min",
+        },
+    }
+)
+class TokenThrottleTest(APITestCase):
+    """Throttling of public refresh token endpoints per client address."""
+
+    def setUp(self):
+        get_throttle_backend().clear()
+
+    def test_ip_limit(self):
+        for name in ("api:auth-token-refresh", "api:auth-token-revoke"):
+            with self.subTest(name=name):
+                url = reverse(name)
+                for _ in range(2):
+                    response = self.client.post(
+                        url, {"refresh": "invalid"}, HTTP_X_REAL_IP="10.0.0.1"
+                    )
+                    self.assertEqual(
+                        response.status_code, status.HTTP_400_BAD_REQUEST
+                    )
+                response = self.client.post(
+                    url, {"refresh": "invalid"}, HTTP_X_REAL_IP="10.0.0.1"
+                )
+                self.assertEqual(
+                    response.status_code, status.HTTP_429_TOO_MANY_REQUESTS
+                )
+                response = self.client.post(
+                    url, {"refresh": "invalid"}, HTTP_X_REAL_IP="10.0.0.2"
+                )
+                self.assertEqual(
+                    response.status_code, status.HTTP_400_BAD_REQUEST
+                )
+
+
+class LocalTokenBucketsTest(SimpleTestCase):
+    """In-process token bucket fallback."""
+
+    def test_bucket_refills_over_time(self):
+        buckets = LocalTokenBuckets(max_size=10)
+        with patch("api.throttling.time.monotonic", return_value=100.0):
+            self.assertEqual(buckets.consume("key", capacity=2, rate=1), 0)
+            self.assertEqual(buckets.consume("key", capacity=2, rate=1), 0)
+            self.assertEqual(buckets.consume("key", capacity=2, rate=1), 1)
+        with patch("api.throttling.time.monotonic", return_value=101.0):
+            self.assertEqual(buckets.consume("key", capacity=2, rate=1), 0)
+
+    def test_size_is_bounded(self):
+        buckets = LocalTokenBuckets(max_size=2)
+        for key in ("a", "b", "c"):
+            buckets.consume(key, capacity=1, rate=1)
+        self.assertEqual(list(buckets._buckets), ["b", "c"])
+
+
+@override_settings(
+    REST_FRAMEWORK={
+        **settings.REST_FRAMEWORK,
+        "DEFAULT_THROTTLE_RATES": THROTTLE_RATES,
+    }
+)
+class AuthRateThrottleTest(SimpleTestCase):
+    """All limits of a request decided in one backend call."""
+
+    def setUp(self):
+        self.request = SimpleNamespace(
+            data={"email": "User1@Example.com"},
+            META={"HTTP_X_REAL_IP": "10.0.0.1"},
+        )
+        self.view = SimpleNamespace(throttle_scope="otp")
+        patcher = patch("api.throttling.get_throttle_backend")
+        self.backend = patcher.start().return_value
+        self.addCleanup(patcher.stop)
+
+    def test_buckets_are_consumed_together(self):
+        self.backend.consume_many.return_value = [0.0, 0.0, 0.0]
+        throttle = AuthRateThrottle()
+        self.assertTrue(throttle.allow_request(self.request, self.view))
+        self.backend.consume_many.assert_called_once_with([
+            ("otp.email:user1@example.com", 2, 2 / 60),
+            ("otp.ip:10.0.0.1", 3, 3 / 60),
+            ("otp.global:all", 100, 100 / 60),
+        ])
+        self.assertEqual(throttle.wait(), 0)
+
+    def test_any_empty_bucket_throttles(self):
+        self.backend.consume_many.return_value = [0.0, 12.5, 0.0]
+        throttle = AuthRateThrottle()
+        self.assertFalse(throttle.allow_request(self.request, self.view))
+        self.assertEqual(throttle.wait(), 12.5)
+
+    def test_unscoped_view_is_not_throttled(self):
+        throttle = AuthRateThrottle()
+        self.assertTrue(throttle.allow_request(self.request, object()))
+        self.backend.consume_many.assert_not_called()
+
+
+@skipUnless(redis_available(), "Redis server is not available")
+class RedisTokenBucketsTest(SimpleTestCase):
+    """Shared token buckets updated by the Lua script."""
+
+    def setUp(self):
+        self.buckets = RedisTokenBuckets(
+            settings.THROTTLE_REDIS_URL, "test:throttle:"
+        )
+        self.addCleanup(self.buckets.clear)
+
+    def test_buckets_are_updated_in_one_call(self):
+        buckets = [("a", 1, 1), ("b", 2, 1)]
+        self.assertEqual(self.buckets.consume_many(buckets), [0, 0])
+        waits = self.buckets.consume_many(buckets)
+        self.assertGreater(waits[0], 0)
+        self.assertEqual(waits[1], 0)
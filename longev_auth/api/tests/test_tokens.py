@@ -0,0 +1,212 @@
+import tempfile
+from datetime import timedelta
+from io import StringIO
+from pathlib import Path
+from unittest import skipUnless
+from unittest.mock import patch
+
+import jwt
+import redis
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import call_command
+from django.test import override_settings
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.reverse import reverse
+from rest_framework.test import APITestCase
+
+from api.authentication import token_user_cache
+from api.tokens import JWTKeySet, KeySetTokenBackend, generate_private_key
+from api.utils import get_user_token
+from core.constants import Messages
+
+User = get_user_model()
+
+
+def redis_available() -> bool:
+    try:
+        return redis.Redis.from_url(settings.TOKEN_REDIS_URL).ping()
+    except redis.RedisError:
+        return False
+
+
+@skipUnless(redis_available(), "Redis server is not available")
+class TokenRefreshTest(APITestCase):
+    """Refresh token rotation and revocation."""
+
+    url_refresh = reverse("api:auth-token-refresh")
+    url_revoke = reverse("api:auth-token-revoke")
+    url_profile = reverse("api:user-profile")
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user1 = User.objects.create(
+            email="user1@example.com", is_active=True
+        )
+
+    def setUp(self):
+        self.refresh = get_user_token(self.user1)["refresh"]
+
+    def test_refresh_rotates_token(self):
+        response = self.client.post(
+            self.url_refresh, {"refresh": self.refresh}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response.data["refresh"], self.refresh)
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f"Bearer {response.data['token']}"
+        )
+        response = self.client.get(self.url_profile)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_refresh_token_is_single_use(self):
+        self.client.post(self.url_refresh, {"refresh": self.refresh})
+        response = self.client.post(
+            self.url_refresh, {"refresh": self.refresh}
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data["message"], Messages.TOKEN_REVOKED)
+
+    def test_revoked_token_cannot_refresh(self):
+        response = self.client.post(self.url_revoke, {"refresh": self.refresh})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response = self.client.post(
+            self.url_refresh, {"refresh": self.refresh}
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_access_token_cannot_refresh(self):
+        access = get_user_token(self.user1)["token"]
+        response = self.client.post(self.url_refresh, {"refresh": access})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            response.data["refresh"], [Messages.INVALID_REFRESH_TOKEN]
+        )
+
+    def test_inactive_user_cannot_refresh(self):
+        User.objects.filter(pk=self.user1.pk).update(is_active=False)
+        response = self.client.post(
+            self.url_refresh, {"refresh": self.refresh}
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            response.data["message"], Messages.PROFILE_IS_INACTIVE
+        )
+
+
+class KeySetSigningTest(APITestCase):
+    """Asymmetric token signing with rotating keys and JWKS."""
+
+    url_jwks = reverse("api:jwks")
+    url_profile = reverse("api:user-profile")
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user1 = User.objects.create(
+            email="user1@example.com", is_active=True
+        )
+        cls.old_key = generate_private_key("EdDSA")
+        cls.new_key = generate_private_key("EdDSA")
+
+    def setUp(self):
+        token_user_cache.clear()
+        self.use_keys(self.old_key)
+
+    def use_keys(self, *private_keys, not_before=None):
+        keyset = JWTKeySet("EdDSA", list(private_keys), not_before)
+        for target, value in (
+            ("api.tokens._keyset", keyset),
+            ("api.tokens._token_backend", KeySetTokenBackend(keyset)),
+        ):
+            patcher = patch(target, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        return keyset
+
+    def get_profile(self, token):
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+        return self.client.get(self.url_profile)
+
+    def test_token_verifies_with_published_key(self):
+        token = get_user_token(self.user1)["token"]
+        response = self.client.get(self.url_jwks)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn("public", response["Cache-Control"])
+        self.assertIn(
+            f"max-age={settings.JWKS_MAX_AGE}", response["Cache-Control"]
+        )
+        jwk_set = jwt.PyJWKSet.from_dict(response.json())
+        kid = jwt.get_unverified_header(token)["kid"]
+        (jwk,) = [key for key in jwk_set.keys if key.key_id == kid]
+        payload = jwt.decode(token, jwk.key, algorithms=["EdDSA"])
+        self.assertEqual(payload["user_id"], self.user1.pk)
+        self.assertEqual(self.get_profile(token).status_code, 200)
+
+    def test_tokens_of_rotated_key_stay_valid(self):
+        old_token = get_user_token(self.user1)["token"]
+        keyset = self.use_keys(self.old_key, self.new_key)
+        new_token = get_user_token(self.user1)["token"]
+        self.assertEqual(
+            jwt.get_unverified_header(new_token)["kid"], keyset.kid
+        )
+        self.assertNotEqual(
+            jwt.get_unverified_header(old_token)["kid"], keyset.kid
+        )
+        self.assertEqual(len(self.client.get(self.url_jwks).json()["keys"]), 2)
+        self.assertEqual(self.get_profile(old_token).status_code, 200)
+        self.assertEqual(self.get_profile(new_token).status_code, 200)
+
+    def test_token_of_removed_key_is_rejected(self):
+        old_token = get_user_token(self.user1)["token"]
+        self.use_keys(self.new_key)
+        response = self.get_profile(old_token)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_new_key_signs_only_from_not_before(self):
+        later = timezone.now() + timedelta(seconds=settings.JWKS_MAX_AGE)
+        keyset = self.use_keys(
+            self.old_key, self.new_key, not_before=[None, later]
+        )
+        old_kid, new_kid = (key[1] for key in keyset.signing_keys)
+        jwks = self.client.get(self.url_jwks).json()
+        self.assertEqual(
+            [key["kid"] for key in jwks["keys"]], [old_kid, new_kid]
+        )
+        token = get_user_token(self.user1)["token"]
+        self.assertEqual(jwt.get_unverified_header(token)["kid"], old_kid)
+        with patch("api.tokens.timezone.now", return_value=later):
+            token = get_user_token(self.user1)["token"]
+        self.assertEqual(jwt.get_unverified_header(token)["kid"], new_kid)
+
+    def test_generated_key_activates_after_jwks_max_age(self):
+        keys_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(keys_dir.cleanup)
+        with override_settings(JWT_KEYS_DIR=keys_dir.name):
+            for _ in range(2):
+                call_command(
+                    "generate_jwt_key",
+                    algorithm="EdDSA",
+                    activate_after=settings.JWKS_MAX_AGE,
+                    stdout=StringIO(),
+                )
+        keyset = JWTKeySet.from_dir("EdDSA", keys_dir.name)
+        self.assertEqual(len(keyset.jwks["keys"]), 2)
+        (first, first_kid, _), (second, second_kid, _) = keyset.signing_keys
+        # The first key of a directory signs at once, the next one later.
+        self.assertLessEqual(first, timezone.now())
+        self.assertGreater(
+            second - first, timedelta(seconds=settings.JWKS_MAX_AGE - 2)
+        )
+        self.assertEqual(keyset.kid, first_kid)
+        with patch("api.tokens.timezone.now", return_value=second):
+            self.assertEqual(keyset.kid, second_kid)
+        self.assertEqual(
+            sorted(path.name for path in Path(keys_dir.name).iterdir()),
+            [f"{first:%Y%m%d%H%M%S}.pem", f"{second:%Y%m%d%H%M%S}.pem"],
+        )
+
+    def test_key_of_other_algorithm_is_rejected(self):
+        with self.assertRaises(ImproperlyConfigured):
+            JWTKeySet("RS256", [self.old_key])
@@ -0,0 +1,279 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+import redis
+from django.conf import settings
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle, SimpleRateThrottle
+
+from . import metrics
+from users.managers import CustomUserManager
+
+logger = logging.getLogger(__name__)
+
+
+class LocalTokenBuckets:
+    """In-process token buckets, limits apply per worker process."""
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def consume(self, key: str, capacity: int, rate: float) -> float:
+        """Take one token from bucket, return seconds to wait if empty."""
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.pop(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated) * rate)
+            wait = 0.0
+            if tokens >= 1:
+                tokens -= 1
+            else:
+                wait = (1 - tokens) / rate
+            self._buckets[key] = (tokens, now)
+            if len(self._buckets) > self.max_size:
+                self._buckets.popitem(last=False)
+        return wait
+
+    def consume_many(self, buckets: list) -> list:
+        """Take one token from every (key, capacity, rate) bucket."""
+        return [self.consume(*bucket) for bucket in buckets]
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+
+
+class RedisTokenBuckets:
+    """Token buckets shared by all workers, updated by one Lua script.
+
+    The script takes any number of buckets, so all buckets of a request
+    cost one round trip.
+    """
+
+    # ARGV holds capacity and rate of every key in turn.
+    consume_script = """
+        local time = redis.call("TIME")
+        local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+        local waits = {}
+        for i, key in ipairs(KEYS) do
+            local capacity = tonumber(ARGV[2 * i - 1])
+            local rate = tonumber(ARGV[2 * i])
+            local bucket = redis.call("HMGET", key, "tokens", "ts")
+            local tokens = tonumber(bucket[1]) or capacity
+            local updated = tonumber(bucket[2]) or now
+            tokens = math.min(capacity, tokens + (now - updated) * rate)
+            local wait = 0
+            if tokens >= 1 then
+                tokens = tokens - 1
+            else
+                wait = (1 - tokens) / rate
+            end
+            redis.call("HSET", key, "tokens", tokens, "ts", now)
+            redis.call("EXPIRE", key, math.ceil(capacity / rate) + 1)
+            waits[i] = tostring(wait)
+        end
+        return waits
+    """
+
+    def __init__(self, url: str, key_prefix: str):
+        self.client = redis.Redis.from_url(
+            url, socket_connect_timeout=0.1, socket_timeout=0.1
+        )
+        self.key_prefix = key_prefix
+        self._consume = self.client.register_script(self.consume_script)
+
+    def consume(self, key: str, capacity: int, rate: float) -> float:
+        return self.consume_many([(key, capacity, rate)])[0]
+
+    def consume_many(self, buckets: list) -> list:
+        keys, args = [], []
+        for key, capacity, rate in buckets:
+            keys.append(self.key_prefix + key)
+            args.extend((capacity, rate))
+        return [float(wait) for wait in self._consume(keys=keys, args=args)]
+
+    def clear(self):
+        for key in self.client.scan_iter(f"{self.key_prefix}*"):
+            self.client.delete(key)
+
+
+class ThrottleBackend:
+    """Redis token buckets falling back to local ones while Redis is down."""
+
+    def __init__(self):
+        self.local = LocalTokenBuckets(max_size=settings.THROTTLE_LOCAL_SIZE)
+        self.redis = None
+        if settings.THROTTLE_BACKEND == "redis":
+            self.redis = RedisTokenBuckets(
+                settings.THROTTLE_REDIS_URL, settings.THROTTLE_REDIS_KEY_PREFIX
+            )
+        self._redis_down_until = 0.0
+
+    def consume(self, key: str, capacity: int, rate: float) -> float:
+        return self.consume_many([(key, capacity, rate)])[0]
+
+    def consume_many(self, buckets: list) -> list:
+        """Take one token from every (key, capacity, rate) bucket at once.
+
+        Return the seconds to wait for every bucket, 0 if it had a token.
+        """
+        redis_up = time.monotonic() >= self._redis_down_until
+        if self.redis is not None and redis_up:
+            try:
+                return self.redis.consume_many(buckets)
+            except redis.RedisError:
+                logger.warning("Redis is unavailable, throttling locally")
+                self._redis_down_until = (
+                    time.monotonic() + settings.THROTTLE_REDIS_RETRY
+                )
+        return self.local.consume_many(buckets)
+
+    def clear(self):
+        self.local.clear()
+        if self.redis is not None:
+            try:
+                self.redis.clear()
+            except redis.RedisError:
+                pass
+
+
+_backend = None
+
+
+def get_throttle_backend() -> ThrottleBackend:
+    global _backend
+    if _backend is None:
+        _backend = ThrottleBackend()
+    return _backend
+
+
+class TokenBucketThrottle(SimpleRateThrottle):
+    """Token bucket throttle scoped by the view `throttle_scope`.
+
+    The rate is looked up in DEFAULT_THROTTLE_RATES under
+    "<throttle_scope>.<kind>", e.g. "otp.email". The bucket holds as many
+    tokens as requests allowed per period and refills evenly over it, so
+    bursts up to the limit pass and a sustained flood gets the average
+    rate only.
+    """
+
+    kind = None
+
+    def __init__(self):
+        # Rate depends on the view scope, it is known in allow_request.
+        self.wait_time = None
+
+    def allow_request(self, request, view):
+        bucket = self.bucket(request, view)
+        if bucket is None:
+            return True
+        [wait] = get_throttle_backend().consume_many([bucket])
+        return self.decide(wait)
+
+    def bucket(self, request, view):
+        """Return (key, capacity, rate) of the request, None if unlimited."""
+        view_scope = getattr(view, "throttle_scope", None)
+        if not view_scope:
+            return None
+        self.scope = f"{view_scope}.{self.kind}"
+        rate = api_settings.DEFAULT_THROTTLE_RATES.get(self.scope)
+        if rate is None:
+            return None
+        self.num_requests, self.duration = self.parse_rate(rate)
+        ident = self.get_throttle_ident(request)
+        if ident is None:
+            return None
+        return (
+            f"{self.scope}:{ident}",
+            self.num_requests,
+            self.num_requests / self.duration,
+        )
+
+    def decide(self, wait: float) -> bool:
+        """Record the wait the bucket returned, return whether allowed."""
+        self.wait_time = wait
+        allowed = wait == 0
+        metrics.THROTTLE_REQUESTS.labels(
+            self.scope, "allowed" if allowed else "throttled"
+        ).inc()
+        return allowed
+
+    def get_throttle_ident(self, request):
+        raise NotImplementedError
+
+    def wait(self):
+        return self.wait_time
+
+
+class EmailRateThrottle(TokenBucketThrottle):
+    """Limit requests naming the same email."""
+
+    kind = "email"
+
+    def get_throttle_ident(self, request):
+        data = request.data
+        email = data.get("email") if hasattr(data, "get") else None
+        if not isinstance(email, str) or not email:
+            return None
+        return CustomUserManager.normalize_email(email)
+
+
+class IPRateThrottle(TokenBucketThrottle):
+    """Limit requests from the same client address set by nginx."""
+
+    kind = "ip"
+
+    def get_throttle_ident(self, request):
+        return request.META.get("HTTP_X_REAL_IP") or request.META.get(
+            "REMOTE_ADDR"
+        )
+
+
+class GlobalRateThrottle(TokenBucketThrottle):
+    """Limit all requests to the scope together."""
+
+    kind = "global"
+
+    def get_throttle_ident(self, request):
+        return "all"
+
+
+class AuthRateThrottle(BaseThrottle):
+    """Email, IP and global limits of the scope in one backend call.
+
+    Same limits as the three throttles listed one by one, but their
+    buckets are updated together, in one Redis round trip per request.
+    """
+
+    throttle_classes = (EmailRateThrottle, IPRateThrottle, GlobalRateThrottle)
+
+    def __init__(self):
+        self.wait_time = None
+
+    def allow_request(self, request, view):
+        throttles, buckets = [], []
+        for throttle_class in self.throttle_classes:
+            throttle = throttle_class()
+            bucket = throttle.bucket(request, view)
+            if bucket is not None:
+                throttles.append(throttle)
+                buckets.append(bucket)
+        if not buckets:
+            return True
+        waits = get_throttle_backend().consume_many(buckets)
+        # Every bucket pays its token, like separate throttles would.
+        allowed = [
+            throttle.decide(wait) for throttle, wait in zip(throttles, waits)
+        ]
+        self.wait_time = max(waits)
+        return all(allowed)
+
+    def wait(self):
+        return self.wait_time
+
+
+AUTH_THROTTLE_CLASSES = (AuthRateThrottle,)
@@ -0,0 +1,54 @@
+import time
+
+import redis
+from django.conf import settings
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+from core.constants import Messages
+
+
+class TokenStoreUnavailable(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = Messages.SERVICE_BUSY
+    default_code = "service_unavailable"
+
+    def __init__(self):
+        super().__init__({"message": Messages.SERVICE_BUSY})
+
+
+class RevokedTokenStore:
+    """Deny-list of refresh token ids kept in Redis until token expiry.
+
+    Every key lives only as long as the token it revokes could be used,
+    so the list holds just the revoked tokens that are still unexpired.
+    """
+
+    def __init__(self, url: str, key_prefix: str):
+        self.client = redis.Redis.from_url(
+            url, socket_connect_timeout=0.1, socket_timeout=0.1
+        )
+        self.key_prefix = key_prefix
+
+    def key(self, jti: str) -> str:
+        return f"{self.key_prefix}{jti}"
+
+    def revoke(self, jti: str, exp: int) -> bool:
+        """Revoke token, return False if it was revoked already."""
+        ttl = max(int(exp - time.time()), 1)
+        try:
+            return bool(self.client.set(self.key(jti), 1, ex=ttl, nx=True))
+        except redis.RedisError:
+            raise TokenStoreUnavailable
+
+
+_store = None
+
+
+def get_revoked_token_store() -> RevokedTokenStore:
+    global _store
+    if _store is None:
+        _store = RevokedTokenStore(
+            settings.TOKEN_REDIS_URL, settings.TOKEN_REDIS_KEY_PREFIX
+        )
+    return _store
@@ -0,0 +1,217 @@
+import base64
+import hashlib
+import json
+from datetime import datetime
+from datetime import timezone as dt_timezone
+from pathlib import Path
+
+import jwt
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519, rsa
+from cryptography.hazmat.primitives.serialization import (
+    Encoding,
+    NoEncryption,
+    PrivateFormat,
+    load_pem_private_key,
+)
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt import tokens
+from rest_framework_simplejwt.backends import TokenBackend
+from rest_framework_simplejwt.exceptions import TokenBackendError
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from rest_framework_simplejwt.state import token_backend as hmac_backend
+
+ASYMMETRIC_ALGORITHMS = {"RS256", "ES256", "EdDSA"}
+# Key files are named by the UTC time from which they sign tokens.
+KEY_NAME_FORMAT = "%Y%m%d%H%M%S"
+
+# Public JWK members hashed into the RFC 7638 thumbprint, by key type.
+THUMBPRINT_MEMBERS = {
+    "RSA": ("e", "kty", "n"),
+    "EC": ("crv", "kty", "x", "y"),
+    "OKP": ("crv", "kty", "x"),
+}
+
+
+def generate_private_key(algorithm: str):
+    if algorithm == "RS256":
+        return rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    if algorithm == "ES256":
+        return ec.generate_private_key(ec.SECP256R1())
+    if algorithm == "EdDSA":
+        return ed25519.Ed25519PrivateKey.generate()
+    raise ValueError(f"Unsupported algorithm: {algorithm}")
+
+
+def private_key_to_pem(private_key) -> bytes:
+    return private_key.private_bytes(
+        Encoding.PEM, PrivateFormat.PKCS8, NoEncryption()
+    )
+
+
+def key_not_before(path: Path):
+    """Return the time a key file may sign from, None if not in its name."""
+    try:
+        not_before = datetime.strptime(path.stem, KEY_NAME_FORMAT)
+    except ValueError:
+        return None
+    return not_before.replace(tzinfo=dt_timezone.utc)
+
+
+def jwk_thumbprint(jwk: dict) -> str:
+    members = {name: jwk[name] for name in THUMBPRINT_MEMBERS[jwk["kty"]]}
+    data = json.dumps(members, sort_keys=True, separators=(",", ":"))
+    digest = hashlib.sha256(data.encode()).digest()
+    return base64.urlsafe_b64encode(digest).rstrip(b"=").decode()
+
+
+class JWTKeySet:
+    """Private keys of one algorithm, the last active one signs new tokens.
+
+    Every key is published in JWKS and accepted for verification, so
+    tokens signed before a rotation stay valid until they expire. A key
+    signs only from its not before time, by then verifiers caching JWKS
+    know it. Key ids are JWK thumbprints and do not depend on file names.
+    """
+
+    def __init__(
+        self, algorithm: str, private_keys: list, not_before: list = None
+    ):
+        if not private_keys:
+            raise ImproperlyConfigured(f"No signing keys for {algorithm}")
+        self.algorithm = algorithm
+        jwt_algorithm = jwt.PyJWS().get_algorithm_by_name(algorithm)
+        self.public_keys = {}
+        # Not before time, kid and private key of every key, in order.
+        self.signing_keys = []
+        jwks = []
+        not_before = not_before or [None] * len(private_keys)
+        for private_key, active_from in zip(private_keys, not_before):
+            try:
+                public_key = jwt_algorithm.prepare_key(
+                    private_key.public_key()
+                )
+            except (jwt.InvalidKeyError, TypeError) as ex:
+                raise ImproperlyConfigured(
+                    f"Signing key does not suit {algorithm}"
+                ) from ex
+            jwk = jwt_algorithm.to_jwk(public_key, as_dict=True)
+            jwk.update(kid=jwk_thumbprint(jwk), alg=algorithm, use="sig")
+            self.public_keys[jwk["kid"]] = public_key
+            self.signing_keys.append((active_from, jwk["kid"], private_key))
+            jwks.append(jwk)
+        self.jwks = {"keys": jwks}
+
+    def active_key(self) -> tuple:
+        """Return kid and private key signing now.
+
+        That is the last key whose not before time has passed, or the
+        first key while none has.
+        """
+        now = timezone.now()
+        active = [
+            key
+            for key in self.signing_keys
+            if key[0] is None or key[0] <= now
+        ]
+        _, kid, private_key = active[-1] if active else self.signing_keys[0]
+        return kid, private_key
+
+    @property
+    def kid(self) -> str:
+        return self.active_key()[0]
+
+    @classmethod
+    def from_dir(cls, algorithm: str, path) -> "JWTKeySet":
+        """Load PEM private keys from `*.pem` files ordered by name.
+
+        Files named by KEY_NAME_FORMAT sign from that UTC time.
+        """
+        files = sorted(Path(path).glob("*.pem"))
+        private_keys = [
+            load_pem_private_key(file.read_bytes(), password=None)
+            for file in files
+        ]
+        return cls(algorithm, private_keys, [key_not_before(f) for f in files])
+
+
+class KeySetTokenBackend(TokenBackend):
+    """Token backend signing with a key set and naming the key in `kid`."""
+
+    def __init__(self, keyset: JWTKeySet):
+        super().__init__(
+            keyset.algorithm,
+            audience=jwt_settings.AUDIENCE,
+            issuer=jwt_settings.ISSUER,
+            leeway=jwt_settings.LEEWAY,
+            json_encoder=jwt_settings.JSON_ENCODER,
+        )
+        self.keyset = keyset
+
+    def _validate_algorithm(self, algorithm: str) -> None:
+        if algorithm not in ASYMMETRIC_ALGORITHMS:
+            raise TokenBackendError(
+                _("Unrecognized algorithm type '{}'").format(algorithm)
+            )
+
+    def get_verifying_key(self, token):
+        try:
+            kid = jwt.get_unverified_header(token).get("kid")
+        except jwt.InvalidTokenError as ex:
+            raise TokenBackendError(_("Token is invalid or expired")) from ex
+        if kid not in self.keyset.public_keys:
+            raise TokenBackendError(_("Token is invalid or expired"))
+        return self.keyset.public_keys[kid]
+
+    def encode(self, payload: dict) -> str:
+        jwt_payload = payload.copy()
+        if self.audience is not None:
+            jwt_payload["aud"] = self.audience
+        if self.issuer is not None:
+            jwt_payload["iss"] = self.issuer
+        kid, private_key = self.keyset.active_key()
+        return jwt.encode(
+            jwt_payload,
+            private_key,
+            algorithm=self.algorithm,
+            headers={"kid": kid},
+            json_encoder=self.json_encoder,
+        )
+
+
+_keyset = None
+_token_backend = None
+
+
+def get_keyset():
+    """Return signing key set, None when tokens are signed with HS256."""
+    global _keyset
+    if _keyset is None and settings.JWT_ALGORITHM in ASYMMETRIC_ALGORITHMS:
+        _keyset = JWTKeySet.from_dir(
+            settings.JWT_ALGORITHM, settings.JWT_KEYS_DIR
+        )
+    return _keyset
+
+
+def get_token_backend() -> TokenBackend:
+    global _token_backend
+    if _token_backend is None:
+        keyset = get_keyset()
+        _token_backend = (
+            hmac_backend if keyset is None else KeySetTokenBackend(keyset)
+        )
+    return _token_backend
+
+
+class AccessToken(tokens.AccessToken):
+    def get_token_backend(self) -> TokenBackend:
+        return get_token_backend()
+
+
+class RefreshToken(tokens.RefreshToken):
+    access_token_class = AccessToken
+
+    def get_token_backend(self) -> TokenBackend:
+        return get_token_backend()
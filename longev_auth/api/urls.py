@@ -1,14 +1,25 @@
+from django.conf import settings
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
 from .views import (
+    JWKSView,
+    MetricsView,
     OtpAuthView,
     OtpRequestView,
     PasswordAuthView,
     ProfileView,
     SignUpView,
+    TokenRefreshView,
+    TokenRevokeView,
 )
 
+if settings.ASYNC_API:
+    from .async_views import AsyncOtpAuthView as OtpAuthView
+    from .async_views import AsyncOtpRequestView as OtpRequestView
+    from .async_views import AsyncPasswordAuthView as PasswordAuthView
+    from .async_views import AsyncProfileView as ProfileView
+
 app_name = "api"
 
 router = DefaultRouter()
@@ -23,9 +34,15 @@ auth_urlpatterns = [
     path("token-pwd/", PasswordAuthView.as_view(), name="auth-token-pwd"),
     path("otp/", OtpRequestView.as_view(), name="auth-otp"),
     path("token-otp/", OtpAuthView.as_view(), name="auth-token-otp"),
+    path(
+        "token-refresh/", TokenRefreshView.as_view(), name="auth-token-refresh"
+    ),
+    path("token-revoke/", TokenRevokeView.as_view(), name="auth-token-revoke"),
 ]
 
 urlpatterns = [
     path("user/", include(user_urlpatterns)),
     path("auth/", include(auth_urlpatterns)),
+    path(".well-known/jwks.json", JWKSView.as_view(), name="jwks"),
+    path("metrics", MetricsView.as_view(), name="metrics"),
 ]
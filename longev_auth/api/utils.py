@@ -1,53 +1,93 @@
-import base64
-import os
-
-import pyotp
 from django.conf import settings
-from django.core.exceptions import ObjectDoesNotExist
-from django.core.mail import EmailMessage
-from django.template.loader import get_template
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.http import Http404
+from django.shortcuts import get_object_or_404
 from django.utils import timezone
-from rest_framework_simplejwt.tokens import RefreshToken
 
+from . import metrics
+from .email_filter import get_email_filter
+from .last_login import get_last_login_buffer
+from .otp import generate_otp
+from .profiling import phase
 from .tasks import send_email
+from .tokens import RefreshToken
 from core.constants import Messages
 
+User = get_user_model()
 
-def get_user_token(user):
-    token = RefreshToken.for_user(user)
-    return {
-        "token": str(token.access_token),
-    }
 
+def get_user_or_404(email: str, related=()):
+    """Find user by email, unknown emails are mostly told by email filter.
 
-def generate_otp_code():
-    totp = pyotp.TOTP(
-        base64.b32encode(os.urandom(16)).decode(),
-        digits=settings.OTP_LENGTH,
+    Relations named in related are loaded in the same query.
+    """
+    email_filter = get_email_filter()
+    if email_filter is not None and not email_filter.might_contain(email):
+        raise Http404
+    users = User.objects.all()
+    if related:
+        users = users.select_related(*related)
+    return get_object_or_404(users, email=email)
+
+
+def get_user_for_update(user_id):
+    """Lock and return the current row of an active user.
+
+    request.user may be a snapshot cached with its access token, writes
+    start from the row so they never restore columns changed meanwhile.
+    Call it inside a transaction.
+    """
+    return get_object_or_404(
+        User.objects.select_for_update().filter(is_active=True), pk=user_id
     )
-    return totp.now()
 
 
-def is_valid_user_otp(user, otp: str) -> bool:
-    try:
-        user_otp = user.otp
-        if user_otp.otp != otp:
-            return False
-        if user_otp.exp_time < timezone.now():
-            return False
-        return True
-    except ObjectDoesNotExist:
-        return False
+@transaction.atomic
+def deactivate_user(user_id) -> None:
+    user = get_user_for_update(user_id)
+    user.is_active = False
+    user.save(update_fields=["is_active"])
 
 
-def send_otp_email(user, otp) -> EmailMessage:
+@metrics.TOKEN_MINT_SECONDS.time()
+def get_user_token(user):
+    with phase("token"):
+        token = RefreshToken.for_user(user)
+        return {
+            "token": str(token.access_token),
+            "refresh": str(token),
+        }
+
+
+def record_login(user) -> None:
+    """Set last_login, the database is updated later in a batch."""
+    user.last_login = timezone.now()
+    get_last_login_buffer().record(user)
+
+
+@metrics.OTP_GENERATE_SECONDS.time()
+def generate_otp_code():
+    return generate_otp()
+
+
+def send_otp_email(user, otp) -> None:
     context = {"fullname": user.full_name, "email": user.email, "otp": otp}
-    message_body = get_template("otp_auth_template.html").render(context)
-    send_email.delay(
-        subject=Messages.OTP_EMAIL_SUBJECT,
-        body=message_body,
-        from_email=None,
-        to=[user.email],
-        reply_to=["noreply"],
-        content_subtype="html",
-    )
+    with phase("enqueue"):
+        # Own queue and priority keep otp emails ahead of other tasks, an
+        # email still queued when the code expires is dropped, not sent.
+        send_email.apply_async(
+            kwargs={
+                "subject": Messages.OTP_EMAIL_SUBJECT,
+                "body": "",
+                "from_email": None,
+                "to": [user.email],
+                "reply_to": ["noreply"],
+                "content_subtype": "html",
+                "template_name": "otp_auth_template.html",
+                "context": context,
+            },
+            queue=settings.CELERY_OTP_QUEUE,
+            priority=settings.CELERY_OTP_PRIORITY,
+            expires=settings.OTP_LIFETIME,
+        )
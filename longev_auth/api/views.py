@@ -1,31 +1,45 @@
-from datetime import timedelta
-
 from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.contrib.auth.hashers import check_password
-from django.core.exceptions import ObjectDoesNotExist
+from django.db import transaction
+from django.http import HttpResponse
 from django.shortcuts import get_object_or_404
-from django.utils import timezone
+from django.utils.cache import patch_cache_control
+from django.views import View
 from drf_yasg.utils import swagger_auto_schema
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
 from rest_framework import generics, status
 from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
-
-from .models import OtpCode
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+
+from .hashing import schedule_rehash, verify_password
+from .metrics import get_registry
+from .otp_store import get_otp_store
+from .parsers import FAST_PARSER_CLASSES
+from .payloads import OtpAuthPayload, OtpRequestPayload, PasswordAuthPayload
+from .profile_cache import cached_profile_response
+from .renderers import FAST_RENDERER_CLASSES
 from .serializers import (
     CreateUserSerializer,
     OtpAuthSerializer,
     OtpRequestSerializer,
     PasswordAuthSerializer,
+    RefreshTokenSerializer,
     TokenSerializer,
     UpdateUserSerializer,
 )
+from .throttling import AUTH_THROTTLE_CLASSES
+from .token_store import get_revoked_token_store
+from .tokens import get_keyset
 from api.utils import (
+    deactivate_user,
     generate_otp_code,
+    get_user_for_update,
+    get_user_or_404,
     get_user_token,
-    is_valid_user_otp,
+    record_login,
     send_otp_email,
 )
 from core.constants import Messages
@@ -49,8 +63,13 @@ class ProfileView(generics.RetrieveUpdateDestroyAPIView):
     permission_classes = [IsAuthenticated]
 
     def get_object(self):
-        return self.request.user
+        return get_user_for_update(self.request.user.pk)
+
+    def get(self, request, *args, **kwargs):
+        """Get user profile, 304 if If-None-Match has its ETag."""
+        return cached_profile_response(request)
 
+    @transaction.atomic
     def put(self, request, *args, **kwargs):
         """Update user profile."""
         instance = self.get_object()
@@ -59,11 +78,14 @@ class ProfileView(generics.RetrieveUpdateDestroyAPIView):
         serializer.save()
         return Response(serializer.data, status=status.HTTP_200_OK)
 
+    @transaction.atomic
+    def patch(self, request, *args, **kwargs):
+        """Partially update user profile."""
+        return super().patch(request, *args, **kwargs)
+
     def delete(self, request, *args, **kwargs):
         """Delete user profile."""
-        user = self.get_object()
-        user.is_active = False
-        user.save()
+        deactivate_user(request.user.pk)
         return Response(
             {"message": Messages.PROFILE_DELETED},
             status=status.HTTP_204_NO_CONTENT,
@@ -72,46 +94,52 @@ class ProfileView(generics.RetrieveUpdateDestroyAPIView):
 
 class PasswordAuthView(APIView):
     permission_classes = (AllowAny,)
+    throttle_classes = AUTH_THROTTLE_CLASSES
+    throttle_scope = "password"
+    parser_classes = FAST_PARSER_CLASSES
+    renderer_classes = FAST_RENDERER_CLASSES
 
     @swagger_auto_schema(
         request_body=PasswordAuthSerializer, responses={200: TokenSerializer}
     )
     def post(self, request):
         """Return jwt token for given email and password."""
-        serializer = PasswordAuthSerializer(data=request.data)
-        serializer.is_valid(raise_exception=True)
-        email = serializer.validated_data["email"]
-        password = serializer.validated_data["password"]
-        user = get_object_or_404(User, email=email)
+        payload = PasswordAuthPayload(data=request.data)
+        payload.is_valid(raise_exception=True)
+        email = payload.validated_data["email"]
+        password = payload.validated_data["password"]
+        user = get_user_or_404(email)
         if not user.is_active:
             raise ValidationError({"message": Messages.PROFILE_IS_INACTIVE})
-        if not check_password(password, user.password):
+        if not verify_password(password, user.password):
             raise ValidationError({"message": Messages.INCORRECT_PASSWORD})
+        schedule_rehash(user, password)
+        record_login(user)
         token_data = get_user_token(user)
         return Response(token_data, status=status.HTTP_200_OK)
 
 
 class OtpRequestView(APIView):
     permission_classes = (AllowAny,)
+    throttle_classes = AUTH_THROTTLE_CLASSES
+    throttle_scope = "otp"
+    parser_classes = FAST_PARSER_CLASSES
+    renderer_classes = FAST_RENDERER_CLASSES
 
     @swagger_auto_schema(request_body=OtpRequestSerializer)
     def post(self, request):
         """Generate otp code and send to given email."""
-        serializer = OtpRequestSerializer(data=request.data)
-        serializer.is_valid(raise_exception=True)
-        email = serializer.validated_data["email"]
-        user = get_object_or_404(User, email=email)
+        payload = OtpRequestPayload(data=request.data)
+        payload.is_valid(raise_exception=True)
+        email = payload.validated_data["email"]
+        user = get_user_or_404(email)
         if not user.is_active:
             raise ValidationError({"message": Messages.PROFILE_IS_INACTIVE})
-        try:
-            user.otp.delete()
-        except ObjectDoesNotExist:
-            pass
         otp = generate_otp_code()
-        exp_time = timezone.now() + timedelta(seconds=settings.OTP_LIFETIME)
-        otp_model = OtpCode(otp=otp, user=user, exp_time=exp_time)
-        otp_model.save()
-        send_otp_email(user, otp)
+        # A repeated request gets the answer of the first one, its code
+        # is still on the way.
+        if get_otp_store().issue(user, otp):
+            send_otp_email(user, otp)
         return Response(
             {"message": Messages.OTP_SENT_TO_EMAIL.format(email=user.email)},
             status=status.HTTP_200_OK,
@@ -120,22 +148,96 @@ class OtpRequestView(APIView):
 
 class OtpAuthView(APIView):
     permission_classes = (AllowAny,)
+    throttle_classes = AUTH_THROTTLE_CLASSES
+    throttle_scope = "otp_auth"
+    parser_classes = FAST_PARSER_CLASSES
+    renderer_classes = FAST_RENDERER_CLASSES
 
     @swagger_auto_schema(
         request_body=OtpAuthSerializer, responses={200: TokenSerializer}
     )
     def post(self, request):
         """Return jwt token for given email and otp code."""
-        serializer = OtpAuthSerializer(data=request.data)
-        serializer.is_valid(raise_exception=True)
-        email = serializer.validated_data["email"]
-        otp = serializer.validated_data["otp"]
-        user = get_object_or_404(User, email=email)
+        payload = OtpAuthPayload(data=request.data)
+        payload.is_valid(raise_exception=True)
+        email = payload.validated_data["email"]
+        otp = payload.validated_data["otp"]
+        otp_store = get_otp_store()
+        user = get_user_or_404(email, otp_store.user_related)
         if not user.is_active:
             raise ValidationError({"message": Messages.PROFILE_IS_INACTIVE})
-        if not is_valid_user_otp(user, otp):
+        if not otp_store.consume(user, otp):
             raise ValidationError({"message": Messages.INCORRECT_OTP})
-        user.otp.delete()
-        user.save()
+        record_login(user)
+        token_data = get_user_token(user)
+        return Response(token_data, status=status.HTTP_200_OK)
+
+
+class TokenRefreshView(APIView):
+    permission_classes = (AllowAny,)
+    throttle_classes = AUTH_THROTTLE_CLASSES
+    throttle_scope = "token_refresh"
+
+    @swagger_auto_schema(
+        request_body=RefreshTokenSerializer, responses={200: TokenSerializer}
+    )
+    def post(self, request):
+        """Return new jwt token pair, the given refresh token is revoked."""
+        serializer = RefreshTokenSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        refresh = serializer.validated_data["refresh"]
+        # Only the first use of a refresh token manages to revoke it.
+        store = get_revoked_token_store()
+        if not store.revoke(refresh["jti"], refresh["exp"]):
+            raise ValidationError({"message": Messages.TOKEN_REVOKED})
+        user_id = refresh[jwt_settings.USER_ID_CLAIM]
+        user = get_object_or_404(User, **{jwt_settings.USER_ID_FIELD: user_id})
+        if not user.is_active:
+            raise ValidationError({"message": Messages.PROFILE_IS_INACTIVE})
         token_data = get_user_token(user)
         return Response(token_data, status=status.HTTP_200_OK)
+
+
+class TokenRevokeView(APIView):
+    permission_classes = (AllowAny,)
+    throttle_classes = AUTH_THROTTLE_CLASSES
+    throttle_scope = "token_revoke"
+
+    @swagger_auto_schema(request_body=RefreshTokenSerializer)
+    def post(self, request):
+        """Revoke refresh token."""
+        serializer = RefreshTokenSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        refresh = serializer.validated_data["refresh"]
+        get_revoked_token_store().revoke(refresh["jti"], refresh["exp"])
+        return Response(
+            {"message": Messages.TOKEN_REVOKED}, status=status.HTTP_200_OK
+        )
+
+
+class JWKSView(APIView):
+    """Public keys verifying issued jwt tokens, found by `kid` header."""
+
+    permission_classes = (AllowAny,)
+    authentication_classes = ()
+
+    @swagger_auto_schema(auto_schema=None)
+    def get(self, request):
+        keyset = get_keyset()
+        response = Response(
+            keyset.jwks if keyset is not None else {"keys": []},
+            status=status.HTTP_200_OK,
+        )
+        patch_cache_control(
+            response, public=True, max_age=settings.JWKS_MAX_AGE
+        )
+        return response
+
+
+class MetricsView(View):
+    """Prometheus metrics of all workers of this instance."""
+
+    def get(self, request):
+        return HttpResponse(
+            generate_latest(get_registry()), content_type=CONTENT_TYPE_LATEST
+        )
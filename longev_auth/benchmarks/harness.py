@@ -0,0 +1,151 @@
+import tempfile
+import time
+from contextlib import ExitStack, contextmanager
+from pathlib import Path
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, connections
+from django.test.utils import setup_databases, teardown_databases
+from django.utils import timezone
+
+from api.middleware import QueryCounter
+from api.testing import isolated_redis_data
+
+# Nothing listens here, so Redis calls fail at once.
+DOWN_REDIS_URL = "redis://127.0.0.1:1/0"
+WRITE_STATEMENTS = ("INSERT", "UPDATE", "DELETE")
+
+
+def percentile(sorted_values: list, fraction: float) -> float:
+    index = min(len(sorted_values) - 1, round(fraction * len(sorted_values)))
+    return sorted_values[index]
+
+
+class WriteCounter(QueryCounter):
+    """Query counter also counting data changing statements."""
+
+    def __init__(self):
+        super().__init__()
+        self.writes = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        if sql.lstrip()[:6].upper() in WRITE_STATEMENTS:
+            self.writes += 1
+        return super().__call__(execute, sql, params, many, context)
+
+
+@contextmanager
+def benchmark_databases():
+    """Run on throwaway test databases, SQLite in a temporary file.
+
+    A file lets threads write to SQLite without shared cache locks.
+    """
+    test_settings = connections["default"].settings_dict["TEST"]
+    with tempfile.TemporaryDirectory() as directory:
+        if connection.vendor == "sqlite" and not test_settings.get("NAME"):
+            test_settings["NAME"] = str(Path(directory, "benchmark.sqlite3"))
+        old_config = setup_databases(verbosity=0, interactive=False)
+        try:
+            yield
+        finally:
+            teardown_databases(old_config, verbosity=0)
+
+
+def seed_users(count: int, prefix: str) -> None:
+    """Insert count users <prefix>-<n>@example.com in one statement.
+
+    The rows are generated by a recursive CTE in the database, which is
+    much faster than sending them for millions of users.
+    """
+    User = get_user_model()
+    meta = User._meta
+    columns = ", ".join(
+        meta.get_field(name).column
+        for name in (
+            "password",
+            "is_superuser",
+            "email",
+            "is_staff",
+            "is_active",
+            "date_joined",
+        )
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "WITH RECURSIVE seq(n) AS ("
+            "SELECT 1 UNION ALL SELECT n + 1 FROM seq WHERE n < %s) "
+            f"INSERT INTO {meta.db_table} ({columns}) "
+            "SELECT '', %s, %s || n || '@example.com', %s, %s, %s FROM seq",
+            [count, False, f"{prefix}-", False, True, timezone.now()],
+        )
+
+
+class BenchmarkCommand(BaseCommand):
+    """Command measuring with measure() and printing with report().
+
+    handle() keeps what measure() returned in self.results, so tests run
+    the command object and check the numbers instead of parsing the
+    printed table.
+    """
+
+    # Columns printed by report() as (result key, header, format spec),
+    # results being a list of dicts. The first column is left aligned.
+    columns = ()
+    # Run on throwaway test databases, unless --no-test-database, with
+    # Redis data of their users apart from the live keys.
+    uses_database = False
+
+    results = None
+
+    def add_arguments(self, parser):
+        if self.uses_database:
+            parser.add_argument(
+                "--no-test-database",
+                action="store_true",
+                help="Use the configured database as is, e.g. inside tests.",
+            )
+
+    def handle(self, *args, **options):
+        self.validate(options)
+        with ExitStack() as stack:
+            if self.uses_database:
+                stack.enter_context(
+                    isolated_redis_data(f"benchmark-{time.time_ns()}")
+                )
+                if not options["no_test_database"]:
+                    stack.enter_context(benchmark_databases())
+            self.results = self.measure(options)
+        self.report(self.results)
+
+    def validate(self, options) -> None:
+        """Raise CommandError for options out of range."""
+
+    def measure(self, options):
+        raise NotImplementedError
+
+    def report(self, results) -> None:
+        self.write_table(self.columns, results)
+
+    def write_table(self, columns, rows: list) -> None:
+        """Write rows aligned under the headers, None shown as "-"."""
+        lines = [
+            [header for _, header, _ in columns],
+            *(
+                [
+                    "-" if row[key] is None else format(row[key], spec)
+                    for key, _, spec in columns
+                ]
+                for row in rows
+            ),
+        ]
+        widths = [max(len(cell) for cell in column) for column in zip(*lines)]
+        for line in lines:
+            first, *rest = line
+            self.stdout.write(
+                f"{first:<{widths[0]}}"
+                + "".join(
+                    f"{cell:>{width + 2}}"
+                    for cell, width in zip(rest, widths[1:])
+                )
+            )
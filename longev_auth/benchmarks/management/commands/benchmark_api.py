@@ -0,0 +1,656 @@
+import asyncio
+import json
+import statistics
+import subprocess
+import threading
+import time
+from collections import deque
+from contextlib import nullcontext
+from pathlib import Path
+
+from celery import current_app
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core import mail
+from django.core.management.base import CommandError
+from django.db import close_old_connections, connection
+from django.db.backends.signals import connection_created
+from django.test.client import AsyncClient
+from django.test.utils import override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from api.otp_store import get_otp_store
+from api.profile_cache import get_cached_profile
+from api.utils import get_user_token
+from benchmarks.harness import BenchmarkCommand, WriteCounter, percentile
+
+User = get_user_model()
+
+PASSWORD = "benchpassword"
+OTP = "123456"
+# Requests in a row for one user in bursts of repeated requests.
+BURST = 5
+
+
+class RequestThreads:
+    """At most size requests handled at once, the others wait in order.
+
+    Stands in for the request threads of a gunicorn worker, which take
+    connections off the listen backlog first come, first served.
+    """
+
+    def __init__(self, size: int):
+        self.size = size
+        self.busy = 0
+        self.waiting = deque()
+        self.lock = threading.Lock()
+
+    def __enter__(self):
+        with self.lock:
+            if self.busy < self.size and not self.waiting:
+                self.busy += 1
+                return
+            turn = threading.Event()
+            self.waiting.append(turn)
+        # The releasing request hands its thread over.
+        turn.wait()
+
+    def __exit__(self, *exc_info):
+        with self.lock:
+            if self.waiting:
+                self.waiting.popleft().set()
+            else:
+                self.busy -= 1
+
+
+class Scenario:
+    """One API call measured many times, each time for its own user."""
+
+    url_name = None
+    method = "post"
+    expected_status = 200
+
+    def prepare(self, users) -> list:
+        """Untimed setup, return per request argument lists."""
+        return users
+
+    def data(self, user) -> dict:
+        return {}
+
+    def call(self, client, user):
+        return getattr(client, self.method)(
+            reverse(self.url_name), self.data(user), format="json"
+        )
+
+
+class SignUp(Scenario):
+    url_name = "api:user-signup"
+    expected_status = 201
+
+    def prepare(self, users):
+        return [f"new-{user.email}" for user in users]
+
+    def data(self, email):
+        return {
+            "email": email,
+            "first_name": "first",
+            "last_name": "last",
+            "password": PASSWORD,
+        }
+
+
+class PasswordLogin(Scenario):
+    url_name = "api:auth-token-pwd"
+
+    def data(self, user):
+        return {"email": user.email, "password": PASSWORD}
+
+
+class OtpRequest(Scenario):
+    url_name = "api:auth-otp"
+
+    def data(self, user):
+        return {"email": user.email}
+
+
+class OtpBurst(OtpRequest):
+    """Otp requested BURST times in a row by every user."""
+
+    def prepare(self, users):
+        return [users[i // BURST] for i in range(len(users))]
+
+
+class OtpAuth(Scenario):
+    url_name = "api:auth-token-otp"
+
+    def prepare(self, users):
+        for user in users:
+            get_otp_store().issue(user, OTP)
+        return users
+
+    def data(self, user):
+        return {"email": user.email, "otp": OTP}
+
+
+class TokenRefresh(Scenario):
+    url_name = "api:auth-token-refresh"
+
+    def prepare(self, users):
+        return [get_user_token(user)["refresh"] for user in users]
+
+    def data(self, refresh):
+        return {"refresh": refresh}
+
+
+class ProfileRead(Scenario):
+    url_name = "api:user-profile"
+    method = "get"
+
+    def prepare(self, users):
+        return [(user, get_user_token(user)["token"]) for user in users]
+
+    def call(self, client, user_token):
+        _, token = user_token
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+        return client.get(reverse(self.url_name))
+
+
+class ProfileRepeat(ProfileRead):
+    """Profile read BURST times in a row with the same access token."""
+
+    def prepare(self, users):
+        tokens = super().prepare(users[: -(-len(users) // BURST)])
+        return [tokens[i // BURST] for i in range(len(users))]
+
+
+class ProfileRevalidate(ProfileRead):
+    """Profile read by a client holding the current ETag."""
+
+    expected_status = 304
+
+    def prepare(self, users):
+        return [
+            (user, get_user_token(user)["token"], get_cached_profile(user)[1])
+            for user in users
+        ]
+
+    def call(self, client, user_token_etag):
+        _, token, etag = user_token_etag
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+        return client.get(reverse(self.url_name), HTTP_IF_NONE_MATCH=etag)
+
+
+class ProfileUpdate(ProfileRead):
+    def call(self, client, user_token):
+        user, token = user_token[:2]
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+        return client.patch(
+            reverse(self.url_name),
+            {"first_name": f"bench{user.pk}"},
+            format="json",
+        )
+
+
+class AsyncAPIClient(AsyncClient):
+    """AsyncClient taking the APIClient arguments scenarios pass.
+
+    Calls return coroutines sending the request through the ASGI handler.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._credentials = {}
+
+    def credentials(self, **headers):
+        self._credentials = headers
+
+    def headers(self, extra: dict) -> dict:
+        # ASGI scopes carry header names, not WSGI environ keys.
+        return {
+            key[5:].lower().replace("_", "-"): value
+            for key, value in {**self._credentials, **extra}.items()
+            if key.startswith("HTTP_")
+        }
+
+    def get(self, path, data=None, **extra):
+        return super().get(path, data, **self.headers(extra))
+
+    def post(self, path, data=None, format=None, **extra):
+        return super().post(
+            path,
+            json.dumps(data),
+            content_type="application/json",
+            **self.headers(extra),
+        )
+
+    def patch(self, path, data=None, format=None, **extra):
+        return super().patch(
+            path,
+            json.dumps(data),
+            content_type="application/json",
+            **self.headers(extra),
+        )
+
+
+SCENARIOS = {
+    "signup": SignUp,
+    "password_login": PasswordLogin,
+    "otp_request": OtpRequest,
+    "otp_burst": OtpBurst,
+    "otp_auth": OtpAuth,
+    "token_refresh": TokenRefresh,
+    "profile_read": ProfileRead,
+    "profile_repeat": ProfileRepeat,
+    "profile_revalidate": ProfileRevalidate,
+    "profile_update": ProfileUpdate,
+}
+
+
+def mean_or_none(values, digits=None):
+    """Mean of values, None when any of them was not measured."""
+    values = list(values)
+    if None in values:
+        return None
+    return round(statistics.mean(values), digits)
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            check=True,
+            text=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BenchmarkCommand):
+    help = (
+        "Benchmark auth API scenarios in process: throughput, latency"
+        " percentiles and database queries per request, saved as JSON."
+        " Runs against a throwaway test database with throttling off and"
+        " emails sent eagerly to the in-memory mail backend."
+    )
+    # Test database ids would collide with data of real users in the last
+    # login buffer, otp store and profile cache.
+    uses_database = True
+    # Held while a request is handled, see --server-threads.
+    server = nullcontext()
+    baseline = None
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument(
+            "--scenarios",
+            nargs="+",
+            choices=SCENARIOS,
+            default=list(SCENARIOS),
+        )
+        parser.add_argument(
+            "--requests",
+            type=int,
+            default=200,
+            help="Measured requests per scenario.",
+        )
+        parser.add_argument(
+            "--warmup",
+            type=int,
+            default=10,
+            help="Unmeasured requests per scenario run first.",
+        )
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=4,
+            help="Threads sending requests at once.",
+        )
+        parser.add_argument(
+            "--output",
+            type=Path,
+            help="Result file, benchmark-results/<commit>.json by default.",
+        )
+        parser.add_argument(
+            "--compare",
+            type=Path,
+            help="Earlier result file to print the difference against.",
+        )
+        parser.add_argument(
+            "--background",
+            choices=SCENARIOS,
+            help="Scenario sent in a loop while every scenario is measured.",
+        )
+        parser.add_argument(
+            "--background-concurrency",
+            type=int,
+            default=4,
+            help="Threads sending background requests.",
+        )
+        parser.add_argument(
+            "--server-threads",
+            type=int,
+            default=settings.GUNICORN_THREADS,
+            help=(
+                "Requests handled at once, like the request threads of one"
+                " gunicorn worker, further ones wait and the wait counts in"
+                " their latency. 0 handles every request at once. Default"
+                " GUNICORN_THREADS."
+            ),
+        )
+        parser.add_argument(
+            "--asgi",
+            action="store_true",
+            help=(
+                "Send requests through the ASGI handler from asyncio tasks,"
+                " the views set by ASYNC_API run natively when async."
+                " Queries are not counted."
+            ),
+        )
+
+    def validate(self, options):
+        if options["requests"] < 1 or options["concurrency"] < 1:
+            raise CommandError("--requests and --concurrency must be >= 1")
+        if options["background_concurrency"] < 1:
+            raise CommandError("--background-concurrency must be >= 1")
+        if options["server_threads"] < 0:
+            raise CommandError("--server-threads must be >= 0")
+        if options["asgi"] and options["background"]:
+            raise CommandError("--asgi cannot be combined with --background")
+
+    def measure(self, options):
+        if options["server_threads"] and not options["asgi"]:
+            self.server = RequestThreads(options["server_threads"])
+        if options["compare"]:
+            self.baseline = json.loads(options["compare"].read_text())
+
+        # Eager tasks send OTP emails in the request to the locmem backend.
+        task_always_eager = current_app.conf.task_always_eager
+        current_app.conf.task_always_eager = True
+        try:
+            with override_settings(
+                ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"],
+                EMAIL_BACKEND="django.core.mail.backends.locmem.EmailBackend",
+                REST_FRAMEWORK={
+                    **settings.REST_FRAMEWORK,
+                    "DEFAULT_THROTTLE_RATES": {},
+                },
+            ):
+                scenarios = {
+                    name: self.run_scenario(name, options)
+                    for name in options["scenarios"]
+                }
+        finally:
+            current_app.conf.task_always_eager = task_always_eager
+
+        commit = git_commit()
+        result = {
+            "commit": commit,
+            "created": timezone.now().isoformat(),
+            "database": connection.vendor,
+            "handler": "asgi" if options["asgi"] else "wsgi",
+            "async_api": settings.ASYNC_API,
+            "requests": options["requests"],
+            "concurrency": options["concurrency"],
+            "server_threads": options["server_threads"],
+            "scenarios": scenarios,
+        }
+        self.output = options["output"] or Path(
+            "benchmark-results", f"{commit or 'unknown'}.json"
+        )
+        self.output.parent.mkdir(parents=True, exist_ok=True)
+        self.output.write_text(json.dumps(result, indent=2))
+        return result
+
+    def create_users(self, name: str, count: int) -> list:
+        password = make_password(PASSWORD)
+        stamp = time.monotonic_ns()
+        User.objects.bulk_create(
+            User(
+                email=f"{name}-{stamp}-{i}@example.com",
+                password=password,
+                is_active=True,
+            )
+            for i in range(count)
+        )
+        return list(
+            User.objects.filter(
+                email__startswith=f"{name}-{stamp}-"
+            ).order_by("pk")
+        )
+
+    def run_scenario(self, name: str, options) -> dict:
+        scenario = SCENARIOS[name]()
+        warmup, count = options["warmup"], options["requests"]
+        args = scenario.prepare(self.create_users(name, warmup + count))
+        run_requests = self.run_requests
+        if options["asgi"]:
+            run_requests = self.run_requests_async
+        run_requests(scenario, args[:warmup], options["concurrency"])
+        background = None
+        if options["background"]:
+            background = self.start_background(
+                options["background"], count, options["background_concurrency"]
+            )
+        emails = len(getattr(mail, "outbox", []))
+        opened = []
+
+        def count_connection(sender, connection, **kwargs):
+            opened.append(connection.alias)
+
+        connection_created.connect(count_connection)
+        try:
+            started = time.perf_counter()
+            samples = run_requests(
+                scenario, args[warmup:], options["concurrency"]
+            )
+            elapsed = time.perf_counter() - started
+        finally:
+            connection_created.disconnect(count_connection)
+        emails = len(getattr(mail, "outbox", [])) - emails
+        if background is not None:
+            background = self.stop_background(background, elapsed)
+
+        stats = self.latency_stats(scenario, samples, elapsed)
+        stats.update({
+            "queries_per_request": mean_or_none(
+                (sample[2] for sample in samples), 2
+            ),
+            "writes_per_request": mean_or_none(
+                (sample[3] for sample in samples), 2
+            ),
+            "connections_per_request": round(len(opened) / count, 2),
+            "emails_per_request": round(emails / count, 2),
+            "bytes_per_response": round(
+                statistics.mean(sample[4] for sample in samples)
+            ),
+        })
+        if background is not None:
+            stats["background"] = background
+        return stats
+
+    @staticmethod
+    def latency_stats(scenario, samples: list, elapsed: float) -> dict:
+        latencies = sorted(sample[0] for sample in samples)
+        errors = sum(
+            sample[1] != scenario.expected_status for sample in samples
+        )
+        return {
+            "requests": len(samples),
+            "errors": errors,
+            "throughput": round(len(samples) / elapsed, 1),
+            "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+            "p95_ms": round(percentile(latencies, 0.95) * 1000, 2),
+            "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+        }
+
+    def start_background(self, name: str, count: int, concurrency: int):
+        """Send name requests in a loop from threads until stopped."""
+        scenario = SCENARIOS[name]()
+        args = scenario.prepare(self.create_users(f"bg-{name}", count))
+        stop = threading.Event()
+        samples = []
+
+        def loop(offset):
+            client = APIClient()
+            try:
+                index = offset
+                while not stop.is_set():
+                    started = time.perf_counter()
+                    with self.server:
+                        response = scenario.call(
+                            client, args[index % len(args)]
+                        )
+                    samples.append(
+                        (time.perf_counter() - started, response.status_code)
+                    )
+                    index += concurrency
+            finally:
+                connection.close()
+
+        threads = [
+            threading.Thread(target=loop, args=(i,), daemon=True)
+            for i in range(concurrency)
+        ]
+        for thread in threads:
+            thread.start()
+        return name, scenario, stop, threads, samples
+
+    def stop_background(self, background, elapsed: float) -> dict:
+        name, scenario, stop, threads, samples = background
+        stop.set()
+        for thread in threads:
+            thread.join()
+        if not samples:
+            return {"scenario": name, "requests": 0}
+        return {
+            "scenario": name,
+            **self.latency_stats(scenario, samples, elapsed),
+        }
+
+    def run_requests(self, scenario, args, concurrency: int) -> list:
+        """Send requests, return latency, status, queries, writes, bytes."""
+        local = threading.local()
+
+        def send(arg):
+            if not hasattr(local, "client"):
+                local.client = APIClient()
+            counter = WriteCounter()
+            started = time.perf_counter()
+            with self.server, connection.execute_wrapper(counter):
+                response = scenario.call(local.client, arg)
+                latency = time.perf_counter() - started
+                # Like request_finished in a server, the test client skips it.
+                close_old_connections()
+            return (
+                latency,
+                response.status_code,
+                counter.count,
+                counter.writes,
+                len(response.content),
+            )
+
+        if concurrency == 1:
+            return [send(arg) for arg in args]
+
+        samples = []
+
+        def send_all(offset):
+            try:
+                samples.extend(send(arg) for arg in args[offset::concurrency])
+            finally:
+                # Worker threads open their own connections.
+                connection.close()
+
+        threads = [
+            threading.Thread(target=send_all, args=(i,))
+            for i in range(concurrency)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return samples
+
+    def run_requests_async(self, scenario, args, concurrency: int) -> list:
+        """Send requests from concurrency asyncio tasks, like run_requests.
+
+        Sync code of the views runs in asgiref executor threads the query
+        counter cannot see, so queries and writes are None.
+        """
+
+        async def worker(offset):
+            client = AsyncAPIClient()
+            samples = []
+            for arg in args[offset::concurrency]:
+                started = time.perf_counter()
+                response = await scenario.call(client, arg)
+                samples.append((
+                    time.perf_counter() - started,
+                    response.status_code,
+                    None,
+                    None,
+                    len(response.content),
+                ))
+            return samples
+
+        async def send_all():
+            return await asyncio.gather(
+                *(worker(offset) for offset in range(concurrency))
+            )
+
+        return [
+            sample for samples in asyncio.run(send_all()) for sample in samples
+        ]
+
+    def report(self, results):
+        baseline = self.baseline
+        self.stdout.write(
+            f"{'scenario':<20}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}"
+            f"{'p99 ms':>9}{'queries':>9}{'writes':>8}{'conns':>7}"
+            f"{'emails':>8}"
+            f"{'bytes':>8}{'errors':>8}"
+        )
+        for name, stats in results["scenarios"].items():
+            self.stdout.write(
+                f"{name:<20}{stats['throughput']:>9}{stats['p50_ms']:>9}"
+                f"{stats['p95_ms']:>9}{stats['p99_ms']:>9}"
+                f"{self.shown(stats['queries_per_request']):>9}"
+                f"{self.shown(stats['writes_per_request']):>8}"
+                f"{stats['connections_per_request']:>7}"
+                f"{stats['emails_per_request']:>8}"
+                f"{stats['bytes_per_response']:>8}{stats['errors']:>8}"
+            )
+            background = stats.get("background")
+            if background and background["requests"]:
+                self.stdout.write(
+                    f"{'  + ' + background['scenario']:<20}"
+                    f"{background['throughput']:>9}{background['p50_ms']:>9}"
+                    f"{background['p95_ms']:>9}{background['p99_ms']:>9}"
+                    f"{'':>40}{background['errors']:>8}"
+                )
+            before = (baseline or {}).get("scenarios", {}).get(name)
+            if before:
+                self.stdout.write(
+                    f"{'  vs ' + str(baseline['commit']):<20}"
+                    f"{self.change(before, stats, 'throughput'):>9}"
+                    f"{self.change(before, stats, 'p50_ms'):>9}"
+                    f"{self.change(before, stats, 'p95_ms'):>9}"
+                    f"{self.change(before, stats, 'p99_ms'):>9}"
+                )
+        self.stdout.write(
+            self.style.SUCCESS(f"Saved results to {self.output}")
+        )
+
+    @staticmethod
+    def shown(value) -> str:
+        return "-" if value is None else str(value)
+
+    @staticmethod
+    def change(before: dict, after: dict, key: str) -> str:
+        if not before[key]:
+            return "-"
+        return f"{(after[key] - before[key]) / before[key]:+.0%}"
@@ -0,0 +1,126 @@
+import random
+import time
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import CommandError
+from django.db import connection, models
+
+from benchmarks.harness import BenchmarkCommand, percentile, seed_users
+
+User = get_user_model()
+
+# The plain index on email dropped by users migration 0004.
+DUPLICATE_INDEX = models.Index(
+    fields=["email"], name="users_user_email_6f2530_idx"
+)
+
+
+class Command(BenchmarkCommand):
+    help = (
+        "Measure signup inserts per second and email lookup latency on a"
+        " throwaway test database seeded with --users users, with the"
+        " unique email index alone and with the dropped duplicate index"
+        " added back. Case-insensitive iexact lookups, which no index"
+        " serves, are timed for comparison."
+    )
+    columns = (
+        ("indexes", "indexes", ""),
+        ("signups_per_s", "signups/s", ".0f"),
+        ("lookup_p50_us", "lookup p50 us", ".0f"),
+        ("lookup_p99_us", "p99 us", ".0f"),
+    )
+    # Signups bump profile versions and fill the email filter in Redis.
+    uses_database = True
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument(
+            "--users",
+            type=int,
+            default=10000000,
+            help="Users seeded before measuring.",
+        )
+        parser.add_argument(
+            "--signups",
+            type=int,
+            default=2000,
+            help="Users inserted one by one per index setup.",
+        )
+        parser.add_argument(
+            "--lookups",
+            type=int,
+            default=5000,
+            help="Users looked up by exact email per index setup.",
+        )
+        parser.add_argument(
+            "--iexact-lookups",
+            type=int,
+            default=5,
+            help="Users looked up by iexact email, each scans the table.",
+        )
+
+    def validate(self, options):
+        if options["users"] < 1:
+            raise CommandError("--users must be >= 1")
+        if options["signups"] < 1 or options["lookups"] < 1:
+            raise CommandError("--signups and --lookups must be >= 1")
+
+    def measure(self, options):
+        count = options["users"]
+        started = time.perf_counter()
+        seed_users(count, "lookup")
+        self.stdout.write(
+            f"Seeded {count} users in {time.perf_counter() - started:.1f}s"
+            f" on {connection.vendor}"
+        )
+        emails = [
+            f"lookup-{random.randint(1, count)}@example.com"
+            for _ in range(options["lookups"])
+        ]
+        signups = options["signups"]
+        rows = [self.measure_setup("unique", signups, emails)]
+        with connection.schema_editor() as editor:
+            editor.add_index(User, DUPLICATE_INDEX)
+        try:
+            rows.append(self.measure_setup("unique + plain", signups, emails))
+        finally:
+            with connection.schema_editor() as editor:
+                editor.remove_index(User, DUPLICATE_INDEX)
+
+        latencies = self.lookups(
+            [email.upper() for email in emails[: options["iexact_lookups"]]],
+            "email__iexact",
+        )
+        rows.append(self.row("iexact, no index", None, latencies))
+        return rows
+
+    def measure_setup(self, name: str, signups: int, emails: list) -> dict:
+        password = make_password("benchpassword")
+        started = time.perf_counter()
+        for _ in range(signups):
+            # Autocommitted one by one like signup requests.
+            User.objects.create(
+                email=f"signup-{time.monotonic_ns()}@example.com",
+                password=password,
+            )
+        rate = signups / (time.perf_counter() - started)
+        return self.row(name, rate, self.lookups(emails, "email"))
+
+    @staticmethod
+    def row(name: str, rate, latencies: list) -> dict:
+        return {
+            "indexes": name,
+            "signups_per_s": rate,
+            "lookup_p50_us": percentile(latencies, 0.50) * 1e6,
+            "lookup_p99_us": percentile(latencies, 0.99) * 1e6,
+        }
+
+    @staticmethod
+    def lookups(emails: list, lookup: str) -> list:
+        latencies = []
+        for email in emails:
+            started = time.perf_counter()
+            User.objects.get(**{lookup: email})
+            latencies.append(time.perf_counter() - started)
+        return sorted(latencies)
@@ -0,0 +1,100 @@
+import csv
+import tempfile
+import time
+from pathlib import Path
+
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from django.core.management.base import CommandError
+
+from api.management.commands.import_users import Command as ImportUsers
+from benchmarks.harness import BenchmarkCommand
+
+PASSWORD = "benchpassword"
+
+
+class Command(BenchmarkCommand):
+    help = (
+        "Generate a CSV of --rows users, the first --raw-passwords of them"
+        " with raw passwords and the rest with password hashes, and run"
+        " import_users on it against a throwaway test database. import_users"
+        " reports rows/s and peak memory."
+    )
+    # Imported emails would otherwise reach the live email filter.
+    uses_database = True
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument(
+            "--rows",
+            type=int,
+            default=1000000,
+            help="Users in the generated file.",
+        )
+        parser.add_argument(
+            "--raw-passwords",
+            type=int,
+            default=0,
+            help="Rows with a raw password hashed by the import.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Rows validated, hashed and inserted at once.",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=None,
+            help="Processes hashing raw passwords, CPU count by default.",
+        )
+
+    def validate(self, options):
+        if options["rows"] < 1:
+            raise CommandError("--rows must be >= 1")
+
+    def measure(self, options):
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory, "users.csv")
+            started = time.perf_counter()
+            self.write_file(path, options["rows"], options["raw_passwords"])
+            self.stdout.write(
+                f"Generated {options['rows']} rows,"
+                f" {path.stat().st_size // 1024 // 1024} MiB, in"
+                f" {time.perf_counter() - started:.1f}s"
+            )
+            importer = ImportUsers(stdout=self.stdout, stderr=self.stderr)
+            call_command(
+                importer,
+                path,
+                batch_size=options["batch_size"],
+                workers=options["workers"],
+            )
+        return {
+            "processed": importer.processed,
+            "created": importer.created,
+            "duplicates": importer.duplicates,
+            "skipped": importer.skipped,
+            "invalid": importer.invalid,
+        }
+
+    def report(self, results):
+        """import_users has written its own summary."""
+
+    @staticmethod
+    def write_file(path: Path, rows: int, raw_passwords: int):
+        password_hash = make_password(PASSWORD)
+        with open(path, "w", newline="", encoding="utf-8") as file:
+            writer = csv.writer(file)
+            writer.writerow([
+                "email", "first_name", "last_name", "password", "password_hash"
+            ])
+            for i in range(rows):
+                if i < raw_passwords:
+                    passwords = [PASSWORD, ""]
+                else:
+                    passwords = ["", password_hash]
+                writer.writerow(
+                    [f"import-{i}@example.com", "First", "Last", *passwords]
+                )
@@ -0,0 +1,58 @@
+import time
+import uuid
+
+import jwt
+from django.conf import settings
+
+from api.tokens import ASYMMETRIC_ALGORITHMS, generate_private_key
+from benchmarks.harness import BenchmarkCommand
+
+
+class Command(BenchmarkCommand):
+    help = "Measure JWT sign and verify time for every supported algorithm."
+    columns = (
+        ("algorithm", "algorithm", ""),
+        ("sign_us", "sign, us", ".1f"),
+        ("verify_us", "verify, us", ".1f"),
+    )
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument("--iterations", type=int, default=2000)
+
+    def measure(self, options):
+        iterations = options["iterations"]
+        now = int(time.time())
+        payload = {
+            "token_type": "access",
+            "exp": now + 3600,
+            "iat": now,
+            "jti": uuid.uuid4().hex,
+            "user_id": 1,
+        }
+        rows = []
+        for algorithm in ["HS256", *sorted(ASYMMETRIC_ALGORITHMS)]:
+            if algorithm == "HS256":
+                signing_key = verifying_key = settings.SECRET_KEY
+            else:
+                signing_key = generate_private_key(algorithm)
+                verifying_key = signing_key.public_key()
+
+            started = time.perf_counter()
+            for _ in range(iterations):
+                token = jwt.encode(payload, signing_key, algorithm=algorithm)
+            sign = (time.perf_counter() - started) / iterations
+
+            started = time.perf_counter()
+            for _ in range(iterations):
+                jwt.decode(token, verifying_key, algorithms=[algorithm])
+            verify = (time.perf_counter() - started) / iterations
+
+            rows.append(
+                {
+                    "algorithm": algorithm,
+                    "sign_us": sign * 1e6,
+                    "verify_us": verify * 1e6,
+                }
+            )
+        return rows
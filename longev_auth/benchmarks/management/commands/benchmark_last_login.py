@@ -0,0 +1,130 @@
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import CommandError
+from django.db import connection
+from django.utils import timezone
+
+from api.last_login import LastLoginBuffer, get_last_login_buffer
+from benchmarks.harness import (
+    DOWN_REDIS_URL,
+    BenchmarkCommand,
+    WriteCounter,
+    seed_users,
+)
+
+User = get_user_model()
+
+
+def wal_position():
+    """Bytes in the write-ahead log so far, None if it cannot be read."""
+    if connection.vendor == "postgresql":
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_current_wal_lsn() - '0/0'::pg_lsn")
+            return int(cursor.fetchone()[0])
+    if connection.vendor != "sqlite":
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute("PRAGMA journal_mode")
+        if cursor.fetchone()[0] != "wal":
+            return None
+    # The log file is created by the first write.
+    wal = Path(f"{connection.settings_dict['NAME']}-wal")
+    return wal.stat().st_size if wal.exists() else 0
+
+
+class Command(BenchmarkCommand):
+    help = (
+        "Measure login time writes on a throwaway test database, --users"
+        " users logging in --devices times each: a full row save per login"
+        " as before, the one column update written while Redis is down, and"
+        " the Redis buffer flushed in batches afterwards. Reports logins/s,"
+        " write statements and write-ahead log bytes (SQLite in WAL mode or"
+        " PostgreSQL)."
+    )
+    columns = (
+        ("writes", "writes", ""),
+        ("logins_per_s", "logins/s", ".0f"),
+        ("flush_s", "flush s", ".2f"),
+        ("statements", "writes", ""),
+        ("wal_kib", "WAL KiB", ".0f"),
+        ("wal_bytes_per_login", "WAL B/login", ".0f"),
+    )
+    # Saves bump profile versions, the buffer fills a Redis hash.
+    uses_database = True
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument(
+            "--users",
+            type=int,
+            default=2000,
+            help="Users seeded and logging in.",
+        )
+        parser.add_argument(
+            "--devices",
+            type=int,
+            default=10,
+            help="Logins of every user, e.g. from several devices.",
+        )
+
+    def validate(self, options):
+        if options["users"] < 1 or options["devices"] < 1:
+            raise CommandError("--users and --devices must be >= 1")
+
+    def measure(self, options):
+        seed_users(options["users"], "login")
+        users = list(User.objects.filter(email__startswith="login-"))
+        logins = users * options["devices"]
+        if connection.vendor == "sqlite":
+            with connection.cursor() as cursor:
+                cursor.execute("PRAGMA journal_mode=WAL")
+                cursor.fetchall()
+                # Without checkpoints the log only grows by what is written.
+                cursor.execute("PRAGMA wal_autocheckpoint=0")
+        buffer = get_last_login_buffer()
+        # Redis is down for this one, so it writes every login right away.
+        fallback = LastLoginBuffer(DOWN_REDIS_URL)
+
+        def full_save(user):
+            user.save()
+
+        self.stdout.write(
+            f"{connection.vendor}, {len(users)} users,"
+            f" {len(logins)} logins"
+        )
+        rows = []
+        for name, record, flush in (
+            ("full_save", full_save, None),
+            ("fallback", fallback.record, None),
+            ("buffered", buffer.record, buffer.flush),
+        ):
+            wal = wal_position()
+            counter = WriteCounter()
+            with connection.execute_wrapper(counter):
+                started = time.perf_counter()
+                for user in logins:
+                    user.last_login = timezone.now()
+                    record(user)
+                elapsed = time.perf_counter() - started
+                started = time.perf_counter()
+                if flush is not None:
+                    flush(settings.LAST_LOGIN_BATCH_SIZE)
+                flushed = time.perf_counter() - started
+            if wal is not None:
+                wal = wal_position() - wal
+            rows.append(
+                {
+                    "writes": name,
+                    "logins_per_s": len(logins) / elapsed,
+                    "flush_s": flushed,
+                    "statements": counter.writes,
+                    "wal_kib": None if wal is None else wal / 1024,
+                    "wal_bytes_per_login": (
+                        None if wal is None else wal / len(logins)
+                    ),
+                }
+            )
+        return rows
@@ -0,0 +1,111 @@
+import os
+import tempfile
+import time
+from unittest.mock import patch
+
+from django.core.management.base import CommandError
+from django.http import HttpRequest, HttpResponse
+from prometheus_client import CollectorRegistry, Counter, Histogram, values
+
+from api import metrics
+from api.middleware import QueryCountMiddleware
+from benchmarks.harness import BenchmarkCommand
+
+
+class Command(BenchmarkCommand):
+    help = (
+        "Measure the cost of the auth metrics per call: timing a block into"
+        " a histogram, observing a value, incrementing a labelled and a"
+        " bound counter, and QueryCountMiddleware around a bare view. Runs"
+        " with in-process values and with the mmap files of multiprocess"
+        " mode used under gunicorn."
+    )
+    columns = (
+        ("operation", "operation", ""),
+        ("single_ns", "single ns", ".0f"),
+        ("multi_ns", "multi ns", ".0f"),
+    )
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument(
+            "--calls",
+            type=int,
+            default=200000,
+            help="Calls per operation.",
+        )
+
+    def validate(self, options):
+        if options["calls"] < 1:
+            raise CommandError("--calls must be >= 1")
+
+    def measure(self, options):
+        count = options["calls"]
+        single = self.time_operations(count)
+        with tempfile.TemporaryDirectory() as directory, patch.dict(
+            os.environ, {"PROMETHEUS_MULTIPROC_DIR": directory}
+        ), patch.object(values, "ValueClass", values.MultiProcessValue()):
+            multi = self.time_operations(count)
+        return [
+            {
+                "operation": name,
+                "single_ns": single[name],
+                "multi_ns": multi[name],
+            }
+            for name in single
+        ]
+
+    def time_operations(self, count: int) -> dict:
+        """Nanoseconds per call of every operation on fresh metrics."""
+        registry = CollectorRegistry()
+        histogram = Histogram(
+            "bench_seconds",
+            "Benchmark.",
+            buckets=metrics.TIME_BUCKETS,
+            registry=registry,
+        )
+        counter = Counter(
+            "bench_requests",
+            "Benchmark.",
+            ["scope", "result"],
+            registry=registry,
+        )
+        bound = counter.labels("bench", "bound")
+        view_queries = Histogram(
+            "bench_view_db_queries",
+            "Benchmark.",
+            ["view"],
+            buckets=metrics.VIEW_DB_QUERIES._upper_bounds[:-1],
+            registry=registry,
+        )
+        request, response = HttpRequest(), HttpResponse()
+        request.resolver_match = None
+
+        def view(request):
+            return response
+
+        middleware = QueryCountMiddleware(view)
+
+        def histogram_time():
+            with histogram.time():
+                pass
+
+        operations = {
+            "histogram_time": histogram_time,
+            "histogram_observe": lambda: histogram.observe(0.003),
+            "labelled_inc": lambda: counter.labels("bench", "allowed").inc(),
+            "bound_inc": bound.inc,
+            "bare_view": lambda: view(request),
+            "middleware_view": lambda: middleware(request),
+        }
+        timings = {}
+        with patch.object(metrics, "VIEW_DB_QUERIES", view_queries):
+            for name, operation in operations.items():
+                started = time.perf_counter_ns()
+                for _ in range(count):
+                    operation()
+                timings[name] = (time.perf_counter_ns() - started) / count
+        timings["middleware"] = (
+            timings.pop("middleware_view") - timings.pop("bare_view")
+        )
+        return timings
@@ -0,0 +1,194 @@
+import os
+import threading
+import time
+
+from celery import current_app
+from celery.contrib.testing.worker import start_worker
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.management.base import CommandError
+from django.test.utils import override_settings
+
+from api.mail import mail_connection
+from api.tasks import send_email
+from api.utils import send_otp_email
+from benchmarks.harness import BenchmarkCommand, percentile
+
+User = get_user_model()
+
+# Delivery time of every benchmark email by recipient, set by the backend.
+_delivered = {}
+_delivered_lock = threading.Lock()
+
+
+class DelayedEmailBackend(EmailBackend):
+    """In-memory mail backend taking smtp_delay seconds per message."""
+
+    smtp_delay = 0.0
+
+    def send_messages(self, messages):
+        time.sleep(self.smtp_delay * len(messages))
+        now = time.perf_counter()
+        with _delivered_lock:
+            for message in messages:
+                _delivered[message.to[0]] = now
+        return len(messages)
+
+
+class Command(BenchmarkCommand):
+    help = (
+        "Measure enqueue to delivery latency of OTP emails sent while a"
+        " backlog of other emails waits on the default queue. Runs an"
+        " in-process worker against CELERY_BROKER_URL, once with OTP"
+        " emails sent like other tasks and once on CELERY_OTP_QUEUE with"
+        " CELERY_OTP_PRIORITY."
+    )
+    columns = (
+        ("routing", "routing", ""),
+        ("p50_ms", "p50 ms", ".1f"),
+        ("p95_ms", "p95 ms", ".1f"),
+        ("max_ms", "max ms", ".1f"),
+        ("dropped", "dropped", ""),
+    )
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument(
+            "--backlog",
+            type=int,
+            default=500,
+            help="Other emails queued before the OTP emails.",
+        )
+        parser.add_argument(
+            "--otps",
+            type=int,
+            default=50,
+            help="OTP emails sent after the backlog.",
+        )
+        parser.add_argument(
+            "--smtp-ms",
+            type=float,
+            default=20,
+            help="Simulated SMTP time of one email.",
+        )
+        parser.add_argument(
+            "--otp-lifetime",
+            type=int,
+            default=settings.OTP_LIFETIME,
+            help="Seconds after which queued OTP emails are dropped.",
+        )
+
+    def validate(self, options):
+        if options["otps"] < 1:
+            raise CommandError("--otps must be >= 1")
+
+    def measure(self, options):
+        DelayedEmailBackend.smtp_delay = options["smtp_ms"] / 1000
+        rows = []
+        for routing in ("shared", "otp_queue"):
+            # Fresh queue names, a producer does not declare a queue twice.
+            prefix = f"benchmark-{os.getpid()}-{routing}"
+            default_queue, otp_queue = f"{prefix}-celery", f"{prefix}-otp"
+            if routing == "otp_queue":
+                route = (otp_queue, settings.CELERY_OTP_PRIORITY)
+            else:
+                route = (default_queue, settings.CELERY_TASK_DEFAULT_PRIORITY)
+            latencies, dropped = self.deliver(
+                options, default_queue, otp_queue, route
+            )
+            rows.append(self.row(routing, latencies, dropped))
+        return rows
+
+    def deliver(self, options, default_queue, otp_queue, route) -> tuple:
+        """Return delivery latencies and dropped count of OTP emails."""
+        app = current_app
+        _delivered.clear()
+        queue, priority = route
+        with override_settings(
+            EMAIL_BACKEND=f"{__name__}.DelayedEmailBackend",
+            CELERY_OTP_QUEUE=queue,
+            CELERY_OTP_PRIORITY=priority,
+            OTP_LIFETIME=options["otp_lifetime"],
+        ):
+            # The worker process connection was opened with the old backend.
+            mail_connection.close()
+            for i in range(options["backlog"]):
+                send_email.apply_async(
+                    kwargs=self.email_kwargs(f"backlog-{i}@example.com"),
+                    queue=default_queue,
+                )
+            sent_at = {}
+            for i in range(options["otps"]):
+                user = User(
+                    email=f"otp-{i}@example.com",
+                    first_name="first",
+                    last_name="last",
+                )
+                sent_at[user.email] = time.perf_counter()
+                send_otp_email(user, "123456")
+
+            with start_worker(
+                app,
+                # One process sends over one SMTP connection at a time.
+                pool="solo",
+                queues=[otp_queue, default_queue],
+                perform_ping_check=False,
+                shutdown_timeout=60,
+            ):
+                self.wait_delivered(
+                    sent_at, options["backlog"], options["otp_lifetime"]
+                )
+            mail_connection.close()
+        with app.connection_for_write() as connection:
+            for name in (default_queue, otp_queue):
+                bound = app.amqp.queues[name](connection.default_channel)
+                # Declared so the channel knows the bindings to remove.
+                bound.declare()
+                bound.delete()
+
+        latencies = [
+            _delivered[email] - started
+            for email, started in sent_at.items()
+            if email in _delivered
+        ]
+        return latencies, len(sent_at) - len(latencies)
+
+    @staticmethod
+    def email_kwargs(email: str) -> dict:
+        return {
+            "subject": "benchmark",
+            "body": "backlog",
+            "from_email": None,
+            "to": [email],
+            "reply_to": ["noreply"],
+        }
+
+    @staticmethod
+    def wait_delivered(sent_at: dict, backlog: int, lifetime: int) -> None:
+        """Wait until every email was sent or OTP emails could expire."""
+        deadline = time.perf_counter() + lifetime + 5
+        while time.perf_counter() < deadline:
+            with _delivered_lock:
+                otps_done = all(email in _delivered for email in sent_at)
+                if otps_done and len(_delivered) >= backlog + len(sent_at):
+                    return
+            time.sleep(0.01)
+
+    @staticmethod
+    def row(routing: str, latencies: list, dropped: int) -> dict:
+        latencies.sort()
+        return {
+            "routing": routing,
+            **{
+                key: percentile(latencies, fraction) * 1000
+                if latencies
+                else None
+                for key, fraction in (
+                    ("p50_ms", 0.50),
+                    ("p95_ms", 0.95),
+                    ("max_ms", 1.0),
+                )
+            },
+            "dropped": dropped,
+        }
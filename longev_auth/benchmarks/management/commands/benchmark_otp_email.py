@@ -0,0 +1,119 @@
+import statistics
+import time
+from unittest.mock import patch
+
+from celery import current_app
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import CommandError
+from django.template import engines
+from django.template.loader import get_template
+from kombu.serialization import dumps
+
+from api.tasks import get_compiled_template, send_email
+from api.utils import send_otp_email
+from benchmarks.harness import BenchmarkCommand
+from core.constants import Messages
+
+User = get_user_model()
+
+TEMPLATE_NAME = "otp_auth_template.html"
+
+
+def render_in_request(user, otp) -> None:
+    """OTP email as sent before, rendered HTML in the task message."""
+    context = {"fullname": user.full_name, "email": user.email, "otp": otp}
+    send_email.apply_async(
+        kwargs={
+            "subject": Messages.OTP_EMAIL_SUBJECT,
+            "body": get_template(TEMPLATE_NAME).render(context),
+            "from_email": None,
+            "to": [user.email],
+            "reply_to": ["noreply"],
+            "content_subtype": "html",
+        },
+        queue=settings.CELERY_OTP_QUEUE,
+        priority=settings.CELERY_OTP_PRIORITY,
+        expires=settings.OTP_LIFETIME,
+    )
+
+
+class Command(BenchmarkCommand):
+    help = (
+        "Measure the OTP email work done in the request and the serialized"
+        " task message size, rendering the template in the request as"
+        " before against sending the context for the worker to render."
+        " Messages are serialized like Celery does but not published."
+    )
+    columns = (
+        ("path", "path", ""),
+        ("request_us", "request us", ".1f"),
+        ("bytes", "bytes", ".0f"),
+        ("worker_us", "worker us", ".1f"),
+    )
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument(
+            "--emails",
+            type=int,
+            default=5000,
+            help="Emails sent per path.",
+        )
+
+    def validate(self, options):
+        if options["emails"] < 1:
+            raise CommandError("--emails must be >= 1")
+
+    def measure(self, options):
+        count = options["emails"]
+        user = User(
+            email="first.last@example.com",
+            first_name="First",
+            last_name="Last",
+        )
+        messages, sizes = [], []
+
+        def publish(args=None, kwargs=None, **options):
+            _, _, body = dumps(
+                (args or [], kwargs or {}, {}),
+                serializer=current_app.conf.task_serializer,
+            )
+            messages.append(kwargs)
+            sizes.append(len(body))
+
+        loaders = engines["django"].engine.loaders
+        cached = any("cached" in str(loader) for loader in loaders)
+        self.stdout.write(
+            f"DEBUG={settings.DEBUG},"
+            f" {'cached' if cached else 'uncached'} template loader"
+        )
+        rows = []
+        for name, send in (
+            ("render_in_request", render_in_request),
+            ("context", send_otp_email),
+        ):
+            latencies = []
+            messages.clear()
+            sizes.clear()
+            with patch.object(send_email, "apply_async", publish):
+                for i in range(count):
+                    started = time.perf_counter()
+                    send(user, f"{i:06d}")
+                    latencies.append(time.perf_counter() - started)
+            started = time.perf_counter()
+            for kwargs in messages:
+                if kwargs.get("template_name"):
+                    get_compiled_template(kwargs["template_name"]).render(
+                        kwargs["context"]
+                    )
+            rendering = (time.perf_counter() - started) / count
+            rows.append(
+                {
+                    "path": name,
+                    "request_us": statistics.mean(latencies) * 1e6,
+                    "bytes": statistics.mean(sizes),
+                    "worker_us": rendering * 1e6,
+                }
+            )
+        return rows
@@ -0,0 +1,126 @@
+import math
+import secrets
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.management.base import CommandError
+
+from api.otp import generate_otp
+from benchmarks.harness import BenchmarkCommand
+
+# Normal quantile of the 0.1% upper tail, the chi-squared test level.
+Z_999 = 3.09
+
+
+def chi_squared_limit(df: int) -> float:
+    """Wilson-Hilferty approximation of the 99.9% chi-squared quantile."""
+    k = 2 / (9 * df)
+    return df * (1 - k + Z_999 * math.sqrt(k)) ** 3
+
+
+class Command(BenchmarkCommand):
+    help = (
+        "Measure otp code generation throughput against drawing every"
+        " character with secrets.choice, and chi-squared test that every"
+        " position of the generated codes is uniform over the alphabet."
+    )
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument(
+            "--codes",
+            type=int,
+            default=200000,
+            help="Codes generated per measurement.",
+        )
+        parser.add_argument(
+            "--length",
+            type=int,
+            default=settings.OTP_LENGTH,
+            help="Code length, OTP_LENGTH by default.",
+        )
+        parser.add_argument(
+            "--alphabet",
+            default=settings.OTP_ALPHABET,
+            help="Code characters, OTP_ALPHABET by default.",
+        )
+
+    def validate(self, options):
+        if options["codes"] < 1:
+            raise CommandError("--codes must be >= 1")
+
+    def measure(self, options):
+        count, length = options["codes"], options["length"]
+        alphabet = options["alphabet"]
+
+        def per_character():
+            return "".join(secrets.choice(alphabet) for _ in range(length))
+
+        generators = []
+        codes = None
+        for name, generate in (
+            ("generate_otp", lambda: generate_otp(length, alphabet)),
+            ("per_character", per_character),
+        ):
+            started = time.perf_counter()
+            generated = [generate() for _ in range(count)]
+            elapsed = time.perf_counter() - started
+            codes = codes or generated
+            generators.append(
+                {
+                    "generator": name,
+                    "codes_per_s": count / elapsed,
+                    "us_per_code": elapsed / count * 1e6,
+                }
+            )
+
+        limit = chi_squared_limit(len(alphabet) - 1)
+        positions = [
+            {
+                "position": position,
+                "chi2": self.chi_squared(
+                    Counter(code[position] for code in codes),
+                    alphabet,
+                    count,
+                ),
+                "limit": limit,
+            }
+            for position in range(length)
+        ]
+        return {"generators": generators, "positions": positions}
+
+    def report(self, results):
+        self.write_table(
+            (
+                ("generator", "generator", ""),
+                ("codes_per_s", "codes/s", ".0f"),
+                ("us_per_code", "us/code", ".2f"),
+            ),
+            results["generators"],
+        )
+        self.write_table(
+            (
+                ("position", "position", ""),
+                ("chi2", "chi2", ".1f"),
+                ("limit", "limit", ".1f"),
+            ),
+            results["positions"],
+        )
+        failed = [
+            row["position"]
+            for row in results["positions"]
+            if row["chi2"] > row["limit"]
+        ]
+        if failed:
+            raise CommandError(
+                f"Positions {failed} are not uniform at the 0.1% level"
+            )
+        self.stdout.write(self.style.SUCCESS("Every position is uniform"))
+
+    @staticmethod
+    def chi_squared(counts: Counter, alphabet: str, total: int) -> float:
+        expected = total / len(alphabet)
+        return sum(
+            (counts[char] - expected) ** 2 / expected for char in alphabet
+        )
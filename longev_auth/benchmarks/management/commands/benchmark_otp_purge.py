@@ -0,0 +1,132 @@
+import time
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from api.models import OtpCode
+from benchmarks.harness import BenchmarkCommand, seed_users
+
+User = get_user_model()
+
+
+class DeleteTimer:
+    """Execute wrapper timing DELETE statements."""
+
+    def __init__(self):
+        self.durations = []
+
+    def __call__(self, execute, sql, params, many, context):
+        if not sql.lstrip().upper().startswith("DELETE"):
+            return execute(sql, params, many, context)
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.durations.append(time.perf_counter() - started)
+
+
+class Command(BenchmarkCommand):
+    help = (
+        "Measure purge_expired on a throwaway test database seeded with"
+        " --rows OTP codes, --expired percent of them expired. Every batch"
+        " size runs on a freshly seeded table and reports rows/s and the"
+        " longest delete statement, the longest time rows stay locked."
+        " Batch size 0 is one unbatched delete for comparison."
+    )
+    columns = (
+        ("batch", "batch", ""),
+        ("seed_s", "seed s", ".1f"),
+        ("deleted", "deleted", ""),
+        ("purge_s", "purge s", ".2f"),
+        ("rows_per_s", "rows/s", ".0f"),
+        ("deletes", "deletes", ""),
+        ("max_ms", "max ms", ".1f"),
+        ("left", "left", ""),
+    )
+    uses_database = True
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument(
+            "--rows",
+            type=int,
+            default=1000000,
+            help="OTP codes seeded, one per seeded user.",
+        )
+        parser.add_argument(
+            "--expired",
+            type=int,
+            default=90,
+            help="Percent of seeded codes already expired.",
+        )
+        parser.add_argument(
+            "--batch-sizes",
+            type=int,
+            nargs="+",
+            default=[1000, 10000, 0],
+            help="Rows deleted per statement, 0 deletes all at once.",
+        )
+
+    def validate(self, options):
+        if options["rows"] < 1:
+            raise CommandError("--rows must be >= 1")
+        if not 0 <= options["expired"] <= 100:
+            raise CommandError("--expired must be between 0 and 100")
+        if any(size < 0 for size in options["batch_sizes"]):
+            raise CommandError("--batch-sizes must be >= 0")
+
+    def measure(self, options):
+        started = time.perf_counter()
+        seed_users(options["rows"], "purge")
+        self.stdout.write(
+            f"Seeded {options['rows']} users in"
+            f" {time.perf_counter() - started:.1f}s on {connection.vendor}"
+        )
+        rows = []
+        for batch_size in options["batch_sizes"]:
+            started = time.perf_counter()
+            self.seed_codes(options["expired"])
+            seeded = time.perf_counter() - started
+            timer = DeleteTimer()
+            started = time.perf_counter()
+            with connection.execute_wrapper(timer):
+                if batch_size:
+                    deleted = OtpCode.objects.purge_expired(batch_size)
+                else:
+                    deleted, _ = OtpCode.objects.filter(
+                        exp_time__lt=timezone.now()
+                    ).delete()
+            elapsed = time.perf_counter() - started
+            rows.append(
+                {
+                    "batch": batch_size or "all",
+                    "seed_s": seeded,
+                    "deleted": deleted,
+                    "purge_s": elapsed,
+                    "rows_per_s": deleted / elapsed if elapsed else 0,
+                    "deletes": len(timer.durations),
+                    "max_ms": max(timer.durations, default=0) * 1000,
+                    "left": OtpCode.objects.count(),
+                }
+            )
+        return rows
+
+    def seed_codes(self, expired: int):
+        """Give every user a code, expired for expired percent of them."""
+        code, user = OtpCode._meta, User._meta
+        now = timezone.now()
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {code.db_table}")
+            cursor.execute(
+                f"INSERT INTO {code.db_table}"
+                f" ({code.get_field('user').column},"
+                f" {code.get_field('otp').column},"
+                f" {code.get_field('exp_time').column})"
+                f" SELECT {user.pk.column}, '123456', CASE"
+                f" WHEN {user.pk.column} %% 100 < %s THEN %s ELSE %s END"
+                f" FROM {user.db_table}",
+                [expired, now - timedelta(days=1), now + timedelta(days=1)],
+            )
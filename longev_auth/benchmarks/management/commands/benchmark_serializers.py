@@ -0,0 +1,105 @@
+import io
+import time
+
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from api.parsers import ORJSONParser
+from api.payloads import OtpAuthPayload, OtpRequestPayload, PasswordAuthPayload
+from api.renderers import ORJSONRenderer
+from api.serializers import (
+    OtpAuthSerializer,
+    OtpRequestSerializer,
+    PasswordAuthSerializer,
+    TokenSerializer,
+)
+from benchmarks.harness import BenchmarkCommand
+
+# Request payload, DRF serializer and its fast counterpart.
+CASES = {
+    "password_auth": (
+        {"email": "User@Example.com", "password": "password123"},
+        PasswordAuthSerializer,
+        PasswordAuthPayload,
+    ),
+    "otp_request": (
+        {"email": "User@Example.com"},
+        OtpRequestSerializer,
+        OtpRequestPayload,
+    ),
+    "otp_auth": (
+        {"email": "User@Example.com", "otp": "123456"},
+        OtpAuthSerializer,
+        OtpAuthPayload,
+    ),
+    "invalid": (
+        {"email": "", "password": None},
+        PasswordAuthSerializer,
+        PasswordAuthPayload,
+    ),
+}
+TOKEN = {"token": "a" * 220, "refresh": "b" * 220}
+
+
+class Command(BenchmarkCommand):
+    help = (
+        "Measure per request cost of parsing, validating and rendering the"
+        " auth payloads with the DRF serializers and the fast payloads."
+    )
+    columns = (
+        ("case", "case", ""),
+        ("drf_us", "drf, us", ".1f"),
+        ("fast_us", "fast, us", ".1f"),
+        ("speedup", "speedup, x", ".1f"),
+    )
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument("--iterations", type=int, default=20000)
+
+    def measure(self, options):
+        iterations = options["iterations"]
+        rows = []
+        for name, (data, serializer_class, payload_class) in CASES.items():
+            body = JSONRenderer().render(data)
+            drf = self.time_per_call(
+                iterations,
+                lambda: serializer_class(
+                    data=JSONParser().parse(io.BytesIO(body))
+                ).is_valid(),
+            )
+            fast = self.time_per_call(
+                iterations,
+                lambda: payload_class(
+                    data=ORJSONParser().parse(io.BytesIO(body))
+                ).is_valid(),
+            )
+            rows.append(self.row(name, drf, fast))
+
+        # Token responses are plain dicts, TokenSerializer only documents
+        # them, so rendering is the whole cost.
+        drf = self.time_per_call(
+            iterations,
+            lambda: JSONRenderer().render(TokenSerializer(TOKEN).data),
+        )
+        fast = self.time_per_call(
+            iterations, lambda: ORJSONRenderer().render(TOKEN)
+        )
+        rows.append(self.row("token_render", drf, fast))
+        return rows
+
+    @staticmethod
+    def time_per_call(iterations: int, func) -> float:
+        started = time.perf_counter()
+        for _ in range(iterations):
+            func()
+        return (time.perf_counter() - started) / iterations
+
+    @staticmethod
+    def row(name: str, drf: float, fast: float) -> dict:
+        return {
+            "case": name,
+            "drf_us": drf * 1e6,
+            "fast_us": fast * 1e6,
+            "speedup": drf / fast,
+        }
@@ -0,0 +1,201 @@
+import datetime
+import socketserver
+import ssl
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from cryptography.x509.oid import NameOID
+from django.core.mail import EmailMessage, get_connection
+from django.core.management.base import CommandError
+from django.test.utils import override_settings
+
+from api.mail import PersistentMailConnection
+from benchmarks.harness import BenchmarkCommand
+
+
+class SinkHandler(socketserver.StreamRequestHandler):
+    """SMTP session accepting and dropping every message."""
+
+    def reply(self, line: str):
+        time.sleep(self.server.reply_delay)
+        self.wfile.write(line.encode() + b"\r\n")
+
+    def handle(self):
+        self.reply("220 sink ESMTP")
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line[:4].upper()
+            if command == b"QUIT":
+                self.reply("221 Bye")
+                return
+            if command == b"DATA":
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+                while self.rfile.readline() not in (b".\r\n", b""):
+                    pass
+                self.server.received()
+                self.reply("250 OK")
+            else:
+                self.reply("250 OK")
+
+
+class SinkServer(socketserver.ThreadingTCPServer):
+    """Local SMTP stand-in, with implicit TLS when given ssl_context."""
+
+    daemon_threads = True
+
+    def __init__(self, ssl_context=None, reply_delay: float = 0.0):
+        super().__init__(("127.0.0.1", 0), SinkHandler)
+        self.ssl_context = ssl_context
+        self.reply_delay = reply_delay
+        self.messages = 0
+        self._lock = threading.Lock()
+
+    def get_request(self):
+        sock, address = super().get_request()
+        if self.ssl_context is not None:
+            sock = self.ssl_context.wrap_socket(sock, server_side=True)
+        return sock, address
+
+    def received(self):
+        with self._lock:
+            self.messages += 1
+
+
+def self_signed_context(directory: str) -> ssl.SSLContext:
+    """Server TLS context with a fresh self-signed RSA 2048 certificate."""
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "localhost")])
+    now = datetime.datetime.utcnow()
+    certificate = (
+        x509.CertificateBuilder()
+        .subject_name(name)
+        .issuer_name(name)
+        .public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now)
+        .not_valid_after(now + datetime.timedelta(days=1))
+        .sign(key, hashes.SHA256())
+    )
+    cert_path = Path(directory, "cert.pem")
+    key_path = Path(directory, "key.pem")
+    cert_path.write_bytes(certificate.public_bytes(serialization.Encoding.PEM))
+    key_path.write_bytes(
+        key.private_bytes(
+            serialization.Encoding.PEM,
+            serialization.PrivateFormat.TraditionalOpenSSL,
+            serialization.NoEncryption(),
+        )
+    )
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    context.load_cert_chain(cert_path, key_path)
+    return context
+
+
+class Command(BenchmarkCommand):
+    help = (
+        "Measure OTP sized emails per second of one worker against a local"
+        " SMTP stand-in, with a new connection per message like"
+        " EmailMessage.send() and over one PersistentMailConnection like"
+        " the send_email task."
+    )
+    columns = (
+        ("connection", "connection", ""),
+        ("messages_per_s", "msgs/s", ".1f"),
+        ("ms_per_message", "ms/msg", ".2f"),
+        ("received", "received", ""),
+    )
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument(
+            "--messages",
+            type=int,
+            default=500,
+            help="Emails sent per mode.",
+        )
+        parser.add_argument(
+            "--no-ssl",
+            action="store_true",
+            help="Plain SMTP instead of implicit TLS like EMAIL_USE_SSL.",
+        )
+        parser.add_argument(
+            "--reply-ms",
+            type=float,
+            default=0,
+            help="Delay of every server reply, e.g. a remote server's RTT.",
+        )
+
+    def validate(self, options):
+        if options["messages"] < 1:
+            raise CommandError("--messages must be >= 1")
+
+    def measure(self, options):
+        count = options["messages"]
+        with tempfile.TemporaryDirectory() as directory:
+            context = None if options["no_ssl"] else self_signed_context(
+                directory
+            )
+            server = SinkServer(context, options["reply_ms"] / 1000)
+            thread = threading.Thread(target=server.serve_forever, daemon=True)
+            thread.start()
+            try:
+                with override_settings(
+                    EMAIL_BACKEND=(
+                        "django.core.mail.backends.smtp.EmailBackend"
+                    ),
+                    EMAIL_HOST="127.0.0.1",
+                    EMAIL_PORT=server.server_address[1],
+                    EMAIL_USE_SSL=context is not None,
+                    EMAIL_USE_TLS=False,
+                    EMAIL_HOST_USER="",
+                    EMAIL_HOST_PASSWORD="",
+                ):
+                    return self.send_all(server, count)
+            finally:
+                server.shutdown()
+                server.server_close()
+
+    def send_all(self, server, count: int) -> list:
+        persistent = PersistentMailConnection(max_age=3600)
+
+        def per_message(mail):
+            get_connection(fail_silently=False).send_messages([mail])
+
+        rows = []
+        for name, send in (
+            ("per_message", per_message),
+            ("persistent", lambda mail: persistent.send_messages([mail])),
+        ):
+            received = server.messages
+            started = time.perf_counter()
+            for i in range(count):
+                send(self.message(i))
+            elapsed = time.perf_counter() - started
+            persistent.close()
+            rows.append(
+                {
+                    "connection": name,
+                    "messages_per_s": count / elapsed,
+                    "ms_per_message": elapsed / count * 1000,
+                    "received": server.messages - received,
+                }
+            )
+        return rows
+
+    @staticmethod
+    def message(index: int) -> EmailMessage:
+        mail = EmailMessage(
+            subject="OTP code",
+            body=f"<p>Your code is {index:06d}</p>",
+            from_email="noreply@example.com",
+            to=[f"user{index}@example.com"],
+        )
+        mail.content_subtype = "html"
+        return mail
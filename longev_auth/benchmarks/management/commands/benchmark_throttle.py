@@ -0,0 +1,118 @@
+import statistics
+import time
+from types import SimpleNamespace
+
+from django.conf import settings
+from django.core.management.base import CommandError
+from django.test.utils import override_settings
+from rest_framework.parsers import JSONParser
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from api import throttling
+from api.testing import isolated_redis_data
+from benchmarks.harness import DOWN_REDIS_URL, BenchmarkCommand, percentile
+
+SCOPE = "benchmark"
+# High enough that every request passes and every bucket is updated.
+RATE = "1000000/s"
+
+
+class Command(BenchmarkCommand):
+    help = (
+        "Measure the time the email, IP and global throttles of the auth"
+        " endpoints take to decide on one request, with local token"
+        " buckets, Redis token buckets updated in one call per request or"
+        " in one call per throttle, and Redis down (local fallback)."
+    )
+    columns = (
+        ("backend", "backend", ""),
+        ("mean_us", "mean us", ".1f"),
+        ("p50_us", "p50 us", ".1f"),
+        ("p99_us", "p99 us", ".1f"),
+        ("max_us", "max us", ".1f"),
+    )
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument(
+            "--requests",
+            type=int,
+            default=20000,
+            help="Requests decided per backend.",
+        )
+        parser.add_argument(
+            "--clients",
+            type=int,
+            default=1000,
+            help="Distinct emails and addresses the requests come from.",
+        )
+
+    def validate(self, options):
+        if options["requests"] < 1 or options["clients"] < 1:
+            raise CommandError("--requests and --clients must be >= 1")
+
+    def measure(self, options):
+        count, clients = options["requests"], options["clients"]
+        factory = APIRequestFactory()
+        requests = []
+        for i in range(count):
+            client = i % clients
+            request = Request(
+                factory.post(
+                    "/",
+                    {"email": f"user{client}@example.com"},
+                    format="json",
+                    HTTP_X_REAL_IP=f"10.{client >> 16 & 255}"
+                    f".{client >> 8 & 255}.{client & 255}",
+                ),
+                parsers=[JSONParser()],
+            )
+            # Parsing is the view's cost, not the throttles'.
+            request.data
+            requests.append(request)
+        view = SimpleNamespace(throttle_scope=SCOPE)
+        separate = throttling.AuthRateThrottle.throttle_classes
+        rates = {f"{SCOPE}.{throttle.kind}": RATE for throttle in separate}
+
+        rows = []
+        combined = throttling.AUTH_THROTTLE_CLASSES
+        for name, backend, url, throttle_classes in (
+            ("local", "local", settings.THROTTLE_REDIS_URL, combined),
+            ("redis", "redis", settings.THROTTLE_REDIS_URL, combined),
+            ("redis_separate", "redis", settings.THROTTLE_REDIS_URL, separate),
+            ("redis_down", "redis", DOWN_REDIS_URL, combined),
+        ):
+            with isolated_redis_data(
+                f"benchmark-{time.time_ns()}"
+            ), override_settings(
+                THROTTLE_BACKEND=backend,
+                THROTTLE_REDIS_URL=url,
+                REST_FRAMEWORK={
+                    **settings.REST_FRAMEWORK,
+                    "DEFAULT_THROTTLE_RATES": rates,
+                },
+            ):
+                latencies = self.decide(requests, view, throttle_classes)
+            rows.append(
+                {
+                    "backend": name,
+                    "mean_us": statistics.mean(latencies) * 1e6,
+                    "p50_us": percentile(latencies, 0.50) * 1e6,
+                    "p99_us": percentile(latencies, 0.99) * 1e6,
+                    "max_us": latencies[-1] * 1e6,
+                }
+            )
+        return rows
+
+    @staticmethod
+    def decide(requests: list, view, throttle_classes) -> list:
+        """Run the throttles on every request like APIView does."""
+        latencies = []
+        for request in requests:
+            started = time.perf_counter()
+            for throttle_class in throttle_classes:
+                if not throttle_class().allow_request(request, view):
+                    raise CommandError("Request throttled, rate too low")
+            latencies.append(time.perf_counter() - started)
+        return sorted(latencies)
@@ -0,0 +1,176 @@
+import json
+import tempfile
+import threading
+import time
+from io import StringIO
+from pathlib import Path
+from types import SimpleNamespace
+from unittest import skipUnless
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from api.email_filter import make_email_filter
+from api.last_login import LastLoginBuffer, get_last_login_buffer
+from api.testing import reset_redis_clients
+from api.tests.test_email_filter import redis_available
+from api.tests.test_profile_cache import LOCMEM_CACHES
+from api.token_store import RevokedTokenStore
+from benchmarks.management.commands.benchmark_api import (
+    SCENARIOS,
+    Command,
+    RequestThreads,
+    Scenario,
+)
+
+
+class BenchmarkApiCommandTest(TestCase):
+    """Benchmark command run on a few requests per scenario."""
+
+    def setUp(self):
+        output_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(output_dir.cleanup)
+        self.output = Path(output_dir.name, "result.json")
+
+    def benchmark(self, **options) -> Command:
+        command = Command(stdout=StringIO())
+        call_command(
+            command,
+            requests=3,
+            warmup=1,
+            concurrency=1,
+            output=self.output,
+            no_test_database=True,
+            **options,
+        )
+        return command
+
+    def test_results_are_saved(self):
+        result = self.benchmark(scenarios=["otp_auth", "profile_read"]).results
+        self.assertEqual(json.loads(self.output.read_text()), result)
+        self.assertEqual(
+            set(result["scenarios"]), {"otp_auth", "profile_read"}
+        )
+        for stats in result["scenarios"].values():
+            self.assertEqual(stats["requests"], 3)
+            self.assertEqual(stats["errors"], 0)
+            self.assertLessEqual(stats["p50_ms"], stats["p99_ms"])
+            self.assertGreater(stats["queries_per_request"], 0)
+
+    def test_connections_are_closed_like_a_server(self):
+        # The test client skips close_old_connections at request end.
+        with patch(
+            "benchmarks.management.commands.benchmark_api"
+            ".close_old_connections"
+        ) as close_old_connections:
+            result = self.benchmark(scenarios=["profile_read"]).results
+        self.assertEqual(close_old_connections.call_count, 4)
+        stats = result["scenarios"]["profile_read"]
+        self.assertEqual(stats["connections_per_request"], 0)
+
+    def test_background_load(self):
+        # Threads cannot share the in-memory test database, so the
+        # background scenario here sends nothing.
+        class Stub(Scenario):
+            def call(self, client, arg):
+                return SimpleNamespace(status_code=200)
+
+        command = Command()
+        with patch.dict(SCENARIOS, stub=Stub), patch.object(
+            command, "create_users", return_value=[1, 2]
+        ):
+            background = command.start_background("stub", 2, concurrency=2)
+            time.sleep(0.01)
+            stats = command.stop_background(background, elapsed=0.01)
+        self.assertEqual(stats["scenario"], "stub")
+        self.assertGreater(stats["requests"], 0)
+        self.assertEqual(stats["errors"], 0)
+
+    def test_logins_are_kept_apart(self):
+        key = get_last_login_buffer().key
+        with patch.object(LastLoginBuffer, "record", autospec=True) as record:
+            self.benchmark(scenarios=["otp_auth"])
+        self.assertEqual(record.call_count, 4)
+        for call in record.call_args_list:
+            self.assertTrue(call.args[0].key.startswith("benchmark-"))
+        self.assertEqual(get_last_login_buffer().key, key)
+
+    @skipUnless(redis_available(), "Redis is not available")
+    def test_revoked_tokens_are_kept_apart(self):
+        with patch.object(
+            RevokedTokenStore, "revoke", autospec=True, return_value=True
+        ) as revoke:
+            result = self.benchmark(scenarios=["token_refresh"]).results
+        self.assertEqual(result["scenarios"]["token_refresh"]["errors"], 0)
+        self.assertEqual(revoke.call_count, 4)
+        for call in revoke.call_args_list:
+            self.assertTrue(call.args[0].key_prefix.startswith("benchmark-"))
+
+    @skipUnless(redis_available(), "Redis is not available")
+    @override_settings(EMAIL_FILTER_ENABLED=True, EMAIL_FILTER_CAPACITY=100)
+    def test_email_filter_is_kept_apart(self):
+        # Users of the benchmark database are not in the live filter.
+        reset_redis_clients()
+        self.addCleanup(reset_redis_clients)
+        email_filter = make_email_filter()
+        email_filter.rebuild([])
+        self.addCleanup(email_filter.client.delete, email_filter.key)
+        result = self.benchmark(scenarios=["signup", "otp_auth"]).results
+        for stats in result["scenarios"].values():
+            self.assertEqual(stats["errors"], 0)
+        self.assertEqual(email_filter.client.bitcount(email_filter.key), 0)
+
+    def test_comparison_with_baseline(self):
+        result = self.benchmark(scenarios=["profile_read"]).results
+        baseline = self.output.with_name("baseline.json")
+        self.output.rename(baseline)
+        command = self.benchmark(scenarios=["profile_read"], compare=baseline)
+        self.assertEqual(command.baseline["commit"], result["commit"])
+        self.assertIn(f"  vs {result['commit']}", command.stdout.getvalue())
+
+    def test_asgi_requests(self):
+        class Stub(Scenario):
+            async def call(self, client, arg):
+                self.headers = client.headers({"HTTP_IF_NONE_MATCH": arg})
+                return SimpleNamespace(status_code=200, content=b"ok")
+
+        scenario = Stub()
+        samples = Command().run_requests_async(
+            scenario, ["a", "b", "c"], concurrency=2
+        )
+        self.assertEqual(len(samples), 3)
+        for _, status, queries, writes, size in samples:
+            self.assertEqual(status, 200)
+            self.assertEqual(size, 2)
+            self.assertIsNone(queries)
+            self.assertIsNone(writes)
+        self.assertIn(scenario.headers["if-none-match"], {"b", "c"})
+
+    def test_request_threads_serve_waiting_requests_in_order(self):
+        threads = RequestThreads(1)
+        served = []
+
+        def request(name):
+            with threads:
+                served.append(name)
+
+        with threads:
+            waiting = []
+            for name in ("first", "second"):
+                waiting.append(threading.Thread(target=request, args=(name,)))
+                waiting[-1].start()
+                while len(threads.waiting) < len(waiting):
+                    time.sleep(0.001)
+            self.assertEqual(served, [])
+        for thread in waiting:
+            thread.join()
+        self.assertEqual(served, ["first", "second"])
+        self.assertEqual(threads.busy, 0)
+
+    @override_settings(CACHES=LOCMEM_CACHES)
+    def test_repeated_token_is_cached(self):
+        result = self.benchmark(scenarios=["profile_repeat"]).results
+        self.assertEqual(
+            result["scenarios"]["profile_repeat"]["queries_per_request"], 0
+        )
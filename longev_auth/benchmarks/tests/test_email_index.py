@@ -0,0 +1,37 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import TransactionTestCase
+
+from benchmarks.management.commands.benchmark_email_index import Command
+
+User = get_user_model()
+
+
+class BenchmarkEmailIndexCommandTest(TransactionTestCase):
+    """Both index setups are measured and the extra index is dropped."""
+
+    def test_reports_index_setups(self):
+        command = Command(stdout=StringIO())
+        call_command(
+            command,
+            users=20,
+            signups=2,
+            lookups=5,
+            iexact_lookups=2,
+            no_test_database=True,
+        )
+        rows = {row["indexes"]: row for row in command.results}
+        self.assertEqual(
+            list(rows), ["unique", "unique + plain", "iexact, no index"]
+        )
+        self.assertGreater(rows["unique"]["signups_per_s"], 0)
+        self.assertIsNone(rows["iexact, no index"]["signups_per_s"])
+        self.assertEqual(User.objects.count(), 24)
+        with connection.cursor() as cursor:
+            constraints = connection.introspection.get_constraints(
+                cursor, User._meta.db_table
+            )
+        self.assertNotIn("users_user_email_6f2530_idx", constraints)
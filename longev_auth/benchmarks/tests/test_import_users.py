@@ -0,0 +1,35 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from benchmarks.management.commands.benchmark_import_users import Command
+from users.models import User
+
+
+class BenchmarkImportUsersCommandTest(TestCase):
+    """Generated rows are all imported."""
+
+    def test_imports_generated_rows(self):
+        command = Command(stdout=StringIO())
+        call_command(
+            command,
+            rows=30,
+            raw_passwords=2,
+            batch_size=8,
+            workers=1,
+            no_test_database=True,
+        )
+        self.assertEqual(
+            command.results,
+            {
+                "processed": 30,
+                "created": 30,
+                "duplicates": 0,
+                "skipped": 0,
+                "invalid": 0,
+            },
+        )
+        self.assertEqual(
+            User.objects.filter(email__startswith="import-").count(), 30
+        )
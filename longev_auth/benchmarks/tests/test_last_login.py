@@ -0,0 +1,26 @@
+from io import StringIO
+from unittest import skipUnless
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from api.tests.test_email_filter import redis_available
+from benchmarks.management.commands.benchmark_last_login import Command
+
+
+@skipUnless(redis_available(), "Redis server is not available")
+class BenchmarkLastLoginCommandTest(TestCase):
+    """Buffered logins are written once per user."""
+
+    def test_buffer_coalesces_logins(self):
+        command = Command(stdout=StringIO())
+        with self.assertLogs("api.last_login", "WARNING"):
+            call_command(
+                command, users=4, devices=3, no_test_database=True
+            )
+        statements = {
+            row["writes"]: row["statements"] for row in command.results
+        }
+        self.assertEqual(
+            statements, {"full_save": 12, "fallback": 12, "buffered": 4}
+        )
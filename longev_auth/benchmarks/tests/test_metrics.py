@@ -0,0 +1,39 @@
+import os
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import SimpleTestCase
+from prometheus_client import values
+
+from api import metrics
+from benchmarks.management.commands.benchmark_metrics import Command
+
+
+class BenchmarkMetricsCommandTest(SimpleTestCase):
+    """Every operation is timed in both value modes."""
+
+    def test_operations_are_timed(self):
+        value_class = values.ValueClass
+        view_queries = metrics.VIEW_DB_QUERIES
+        multiproc_dir = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+        command = Command(stdout=StringIO())
+        call_command(command, calls=10)
+        self.assertEqual(
+            [row["operation"] for row in command.results],
+            [
+                "histogram_time",
+                "histogram_observe",
+                "labelled_inc",
+                "bound_inc",
+                "middleware",
+            ],
+        )
+        for row in command.results:
+            self.assertGreater(row["single_ns"], 0)
+            self.assertGreater(row["multi_ns"], 0)
+        # Metrics of the app are left as they were.
+        self.assertIs(values.ValueClass, value_class)
+        self.assertIs(metrics.VIEW_DB_QUERIES, view_queries)
+        self.assertEqual(
+            os.environ.get("PROMETHEUS_MULTIPROC_DIR"), multiproc_dir
+        )
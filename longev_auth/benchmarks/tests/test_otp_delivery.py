@@ -0,0 +1,40 @@
+from io import StringIO
+from unittest import skipUnless
+
+import redis
+from django.conf import settings
+from django.core.management import call_command
+from django.test import SimpleTestCase
+
+from benchmarks.management.commands.benchmark_otp_delivery import Command
+
+
+def redis_available() -> bool:
+    try:
+        return redis.Redis.from_url(settings.CELERY_BROKER_URL).ping()
+    except redis.RedisError:
+        return False
+
+
+@skipUnless(redis_available(), "Redis broker is not available")
+class BenchmarkOtpDeliveryCommandTest(SimpleTestCase):
+    """OTP emails overtake a backlog on their queue, or expire behind it."""
+
+    def test_otp_queue_overtakes_backlog(self):
+        command = Command(stdout=StringIO())
+        call_command(
+            command, backlog=60, otps=3, smtp_ms=25, otp_lifetime=1
+        )
+        rows = {row["routing"]: row for row in command.results}
+        self.assertEqual(
+            rows["shared"],
+            {
+                "routing": "shared",
+                "p50_ms": None,
+                "p95_ms": None,
+                "max_ms": None,
+                "dropped": 3,
+            },
+        )
+        self.assertEqual(rows["otp_queue"]["dropped"], 0)
+        self.assertLess(rows["otp_queue"]["max_ms"], 1000)
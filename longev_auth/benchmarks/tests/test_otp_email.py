@@ -0,0 +1,17 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import SimpleTestCase
+
+from benchmarks.management.commands.benchmark_otp_email import Command
+
+
+class BenchmarkOtpEmailCommandTest(SimpleTestCase):
+    """The context message is smaller than the rendered one."""
+
+    def test_context_message_is_smaller(self):
+        command = Command(stdout=StringIO())
+        call_command(command, emails=5)
+        sizes = {row["path"]: row["bytes"] for row in command.results}
+        self.assertEqual(set(sizes), {"render_in_request", "context"})
+        self.assertLess(sizes["context"], sizes["render_in_request"])
@@ -0,0 +1,42 @@
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import SimpleTestCase
+
+from benchmarks.management.commands.benchmark_otp_generation import (
+    Command,
+    chi_squared_limit,
+)
+
+
+class BenchmarkOtpGenerationCommandTest(SimpleTestCase):
+    def test_reports_uniform(self):
+        command = Command(stdout=StringIO())
+        call_command(command, codes=2000, length=6)
+        self.assertEqual(
+            [row["generator"] for row in command.results["generators"]],
+            ["generate_otp", "per_character"],
+        )
+        self.assertEqual(len(command.results["positions"]), 6)
+        for row in command.results["positions"]:
+            self.assertLess(row["chi2"], row["limit"])
+
+    def test_biased_generator_fails(self):
+        with patch(
+            "benchmarks.management.commands.benchmark_otp_generation"
+            ".generate_otp",
+            return_value="000000",
+        ):
+            with self.assertRaises(CommandError):
+                call_command(
+                    "benchmark_otp_generation", codes=1000, stdout=StringIO()
+                )
+
+    def test_limit_approximates_quantile(self):
+        # 99.9% quantiles of chi-squared with 3, 9 and 35 degrees of freedom.
+        for df, quantile in ((3, 16.27), (9, 27.88), (35, 66.62)):
+            self.assertAlmostEqual(
+                chi_squared_limit(df), quantile, delta=quantile * 0.02
+            )
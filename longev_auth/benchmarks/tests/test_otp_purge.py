@@ -0,0 +1,28 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from api.models import OtpCode
+from benchmarks.management.commands.benchmark_otp_purge import Command
+
+
+class BenchmarkOtpPurgeCommandTest(TestCase):
+    """Seeded expired codes are purged by every batch size."""
+
+    def test_purges_seeded_codes(self):
+        command = Command(stdout=StringIO())
+        call_command(
+            command,
+            rows=50,
+            expired=100,
+            batch_sizes=[7, 0],
+            no_test_database=True,
+        )
+        rows = {row["batch"]: row for row in command.results}
+        self.assertEqual(set(rows), {7, "all"})
+        self.assertEqual(rows[7]["deleted"], 50)
+        self.assertEqual(rows[7]["deletes"], 8)
+        self.assertEqual(rows["all"]["deleted"], 50)
+        self.assertEqual(rows["all"]["deletes"], 1)
+        self.assertEqual(OtpCode.objects.count(), 0)
@@ -0,0 +1,26 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import SimpleTestCase
+
+from benchmarks.management.commands.benchmark_smtp import Command
+
+
+class BenchmarkSmtpCommandTest(SimpleTestCase):
+    """Every email reaches the local SMTP stand-in in both modes."""
+
+    def benchmark(self, **options):
+        command = Command(stdout=StringIO())
+        call_command(command, messages=3, **options)
+        return {row["connection"]: row for row in command.results}
+
+    def test_ssl(self):
+        rows = self.benchmark()
+        self.assertEqual(set(rows), {"per_message", "persistent"})
+        for row in rows.values():
+            self.assertEqual(row["received"], 3)
+
+    def test_plain(self):
+        rows = self.benchmark(no_ssl=True)
+        for row in rows.values():
+            self.assertEqual(row["received"], 3)
@@ -0,0 +1,21 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import SimpleTestCase
+
+from benchmarks.management.commands.benchmark_throttle import Command
+
+
+class BenchmarkThrottleCommandTest(SimpleTestCase):
+    """Every backend decides all requests without throttling one."""
+
+    def test_backends_are_measured(self):
+        command = Command(stdout=StringIO())
+        with self.assertLogs("api.throttling", "WARNING"):
+            call_command(command, requests=20, clients=5)
+        self.assertEqual(
+            [row["backend"] for row in command.results],
+            ["local", "redis", "redis_separate", "redis_down"],
+        )
+        for row in command.results:
+            self.assertGreater(row["mean_us"], 0)
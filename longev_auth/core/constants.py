@@ -28,3 +28,10 @@ class Messages:
     PROFILE_DELETED: Final = "Profile has been deleted"
     OTP_SENT_TO_EMAIL: Final = "Password code sent to your email {email}"
     OTP_EMAIL_SUBJECT: Final = "Longevity authorization credentials"
+    INVALID_REFRESH_TOKEN: Final = "Refresh token is invalid or expired"
+    TOKEN_REVOKED: Final = "Refresh token has been revoked"
+    SERVICE_BUSY: Final = "Service is busy, please retry later"
+    UNKNOWN_PASSWORD_HASH: Final = "Password hash algorithm is not supported"
+    PASSWORD_OR_HASH_REQUIRED: Final = (
+        "Either password or password_hash should be provided"
+    )
@@ -14,7 +14,42 @@ DOMAIN_URL = os.getenv("DOMAIN_URL", "localhost")
 DOMAIN = DOMAIN_URL if DEBUG else ""
 ALLOWED_HOSTS = os.getenv("ALLOWED_HOSTS", "").split()
 OTP_LENGTH = int(os.getenv("OTP_LENGTH", 6))
+# Characters otp codes are drawn from, digits by default.
+OTP_ALPHABET = os.getenv("OTP_ALPHABET", "0123456789")
 OTP_LIFETIME = int(os.getenv("OTP_LIFETIME", 600))
+# Repeated otp requests within OTP_RESEND_WINDOW seconds of the last issued
+# code neither replace it nor send another email, 0 disables it.
+OTP_RESEND_WINDOW = int(os.getenv("OTP_RESEND_WINDOW", 60))
+# Otp storage backend: api.otp_store.DatabaseOtpStore or RedisOtpStore.
+OTP_STORE = os.getenv("OTP_STORE", "api.otp_store.DatabaseOtpStore")
+# Expired OtpCode rows are purged every OTP_PURGE_INTERVAL seconds,
+# OTP_PURGE_BATCH_SIZE rows per delete statement.
+OTP_PURGE_INTERVAL = int(os.getenv("OTP_PURGE_INTERVAL", 600))
+OTP_PURGE_BATCH_SIZE = int(os.getenv("OTP_PURGE_BATCH_SIZE", 1000))
+# Request threads of every gunicorn worker, read by run.sh as well.
+GUNICORN_THREADS = int(os.getenv("GUNICORN_THREADS", 4))
+# Password verification pool: worker threads, extra queued checks and
+# Retry-After seconds returned when both are exhausted. Workers plus queue
+# must stay below GUNICORN_THREADS, so logins waiting for a hash always
+# leave a request thread for other requests. The queue takes the rest.
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", 2))
+PASSWORD_HASH_QUEUE_SIZE = int(
+    os.getenv(
+        "PASSWORD_HASH_QUEUE_SIZE",
+        max(GUNICORN_THREADS - PASSWORD_HASH_WORKERS - 1, 0),
+    )
+)
+PASSWORD_HASH_RETRY_AFTER = int(os.getenv("PASSWORD_HASH_RETRY_AFTER", 1))
+# Argon2 cost, measure with `python manage.py calibrate_password_hasher`.
+# Stored hashes with other costs are rehashed on the next login.
+ARGON2_TIME_COST = int(os.getenv("ARGON2_TIME_COST", 2))
+ARGON2_MEMORY_COST = int(os.getenv("ARGON2_MEMORY_COST", 102400))
+ARGON2_PARALLELISM = int(os.getenv("ARGON2_PARALLELISM", 8))
+# Serve auth and profile endpoints with async views (run under ASGI).
+ASYNC_API = os.getenv("ASYNC_API", "false").lower() == "true"
+# Verified access tokens kept per process, and max seconds an entry lives.
+JWT_AUTH_CACHE_SIZE = int(os.getenv("JWT_AUTH_CACHE_SIZE", 10000))
+JWT_AUTH_CACHE_TTL = int(os.getenv("JWT_AUTH_CACHE_TTL", 60))
 
 INSTALLED_APPS = [
     "django.contrib.admin",
@@ -31,7 +66,12 @@ INSTALLED_APPS = [
     "core.apps.CoreConfig",
 ]
 
+# Dev-only benchmark commands, left out of the Docker image.
+if (BASE_DIR / "benchmarks").is_dir():
+    INSTALLED_APPS.append("benchmarks.apps.BenchmarksConfig")
+
 MIDDLEWARE = [
+    "api.middleware.QueryCountMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -41,6 +81,15 @@ MIDDLEWARE = [
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
 
+# Sampled request timings and profiles of slow requests, see
+# api.middleware.ProfilingMiddleware.
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "false").lower() == "true"
+PROFILING_SAMPLE_RATE = float(os.getenv("PROFILING_SAMPLE_RATE", 0.01))
+PROFILING_SLOW_MS = int(os.getenv("PROFILING_SLOW_MS", 500))
+PROFILING_DIR = os.getenv("PROFILING_DIR", BASE_DIR / "profiles")
+if PROFILING_ENABLED:
+    MIDDLEWARE.insert(0, "api.middleware.ProfilingMiddleware")
+
 ROOT_URLCONF = "longev_auth.urls"
 
 TEMPLATES = [
@@ -72,11 +121,26 @@ DATABASES = {
         "PASSWORD": os.getenv("POSTGRES_PASSWORD", "password"),
         "HOST": os.getenv("DB_HOST", "localhost"),
         "PORT": os.getenv("DB_PORT", "5432"),
+        # Seconds a connection is kept for next requests, 0 closes it
+        # after every request.
+        "CONN_MAX_AGE": int(os.getenv("DB_CONN_MAX_AGE", 0)),
+        # Required behind pgbouncer in transaction pooling mode.
+        "DISABLE_SERVER_SIDE_CURSORS": (
+            os.getenv("DB_DISABLE_SERVER_SIDE_CURSORS", "false").lower()
+            == "true"
+        ),
     }
 }
+# Check a kept connection at request start and reconnect if it is broken,
+# only once it has been idle DB_CONN_HEALTH_CHECK_IDLE seconds since its
+# last request. Connections in steady use are not checked.
+DB_CONN_HEALTH_CHECKS = (
+    os.getenv("DB_CONN_HEALTH_CHECKS", "true").lower() == "true"
+)
+DB_CONN_HEALTH_CHECK_IDLE = int(os.getenv("DB_CONN_HEALTH_CHECK_IDLE", 10))
 
 PASSWORD_HASHERS = [
-    "django.contrib.auth.hashers.Argon2PasswordHasher",
+    "api.hashers.TunedArgon2PasswordHasher",
     "django.contrib.auth.hashers.PBKDF2PasswordHasher",
     "django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher",
     "django.contrib.auth.hashers.BCryptSHA256PasswordHasher",
@@ -106,9 +170,30 @@ REST_FRAMEWORK = {
     ),
     "DEFAULT_AUTHENTICATION_CLASSES": (
         # "rest_framework.authentication.TokenAuthentication",
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "api.authentication.CachedJWTAuthentication",
     ),
     "NON_FIELD_ERRORS_KEY": "errors",
+    # Token bucket rates of auth endpoints as "<throttle_scope>.<kind>",
+    # kind is email (per address), ip (per client) or global.
+    "DEFAULT_THROTTLE_RATES": {
+        "password.email": os.getenv("THROTTLE_PASSWORD_EMAIL", "10/min"),
+        "password.ip": os.getenv("THROTTLE_PASSWORD_IP", "60/min"),
+        "password.global": os.getenv("THROTTLE_PASSWORD_GLOBAL", "6000/min"),
+        "otp.email": os.getenv("THROTTLE_OTP_EMAIL", "3/min"),
+        "otp.ip": os.getenv("THROTTLE_OTP_IP", "30/min"),
+        "otp.global": os.getenv("THROTTLE_OTP_GLOBAL", "3000/min"),
+        "otp_auth.email": os.getenv("THROTTLE_OTP_AUTH_EMAIL", "10/min"),
+        "otp_auth.ip": os.getenv("THROTTLE_OTP_AUTH_IP", "60/min"),
+        "otp_auth.global": os.getenv("THROTTLE_OTP_AUTH_GLOBAL", "6000/min"),
+        "token_refresh.ip": os.getenv("THROTTLE_TOKEN_REFRESH_IP", "60/min"),
+        "token_refresh.global": os.getenv(
+            "THROTTLE_TOKEN_REFRESH_GLOBAL", "6000/min"
+        ),
+        "token_revoke.ip": os.getenv("THROTTLE_TOKEN_REVOKE_IP", "60/min"),
+        "token_revoke.global": os.getenv(
+            "THROTTLE_TOKEN_REVOKE_GLOBAL", "6000/min"
+        ),
+    },
 }
 
 LANGUAGE_CODE = "en-us"
@@ -138,6 +223,8 @@ EMAIL_PORT = int(os.getenv("EMAIL_PORT"))
 EMAIL_HOST_USER = os.getenv("EMAIL_HOST_USER")
 EMAIL_HOST_PASSWORD = os.getenv("EMAIL_HOST_PASSWORD")
 EMAIL_USE_SSL = os.getenv("EMAIL_USE_SSL").lower() == "true"
+# Seconds a worker reuses one SMTP connection before reopening it.
+EMAIL_CONNECTION_MAX_AGE = int(os.getenv("EMAIL_CONNECTION_MAX_AGE", 60))
 
 SWAGGER_SETTINGS = {
     "SHOW_REQUEST_HEADERS": True,
@@ -153,9 +240,95 @@ SWAGGER_SETTINGS = {
 
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(minutes=60),
+    "REFRESH_TOKEN_LIFETIME": timedelta(
+        days=int(os.getenv("REFRESH_TOKEN_LIFETIME_DAYS", 7))
+    ),
     "AUTH_HEADER_TYPES": ("Bearer",),
-    "UPDATE_LAST_LOGIN": True,
-    "AUTH_TOKEN_CLASSES": ("rest_framework_simplejwt.tokens.AccessToken",),
+    # Logins are recorded by api.utils.record_login in batches.
+    "UPDATE_LAST_LOGIN": False,
+    "AUTH_TOKEN_CLASSES": ("api.tokens.AccessToken",),
 }
+# Token signing: HS256 with SECRET_KEY, or RS256, ES256 or EdDSA with PEM
+# private keys from JWT_KEYS_DIR, the last file by name signs new tokens.
+JWT_ALGORITHM = os.getenv("JWT_ALGORITHM", "HS256")
+JWT_KEYS_DIR = os.getenv("JWT_KEYS_DIR", BASE_DIR / "keys")
+# Seconds verifiers may cache the JWKS document.
+JWKS_MAX_AGE = int(os.getenv("JWKS_MAX_AGE", 600))
 
 CELERY_BROKER_URL = os.getenv("CELERY_BROKER_URL", "redis://localhost:6379/0")
+OTP_REDIS_URL = os.getenv("OTP_REDIS_URL", CELERY_BROKER_URL)
+OTP_REDIS_KEY_PREFIX = os.getenv("OTP_REDIS_KEY_PREFIX", "otp:")
+# Throttle buckets: "redis" (shared, local fallback) or "local" per process.
+THROTTLE_BACKEND = os.getenv("THROTTLE_BACKEND", "redis")
+THROTTLE_REDIS_URL = os.getenv("THROTTLE_REDIS_URL", CELERY_BROKER_URL)
+THROTTLE_REDIS_KEY_PREFIX = os.getenv("THROTTLE_REDIS_KEY_PREFIX", "throttle:")
+THROTTLE_REDIS_RETRY = int(os.getenv("THROTTLE_REDIS_RETRY", 30))
+THROTTLE_LOCAL_SIZE = int(os.getenv("THROTTLE_LOCAL_SIZE", 100000))
+# Bloom filter of registered emails answering unknown logins without DB.
+EMAIL_FILTER_ENABLED = os.getenv("EMAIL_FILTER_ENABLED", "false").lower() == "true"
+EMAIL_FILTER_REDIS_URL = os.getenv("EMAIL_FILTER_REDIS_URL", CELERY_BROKER_URL)
+EMAIL_FILTER_KEY = os.getenv("EMAIL_FILTER_KEY", "email_filter")
+EMAIL_FILTER_CAPACITY = int(os.getenv("EMAIL_FILTER_CAPACITY", 10_000_000))
+EMAIL_FILTER_ERROR_RATE = float(os.getenv("EMAIL_FILTER_ERROR_RATE", 0.01))
+# Revoked refresh token ids, kept until the tokens expire.
+TOKEN_REDIS_URL = os.getenv("TOKEN_REDIS_URL", CELERY_BROKER_URL)
+TOKEN_REDIS_KEY_PREFIX = os.getenv("TOKEN_REDIS_KEY_PREFIX", "revoked:")
+# Serialized user profiles with ETags, shared by all workers.
+PROFILE_CACHE_URL = os.getenv("PROFILE_CACHE_URL", CELERY_BROKER_URL)
+PROFILE_CACHE_TTL = int(os.getenv("PROFILE_CACHE_TTL", 300))
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    "profile": {
+        "BACKEND": "django_redis.cache.RedisCache",
+        "LOCATION": PROFILE_CACHE_URL,
+        "TIMEOUT": PROFILE_CACHE_TTL,
+        "KEY_PREFIX": "longev",
+        "OPTIONS": {
+            # Reads and writes go to the database while Redis is down.
+            "IGNORE_EXCEPTIONS": True,
+            "SOCKET_CONNECT_TIMEOUT": 0.1,
+            "SOCKET_TIMEOUT": 0.1,
+        },
+    },
+}
+# Last logins are buffered in Redis and written every
+# LAST_LOGIN_FLUSH_INTERVAL seconds, LAST_LOGIN_BATCH_SIZE rows per UPDATE.
+LAST_LOGIN_REDIS_URL = os.getenv("LAST_LOGIN_REDIS_URL", CELERY_BROKER_URL)
+LAST_LOGIN_REDIS_KEY = os.getenv("LAST_LOGIN_REDIS_KEY", "last_login")
+# Seconds logins are written to the database without trying a down Redis.
+LAST_LOGIN_REDIS_RETRY = int(os.getenv("LAST_LOGIN_REDIS_RETRY", 30))
+LAST_LOGIN_FLUSH_INTERVAL = int(os.getenv("LAST_LOGIN_FLUSH_INTERVAL", 60))
+LAST_LOGIN_BATCH_SIZE = int(os.getenv("LAST_LOGIN_BATCH_SIZE", 1000))
+# Tests keep last logins, otp codes and cached profiles under own keys.
+TEST_RUNNER = "api.testing.TestRunner"
+
+# Port of the celery worker metrics server, 0 disables it.
+CELERY_METRICS_PORT = int(os.getenv("CELERY_METRICS_PORT", 0))
+# OTP emails have a queue of their own for a dedicated worker. Workers
+# consuming several queues take them first, with Redis a lower priority
+# number is served first, whatever the queue.
+CELERY_OTP_QUEUE = os.getenv("CELERY_OTP_QUEUE", "otp")
+CELERY_OTP_PRIORITY = int(os.getenv("CELERY_OTP_PRIORITY", 0))
+CELERY_TASK_DEFAULT_QUEUE = os.getenv("CELERY_TASK_DEFAULT_QUEUE", "celery")
+CELERY_TASK_DEFAULT_PRIORITY = int(
+    os.getenv("CELERY_TASK_DEFAULT_PRIORITY", 6)
+)
+# Tasks are short and wait on SMTP: more processes than cores, each
+# reserving one task, so queued emails are not held by a busy process.
+CELERY_WORKER_CONCURRENCY = int(os.getenv("CELERY_WORKER_CONCURRENCY", 8))
+CELERY_WORKER_PREFETCH_MULTIPLIER = int(
+    os.getenv("CELERY_WORKER_PREFETCH_MULTIPLIER", 1)
+)
+
+CELERY_BEAT_SCHEDULE = {
+    "purge-expired-otps": {
+        "task": "api.tasks.purge_expired_otps",
+        "schedule": OTP_PURGE_INTERVAL,
+    },
+    "flush-last-logins": {
+        "task": "api.tasks.flush_last_logins",
+        "schedule": LAST_LOGIN_FLUSH_INTERVAL,
+    },
+}
@@ -1,10 +1,33 @@
 #!/bin/sh
 # run.sh
 
+# Metric files of previous runs would be summed with the new ones.
+if [ -n "$PROMETHEUS_MULTIPROC_DIR" ]; then
+    rm -rf "$PROMETHEUS_MULTIPROC_DIR"
+    mkdir -p "$PROMETHEUS_MULTIPROC_DIR"
+fi
+
+# Refuse to start with settings that fail the system checks.
+python manage.py check || exit 1
+
 python manage.py migrate
 
 python manage.py collectstatic --noinput
 
 cp -r /app/collected_static/. /backend_static/
 
-gunicorn longev_auth.wsgi --bind=0.0.0.0:8000
+if [ "${JWT_ALGORITHM:-HS256}" != "HS256" ]; then
+    python manage.py generate_jwt_key --if-missing
+fi
+
+if [ "$EMAIL_FILTER_ENABLED" = "true" ]; then
+    python manage.py rebuild_email_filter
+fi
+
+if [ "$ASYNC_API" = "true" ]; then
+    gunicorn longev_auth.asgi --bind=0.0.0.0:8000 \
+        --worker-class=uvicorn.workers.UvicornWorker
+else
+    gunicorn longev_auth.wsgi --bind=0.0.0.0:8000 \
+        --worker-class=gthread --threads=${GUNICORN_THREADS:-4}
+fi
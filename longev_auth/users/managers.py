@@ -1,12 +1,20 @@
 from django.contrib.auth.base_user import BaseUserManager
+from django.db import connections, transaction
+from django.db.models import Q
 
 
 class CustomUserManager(BaseUserManager):
+    @classmethod
+    def normalize_email(cls, email):
+        """Lowercase the whole email, emails are stored and looked up so."""
+        return (email or "").strip().lower()
+
     def create_user(self, email, password, **extra_fields):
         extra_fields.setdefault("is_staff", False)
         extra_fields.setdefault("is_superuser", False)
         if not email:
             raise ValueError("Users must have an email address")
+        email = self.normalize_email(email)
         user = self.model(email=email, **extra_fields)
         user.set_password(password)
         user.save()
@@ -21,3 +29,45 @@ class CustomUserManager(BaseUserManager):
         if extra_fields.get("is_superuser") is not True:
             raise ValueError("Superuser must have is_superuser=True.")
         return self.create_user(email=email, password=password, **extra_fields)
+
+    def update_last_logins(self, logins: dict, batch_size: int) -> int:
+        """Write user id -> last login time pairs, return updated rows.
+
+        On PostgreSQL every batch is one UPDATE ... FROM (VALUES ...), on
+        other databases rows are updated one by one. Only last_login is
+        written and never moved back in time.
+        """
+        items = list(logins.items())
+        connection = connections[self.db]
+        updated = 0
+        for start in range(0, len(items), batch_size):
+            batch = items[start:start + batch_size]
+            with transaction.atomic(using=self.db):
+                if connection.vendor == "postgresql":
+                    updated += self._update_last_logins_from_values(
+                        connection, batch
+                    )
+                    continue
+                for pk, last_login in batch:
+                    updated += self.filter(
+                        Q(last_login__isnull=True)
+                        | Q(last_login__lt=last_login),
+                        pk=pk,
+                    ).update(last_login=last_login)
+        return updated
+
+    def _update_last_logins_from_values(self, connection, batch) -> int:
+        quote_name = connection.ops.quote_name
+        table = quote_name(self.model._meta.db_table)
+        pk = quote_name(self.model._meta.pk.column)
+        values = ", ".join(["(%s, %s::timestamptz)"] * len(batch))
+        sql = (
+            f"UPDATE {table} AS u SET last_login = v.last_login"
+            f" FROM (VALUES {values}) AS v (id, last_login)"
+            f" WHERE u.{pk} = v.id"
+            " AND (u.last_login IS NULL OR u.last_login < v.last_login)"
+        )
+        params = [value for pair in batch for value in pair]
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return cursor.rowcount
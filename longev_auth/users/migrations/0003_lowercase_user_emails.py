@@ -0,0 +1,77 @@
+import logging
+
+from django.db import migrations, transaction
+from django.db.models import Count, Max, Min
+from django.db.models.functions import Lower
+
+logger = logging.getLogger(__name__)
+
+# Rows lowercased per transaction, so no single UPDATE locks the table.
+BATCH_SIZE = 10000
+EMAIL_LENGTH = 254
+
+
+def rename_case_duplicates(User, db_alias):
+    """Rename all but one account of emails differing only in case.
+
+    The active account joined last keeps the email, the others get
+    <local>+duplicate-<pk>@<domain> and are logged to be merged by hand.
+    """
+    users = User.objects.using(db_alias).annotate(email_lower=Lower("email"))
+    duplicates = list(
+        users.order_by()
+        .values("email_lower")
+        .annotate(accounts=Count("pk"))
+        .filter(accounts__gt=1)
+        .values_list("email_lower", flat=True)
+    )
+    for email in duplicates:
+        kept, *others = users.filter(email_lower=email).order_by(
+            "-is_active", "-date_joined", "-pk"
+        )
+        local, _, domain = email.rpartition("@")
+        for user in others:
+            suffix = f"+duplicate-{user.pk}@{domain}"
+            renamed = local[:EMAIL_LENGTH - len(suffix)] + suffix
+            logger.warning(
+                "User %s renamed from %s to %s, user %s keeps %s",
+                user.pk,
+                user.email,
+                renamed,
+                kept.pk,
+                email,
+            )
+            User.objects.using(db_alias).filter(pk=user.pk).update(
+                email=renamed
+            )
+
+
+def lowercase_emails(apps, schema_editor):
+    User = apps.get_model("users", "User")
+    db_alias = schema_editor.connection.alias
+    with transaction.atomic(using=db_alias):
+        rename_case_duplicates(User, db_alias)
+    bounds = User.objects.using(db_alias).aggregate(
+        first=Min("pk"), last=Max("pk")
+    )
+    if bounds["first"] is None:
+        return
+    for start in range(bounds["first"], bounds["last"] + 1, BATCH_SIZE):
+        with transaction.atomic(using=db_alias):
+            User.objects.using(db_alias).filter(
+                pk__gte=start, pk__lt=start + BATCH_SIZE
+            ).exclude(email=Lower("email")).update(email=Lower("email"))
+
+
+class Migration(migrations.Migration):
+    # Batches commit one by one instead of in one long transaction.
+
+    atomic = False
+
+    dependencies = [
+        ('users', '0002_alter_user_managers'),
+    ]
+
+    operations = [
+        migrations.RunPython(lowercase_emails, migrations.RunPython.noop),
+    ]
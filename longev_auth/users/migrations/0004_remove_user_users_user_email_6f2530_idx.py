@@ -0,0 +1,42 @@
+from django.contrib.postgres.operations import RemoveIndexConcurrently
+from django.db import migrations
+
+
+class RemoveIndexConcurrentlyOnPostgres(RemoveIndexConcurrently):
+    """Drop index without locking writes on PostgreSQL, plainly elsewhere."""
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            return super().database_forwards(
+                app_label, schema_editor, from_state, to_state
+            )
+        return migrations.RemoveIndex.database_forwards(
+            self, app_label, schema_editor, from_state, to_state
+        )
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            return super().database_backwards(
+                app_label, schema_editor, from_state, to_state
+            )
+        return migrations.RemoveIndex.database_backwards(
+            self, app_label, schema_editor, from_state, to_state
+        )
+
+
+class Migration(migrations.Migration):
+    # The unique index on email already serves every lookup, since emails
+    # are stored lowercased. The extra btree index only slows down writes.
+
+    atomic = False
+
+    dependencies = [
+        ('users', '0003_lowercase_user_emails'),
+    ]
+
+    operations = [
+        RemoveIndexConcurrentlyOnPostgres(
+            model_name='user',
+            name='users_user_email_6f2530_idx',
+        ),
+    ]
@@ -56,9 +56,6 @@ class User(AbstractUser):
         verbose_name = "User"
         verbose_name_plural = "Users"
         ordering = ("id",)
-        indexes = [
-            models.Index(fields=["email"]),
-        ]
 
     def __str__(self):
         return f"{self.id}:{self.email}"